@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Fleet Aggregation
+Author: thndrchckn
+Purpose: Aggregate validation reports from many hosts into fleet-wide statistics
+
+Reports (single JSON files, fleet/offline JSONL streams, or directories of either)
+are streamed in chunks into columnar NumPy arrays: one row per report, one int8
+status column per control, plus flat arrays of (row, finding) pairs. Nested report
+dictionaries are discarded as soon as their row is encoded, so memory grows with
+hosts x controls bytes rather than with report size, and per-control pass rates,
+per-client compliance, top findings and trends are computed with vectorized
+reductions over all rows at once.
+
+NumPy is only needed on the machine that aggregates, not on validated hosts.
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Reports encoded before their rows are converted into arrays
+DEFAULT_CHUNK_SIZE = int(os.environ.get('CMMC_AGGREGATE_CHUNK_SIZE', '5000'))
+# Width of the trend buckets (seconds)
+DEFAULT_TREND_INTERVAL = 86400
+
+UNASSIGNED_CLIENT = 'unassigned'
+
+# int8 status codes of the status matrix; MISSING marks controls a report lacks
+STATUS_CODES = {'PASS': 0, 'FAIL': 1, 'ERROR': 2, 'TIMEOUT': 3, 'NOT_APPLICABLE': 4, 'UNKNOWN': 5}
+MISSING = -1
+_PASS = STATUS_CODES['PASS']
+_NOT_APPLICABLE = STATUS_CODES['NOT_APPLICABLE']
+_FAILING = (STATUS_CODES['FAIL'], STATUS_CODES['ERROR'], STATUS_CODES['TIMEOUT'])
+
+
+def read_client_map(path: str) -> Dict[str, str]:
+    """Read 'host client' pairs, one per line; blank lines and '#' comments are ignored"""
+    clients = {}
+    with open(path, 'r') as f:
+        for line in f:
+            fields = line.split('#', 1)[0].split()
+            if len(fields) >= 2:
+                clients[fields[0]] = fields[1]
+    return clients
+
+
+def iter_reports(paths: Iterable[str]) -> Iterator[Tuple[Dict[str, Any], str]]:
+    """
+    Yield (report, source) from report files, JSONL streams and directories
+
+    '-' reads a JSONL stream from stdin. Directories are searched recursively for
+    *.json and *.jsonl files; symlinks (such as latest_compliance_report.json) are
+    skipped so no report is counted twice.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, subdirectories, names in os.walk(path):
+                subdirectories.sort()
+                files = [os.path.join(directory, name) for name in sorted(names)
+                         if name.endswith(('.json', '.jsonl'))]
+                yield from iter_reports(file for file in files if not os.path.islink(file))
+        elif path == '-':
+            for line in sys.stdin:
+                if line.strip():
+                    yield json.loads(line), path
+        elif path.endswith('.jsonl'):
+            with open(path, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line), path
+        else:
+            with open(path, 'r') as f:
+                yield json.load(f), path
+
+
+def _timestamp(value: Any) -> float:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+class FleetAggregate:
+    """Columnar host x control view of many validation reports"""
+
+    def __init__(self, client_map: Optional[Dict[str, str]] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            client_map: Client of each host; reports may also carry a 'client' field
+            chunk_size: Reports buffered before they are converted into arrays
+
+        Raises:
+            RuntimeError: NumPy is not installed
+        """
+        if np is None:
+            raise RuntimeError("Fleet aggregation requires NumPy (pip install numpy)")
+        self.client_map = client_map or {}
+        self.chunk_size = max(1, chunk_size)
+        self.hosts: Dict[str, int] = {}
+        self.clients: Dict[str, int] = {}
+        self.controls: Dict[str, int] = {}
+        self.findings: Dict[Tuple[str, str], int] = {}
+        self.skipped = 0
+        self.rows = 0
+        self._chunks: List[Dict[str, Any]] = []
+        self._pending: List[Tuple[int, int, float, List[int], List[int]]] = []
+        self._pending_findings: List[Tuple[int, int]] = []
+        self._arrays: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def _intern(table: Dict[Any, int], key: Any) -> int:
+        index = table.get(key)
+        if index is None:
+            index = table[key] = len(table)
+        return index
+
+    def add(self, report: Dict[str, Any]) -> bool:
+        """
+        Encode one validator report or fleet/offline JSONL record
+
+        Records without control results (unreachable or timed-out hosts) are
+        counted in `skipped`.
+
+        Returns:
+            True if the report was added
+        """
+        controls = report.get('controls')
+        if not isinstance(controls, dict) or not controls:
+            self.skipped += 1
+            return False
+
+        host = str(report.get('hostname') or report.get('host') or 'unknown')
+        client = report.get('client') or self.client_map.get(host) or UNASSIGNED_CLIENT
+        row = self.rows + len(self._pending)
+        columns, codes = [], []
+        for family_results in controls.values():
+            for control_id, result in family_results.items():
+                code = STATUS_CODES.get(result.get('status'), STATUS_CODES['UNKNOWN'])
+                columns.append(self._intern(self.controls, control_id))
+                codes.append(code)
+                if code in _FAILING:
+                    for finding in result.get('findings') or []:
+                        self._pending_findings.append((row, self._intern(self.findings, (control_id, finding))))
+        self._pending.append((self._intern(self.hosts, host), self._intern(self.clients, client),
+                              _timestamp(report.get('timestamp') or report.get('started_at')),
+                              columns, codes))
+        self._arrays = None
+        if len(self._pending) >= self.chunk_size:
+            self._flush()
+        return True
+
+    def load(self, paths: Iterable[str]) -> int:
+        """Stream reports from files, JSONL streams or directories; returns reports added"""
+        return sum(self.add(report) for report, _ in iter_reports(paths))
+
+    def _flush(self) -> None:
+        """Convert the pending reports into a chunk of arrays"""
+        if not self._pending:
+            return
+        count = len(self._pending)
+        status = np.full((count, len(self.controls)), MISSING, dtype=np.int8)
+        lengths = np.fromiter((len(columns) for _, _, _, columns, _ in self._pending), dtype=np.int64, count=count)
+        status[np.repeat(np.arange(count), lengths),
+               np.fromiter((c for _, _, _, columns, _ in self._pending for c in columns), dtype=np.int64)] = \
+            np.fromiter((c for _, _, _, _, codes in self._pending for c in codes), dtype=np.int8)
+        findings = np.array(self._pending_findings, dtype=np.int64).reshape(-1, 2)
+        self._chunks.append({
+            'host': np.fromiter((p[0] for p in self._pending), dtype=np.int32, count=count),
+            'client': np.fromiter((p[1] for p in self._pending), dtype=np.int32, count=count),
+            'ts': np.fromiter((p[2] for p in self._pending), dtype=np.float64, count=count),
+            'status': status,
+            'finding_row': findings[:, 0],
+            'finding_id': findings[:, 1],
+        })
+        self.rows += count
+        self._pending = []
+        self._pending_findings = []
+
+    def arrays(self) -> Dict[str, Any]:
+        """
+        Return the concatenated columns
+
+        Returns:
+            {'host', 'client', 'ts': per-row arrays, 'status': rows x controls int8
+            matrix, 'finding_row', 'finding_id': one entry per failing finding}
+        """
+        if self._arrays is None:
+            self._flush()
+            if not self._chunks:
+                return {'host': np.zeros(0, dtype=np.int32), 'client': np.zeros(0, dtype=np.int32),
+                        'ts': np.zeros(0), 'status': np.zeros((0, len(self.controls)), dtype=np.int8),
+                        'finding_row': np.zeros(0, dtype=np.int64), 'finding_id': np.zeros(0, dtype=np.int64)}
+            width = len(self.controls)
+            # Chunks encoded before a control first appeared lack its column
+            for chunk in self._chunks:
+                if chunk['status'].shape[1] < width:
+                    chunk['status'] = np.pad(chunk['status'], ((0, 0), (0, width - chunk['status'].shape[1])),
+                                             constant_values=MISSING)
+            self._arrays = {key: np.concatenate([chunk[key] for chunk in self._chunks])
+                            for key in self._chunks[0]}
+            # Keep one merged chunk so the columns are not held twice
+            self._chunks = [dict(self._arrays)]
+        return self._arrays
+
+    def latest_rows(self) -> Any:
+        """Row index of each host's newest report (reports without a timestamp sort oldest)"""
+        arrays = self.arrays()
+        order = np.lexsort((np.nan_to_num(arrays['ts'], nan=-np.inf), arrays['host']))
+        hosts = arrays['host'][order]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = hosts[1:] != hosts[:-1]
+        return order[last]
+
+    @staticmethod
+    def _row_totals(status: Any) -> Tuple[Any, Any, Any]:
+        """Per-row passed and applicable control counts, and whether any control is failing"""
+        passed = (status == _PASS).sum(axis=1)
+        applicable = ((status != MISSING) & (status != _NOT_APPLICABLE)).sum(axis=1)
+        failing = np.isin(status, _FAILING).any(axis=1)
+        return passed, applicable, failing
+
+    def pass_rates(self) -> Dict[str, Dict[str, Any]]:
+        """Per-control pass rate over each host's newest report"""
+        status = self.arrays()['status'][self.latest_rows()]
+        passed = (status == _PASS).sum(axis=0)
+        failing = np.isin(status, _FAILING).sum(axis=0)
+        evaluated = ((status != MISSING) & (status != _NOT_APPLICABLE)).sum(axis=0)
+        return {control_id: {
+                    'pass_rate': round(float(passed[i] / evaluated[i]) * 100, 2) if evaluated[i] else None,
+                    'passed': int(passed[i]),
+                    'failing': int(failing[i]),
+                    'evaluated': int(evaluated[i]),
+                } for control_id, i in self.controls.items()}
+
+    def client_compliance(self) -> Dict[str, Dict[str, Any]]:
+        """Per-client compliance over each host's newest report"""
+        arrays = self.arrays()
+        latest = self.latest_rows()
+        passed, applicable, failing = self._row_totals(arrays['status'][latest])
+        clients = arrays['client'][latest]
+        size = len(self.clients)
+        hosts = np.bincount(clients, minlength=size)
+        client_passed = np.bincount(clients, weights=passed, minlength=size)
+        client_applicable = np.bincount(clients, weights=applicable, minlength=size)
+        compliant = np.bincount(clients, weights=(~failing) & (applicable > 0), minlength=size)
+        return {client: {
+                    'hosts': int(hosts[i]),
+                    'compliant_hosts': int(compliant[i]),
+                    'compliance_percentage': (round(float(client_passed[i] / client_applicable[i]) * 100, 2)
+                                              if client_applicable[i] else None),
+                } for client, i in self.clients.items() if hosts[i]}
+
+    def top_findings(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Findings of failing controls affecting the most hosts (newest report per host)"""
+        arrays = self.arrays()
+        current = np.isin(arrays['finding_row'], self.latest_rows())
+        counts = np.bincount(arrays['finding_id'][current], minlength=len(self.findings))
+        names = list(self.findings)
+        top = np.argsort(-counts, kind='stable')[:limit]
+        return [{'control': names[i][0], 'finding': names[i][1], 'hosts': int(counts[i])}
+                for i in top if counts[i]]
+
+    def trend(self, interval: float = DEFAULT_TREND_INTERVAL) -> List[Dict[str, Any]]:
+        """Compliance of all reports per time bucket of interval seconds, oldest first"""
+        arrays = self.arrays()
+        dated = np.isfinite(arrays['ts'])
+        if not dated.any():
+            return []
+        passed, applicable, failing = self._row_totals(arrays['status'][dated])
+        buckets, inverse = np.unique(np.floor(arrays['ts'][dated] / interval).astype(np.int64),
+                                     return_inverse=True)
+        reports = np.bincount(inverse)
+        bucket_passed = np.bincount(inverse, weights=passed)
+        bucket_applicable = np.bincount(inverse, weights=applicable)
+        compliant = np.bincount(inverse, weights=~failing & (applicable > 0))
+        # Distinct hosts per bucket from unique (bucket, host) pairs
+        pairs = np.unique(inverse.astype(np.int64) * max(len(self.hosts), 1) + arrays['host'][dated])
+        hosts = np.bincount(pairs // max(len(self.hosts), 1), minlength=len(buckets))
+        return [{
+            'period_start': datetime.fromtimestamp(int(bucket) * interval).isoformat(),
+            'reports': int(reports[i]),
+            'hosts': int(hosts[i]),
+            'compliant_reports': int(compliant[i]),
+            'compliance_percentage': (round(float(bucket_passed[i] / bucket_applicable[i]) * 100, 2)
+                                      if bucket_applicable[i] else None),
+        } for i, bucket in enumerate(buckets)]
+
+    def summary(self, top: int = 10, interval: float = DEFAULT_TREND_INTERVAL) -> Dict[str, Any]:
+        """Fleet totals together with pass rates, client compliance, top findings and trend"""
+        arrays = self.arrays()
+        latest = self.latest_rows()
+        passed, applicable, failing = self._row_totals(arrays['status'][latest])
+        return {
+            'reports': self.rows,
+            'skipped_records': self.skipped,
+            'hosts': len(latest),
+            'compliant_hosts': int(((~failing) & (applicable > 0)).sum()),
+            'compliance_percentage': (round(float(passed.sum() / applicable.sum()) * 100, 2)
+                                      if applicable.sum() else None),
+            'controls': self.pass_rates(),
+            'clients': self.client_compliance(),
+            'top_findings': self.top_findings(top),
+            'trend': self.trend(interval),
+        }
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Audit Log Analyzer
+Author: thndrchckn
+Purpose: Incrementally analyze /var/log/audit/audit.log from a checkpointed byte offset
+
+Busy hosts write hundreds of MB of audit records per day, so each run only reads the
+bytes appended since the previous run. The checkpoint (inode, offset, last event time)
+lives in the state directory; when auditd has rotated the log, the analyzer finds the
+previously read file among audit.log.N by inode and walks forward to the live file.
+Records are streamed through a fixed-size buffer, so memory use does not depend on
+log size.
+"""
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+AUDIT_LOG_PATH = '/var/log/audit/audit.log'
+CHECKPOINT_FILE_NAME = 'audit_log_checkpoint.json'
+
+# Terms whose events prove the AU.1.012 audit rules are firing; matched against the
+# record's key="..." field and PATH record names
+REQUIRED_EVENT_TERMS = ('/etc/passwd', '/etc/shadow', 'privileged')
+
+READ_CHUNK_SIZE = 1024 * 1024
+# First run without a checkpoint only reads the tail of the live log
+INITIAL_WINDOW_BYTES = int(os.environ.get('CMMC_AUDIT_INITIAL_BYTES', str(64 * 1024 * 1024)))
+# Upper bound of bytes read per run; the remainder is picked up by the next run
+MAX_BYTES_PER_RUN = int(os.environ.get('CMMC_AUDIT_MAX_BYTES', str(256 * 1024 * 1024)))
+# Silence between consecutive events longer than this counts as a gap
+GAP_THRESHOLD_SECONDS = 300
+
+_MSG = re.compile(rb'msg=audit\((\d+)(?:\.\d+)?:(\d+)\)')
+_KEY = re.compile(rb' key="([^"]*)"')
+_NAME = re.compile(rb' name="([^"]*)"')
+
+
+class _Stats:
+    """Constant-size accumulator for one analysis pass"""
+
+    def __init__(self, terms: Iterable[str], last_event: Optional[float]):
+        self.terms = [(term, term.encode()) for term in terms]
+        self.records = 0
+        self.events = 0
+        self.first_event: Optional[float] = None
+        self.last_event = last_event
+        self.max_gap = 0.0
+        self.gaps = 0
+        self.term_events = {term: 0 for term, _ in self.terms}
+        self.term_last_seen: Dict[str, float] = {}
+        self._last_serial: Optional[bytes] = None
+
+    def feed(self, line: bytes) -> None:
+        match = _MSG.search(line)
+        if not match:
+            return
+        self.records += 1
+        timestamp, serial = float(match.group(1)), match.group(2)
+
+        # Records of one event share a serial; count and time events, not records
+        if serial != self._last_serial:
+            self._last_serial = serial
+            self.events += 1
+            if self.first_event is None:
+                self.first_event = timestamp
+            if self.last_event is not None and timestamp > self.last_event:
+                gap = timestamp - self.last_event
+                self.max_gap = max(self.max_gap, gap)
+                if gap > GAP_THRESHOLD_SECONDS:
+                    self.gaps += 1
+            if self.last_event is None or timestamp > self.last_event:
+                self.last_event = timestamp
+
+        fields = [m.group(1) for m in _KEY.finditer(line)] + [m.group(1) for m in _NAME.finditer(line)]
+        if fields:
+            for term, needle in self.terms:
+                if any(needle in field for field in fields):
+                    self.term_events[term] += 1
+                    self.term_last_seen[term] = timestamp
+
+
+class AuditLogAnalyzer:
+    """Checkpointed, streaming analyzer for auditd logs"""
+
+    def __init__(self, state_path: Path, log_path: str = AUDIT_LOG_PATH,
+                 terms: Iterable[str] = REQUIRED_EVENT_TERMS):
+        """
+        Args:
+            state_path: CMMC state directory holding the checkpoint
+            log_path: Live audit log; rotated files are log_path.1, .2, ...
+            terms: Terms whose events are counted
+        """
+        self.checkpoint_file = Path(state_path) / CHECKPOINT_FILE_NAME
+        self.log_path = log_path
+        self.terms = tuple(terms)
+
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        try:
+            with open(self.checkpoint_file, 'r') as f:
+                checkpoint = json.load(f)
+            return checkpoint if checkpoint.get('log_path') == self.log_path else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.checkpoint_file.with_name(self.checkpoint_file.name + '.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_file, self.checkpoint_file)
+
+    def _rotated_files(self) -> List[Tuple[str, os.stat_result]]:
+        """Return rotated logs oldest first (audit.log.N has the highest N oldest)"""
+        rotated = []
+        directory, base = os.path.split(self.log_path)
+        try:
+            names = os.listdir(directory or '.')
+        except OSError:
+            return []
+        for name in names:
+            suffix = name[len(base) + 1:]
+            if name.startswith(base + '.') and suffix.isdigit():
+                path = os.path.join(directory, name)
+                try:
+                    rotated.append((int(suffix), path, os.stat(path)))
+                except OSError:
+                    continue
+        return [(path, st) for _, path, st in sorted(rotated, reverse=True)]
+
+    def _plan_reads(self, checkpoint: Dict[str, Any],
+                    live: os.stat_result) -> Tuple[List[Tuple[str, int]], Optional[str]]:
+        """
+        Decide which files to read and from which offset
+
+        Returns:
+            ([(path, start_offset), ...] oldest first, reset_reason or None)
+        """
+        inode, offset = checkpoint.get('inode'), checkpoint.get('offset', 0)
+        if inode is None:
+            return [(self.log_path, max(0, live.st_size - INITIAL_WINDOW_BYTES))], 'no checkpoint'
+
+        if inode == live.st_ino:
+            if live.st_size < offset:
+                return [(self.log_path, 0)], 'log truncated'
+            return [(self.log_path, offset)], None
+
+        # The checkpointed file was rotated; continue from it, then newer files
+        rotated = self._rotated_files()
+        for index, (path, st) in enumerate(rotated):
+            if st.st_ino == inode:
+                reads = [(path, offset if st.st_size >= offset else 0)]
+                reads += [(newer, 0) for newer, _ in rotated[index + 1:]]
+                return reads + [(self.log_path, 0)], None
+        return [(self.log_path, 0)], 'checkpointed log rotated away'
+
+    def _stream(self, path: str, start: int, budget: int, stats: _Stats) -> Tuple[int, int]:
+        """
+        Feed complete lines from path[start:] into stats
+
+        A trailing partial line (still being written by auditd) is left for the
+        next run.
+
+        Returns:
+            (offset after the last complete line consumed, bytes read)
+        """
+        read = 0
+        with open(path, 'rb') as f:
+            if start > 0:
+                # Resync to a line boundary unless the offset already is one
+                f.seek(start - 1)
+                if f.read(1) != b'\n':
+                    start += len(f.readline())
+            offset = start
+            remainder = b''
+            while read < budget:
+                chunk = f.read(min(READ_CHUNK_SIZE, budget - read))
+                if not chunk:
+                    break
+                read += len(chunk)
+                data = remainder + chunk
+                end = data.rfind(b'\n')
+                if end < 0:
+                    remainder = data
+                    continue
+                for line in data[:end].split(b'\n'):
+                    stats.feed(line)
+                offset += end + 1
+                remainder = data[end + 1:]
+        return offset, read
+
+    def analyze(self, persist: bool = True) -> Dict[str, Any]:
+        """
+        Analyze records written since the previous run and advance the checkpoint
+
+        Args:
+            persist: Save the advanced checkpoint; runs that keep no state (offline
+                and fleet runs, tests) leave it for the next persisting run
+
+        Returns:
+            Record and event counts, rates, timestamp gaps and per-term event counts
+        """
+        try:
+            live = os.stat(self.log_path)
+        except OSError:
+            return {'available': False}
+
+        checkpoint = self._load_checkpoint()
+        reads, reset_reason = self._plan_reads(checkpoint, live)
+        stats = _Stats(self.terms, checkpoint.get('last_event'))
+        started = time.monotonic()
+
+        budget = MAX_BYTES_PER_RUN
+        bytes_read = 0
+        position = (self.log_path, checkpoint.get('offset', 0), checkpoint.get('inode'))
+        size = live.st_size
+        files_read = []
+        for path, start in reads:
+            if budget <= 0:
+                break
+            try:
+                st = os.stat(path)
+                offset, consumed = self._stream(path, start, budget, stats)
+            except OSError:
+                continue
+            files_read.append(path)
+            bytes_read += consumed
+            budget -= consumed
+            position = (path, offset, st.st_ino)
+            size = st.st_size
+
+        # The checkpoint always refers to the live log's inode once caught up;
+        # while behind, it points into the rotated file still being consumed
+        path, offset, inode = position
+        term_last_seen = dict(checkpoint.get('term_last_seen', {}))
+        term_last_seen.update(stats.term_last_seen)
+        new_checkpoint = {
+            'log_path': self.log_path,
+            'inode': inode,
+            'offset': offset,
+            'last_event': stats.last_event,
+            'term_last_seen': term_last_seen,
+            'updated_at': time.time(),
+        }
+        if persist:
+            try:
+                self._save_checkpoint(new_checkpoint)
+            except OSError:
+                pass
+
+        span = (stats.last_event - stats.first_event) if stats.first_event is not None else 0
+        return {
+            'available': True,
+            'files_read': files_read,
+            'bytes_read': bytes_read,
+            # A read that used up the budget exactly may still have reached the end
+            'caught_up': path == self.log_path and offset >= size,
+            'checkpoint_reset': reset_reason,
+            'records': stats.records,
+            'events': stats.events,
+            'first_event': stats.first_event,
+            'last_event': stats.last_event,
+            'events_per_minute': round(stats.events / (span / 60), 2) if span > 0 else None,
+            'max_gap_seconds': round(stats.max_gap, 1),
+            'gaps_over_threshold': stats.gaps,
+            'term_events': stats.term_events,
+            'terms_without_events': [term for term in self.terms if term not in term_last_seen],
+            'analysis_seconds': round(time.monotonic() - started, 3),
+        }
@@ -0,0 +1,772 @@
+#!/usr/bin/env python3
+"""
+CMMC Declarative Check Engine
+Author: thndrchckn
+Purpose: Compile the `checks` declared in cmmc_controls.yaml into an executable plan
+
+Controls can be validated without Python code by listing checks in the catalog:
+
+    checks:
+      - type: file_exists
+        path: /etc/cmmc/baselines/system_baseline.yaml
+        finding: "System baseline not documented"
+      - type: file_mode
+        path: /etc/ssh/ssh_host_*_key
+        max_mode: "0600"
+        owner: root
+      - type: directive
+        path: /etc/security/pwquality.conf
+        key: minlen
+        separator: "="
+        min: 14
+      - type: any_of
+        finding: "Automatic updates not configured"
+        checks:
+          - {type: service_active, service: unattended-upgrades}
+          - {type: service_active, service: dnf-automatic.timer}
+      - type: package_installed
+        package: aide
+
+Checks that several frameworks rely on are declared once under `shared_checks` and
+referenced with `{type: shared, check: <name>}` from CMMC controls and from the
+controls of the other frameworks listed under `frameworks` (SOC 2, HIPAA, PCI DSS,
+NIST 800-53). Shared checks may `require` other shared checks; together they form a
+DAG that is evaluated at most once per run, and a check whose prerequisite failed
+is not evaluated at all:
+
+    shared_checks:
+      sshd_installed: {type: file_exists, path: /etc/ssh/sshd_config}
+      ssh_key_only_auth:
+        requires: [sshd_installed]
+        type: sshd_option
+        key: PasswordAuthentication
+        equals: "no"
+    frameworks:
+      soc2:
+        title: "SOC 2"
+        controls:
+          CC6.1:
+            title: "Logical access security"
+            checks:
+              - {type: shared, check: ssh_key_only_auth}
+
+The catalog is compiled once into a normalized, JSON-serializable form and cached in
+the state directory keyed by the YAML's SHA-256 (with an mtime/size fast path), so
+later runs skip reading, parsing and validating the catalog entirely.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
+
+from cmmc_packages import PACKAGE_DB_PATHS, RPM_QUERY, PackageQueryError
+from cmmc_permissions import parse_ids, permission_violations
+from cmmc_scheduler import parse_duration
+from cmmc_sshd import SSHD_INPUTS
+
+# Bump when the compiled representation changes to invalidate cached plans
+COMPILER_VERSION = 8
+COMPILED_CACHE_NAME = 'compiled_catalog.json'
+
+# Catalog keys kept in the compiled form; descriptive text is dropped
+CONTROL_KEYS = ('family', 'level', 'title', 'files_affected', 'services_affected')
+# Scheduling keys, compiled to seconds (durations such as '1h' or numbers)
+SCHEDULING_KEYS = ('max_staleness', 'cost')
+
+# Violating files named in a file_mode failure message; the rest are counted
+MAX_LISTED_VIOLATIONS = 5
+
+
+class CatalogError(ValueError):
+    """Raised when a declared check is malformed"""
+
+
+# =============================================================================
+# COMPILATION
+# =============================================================================
+
+# Required and optional fields per check type
+CHECK_SCHEMA: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    'file_exists': (('path',), ()),
+    'file_mode': (('path',), ('mode', 'max_mode', 'owner', 'group', 'allow_missing')),
+    'directive': (('path', 'key'), ('equals', 'matches', 'not_matches', 'min', 'max',
+                                    'separator', 'ignore_case', 'default')),
+    'sshd_option': (('key',), ('equals', 'matches', 'not_matches', 'min', 'max')),
+    'service_active': (('service',), ()),
+    'command_output': (('argv',), ('matches', 'returncode')),
+    'package_installed': (('package',), ()),
+    'any_of': (('checks',), ()),
+    'shared': (('check',), ()),
+}
+COMMON_FIELDS = ('type', 'name', 'finding')
+# Only allowed on entries of shared_checks
+SHARED_FIELDS = ('requires',)
+
+
+def _default_name(check: Dict[str, Any]) -> str:
+    """Derive a stable details key for a check without an explicit name"""
+    subject = check.get('key') or check.get('service') or check.get('package') or check.get('path')
+    if check['type'] == 'command_output':
+        subject = ' '.join(check['argv'])
+    if check['type'] == 'any_of':
+        subject = '|'.join(child['name'] for child in check['checks'])
+    if check['type'] == 'shared':
+        # Same details key in every framework referencing the check
+        return check['check']
+    return f"{check['type']}:{subject}"
+
+
+def _octal_mode(value: Any, where: str) -> int:
+    """
+    Convert a quoted octal mode such as "0644" to an integer
+
+    YAML 1.1 reads an unquoted 0644 as the integer 420 and 644 as 644, so only
+    strings are accepted rather than guessing which was meant.
+    """
+    if not isinstance(value, str):
+        raise CatalogError(f"{where} must be a quoted octal string such as \"0644\", not {value!r}")
+    try:
+        mode = int(value, 8)
+    except ValueError:
+        raise CatalogError(f"{where} is not an octal mode: {value!r}")
+    if not 0 <= mode <= 0o7777:
+        raise CatalogError(f"{where} is out of range: {value!r}")
+    return mode
+
+
+def _compile_check(raw: Any, where: str, shared: Collection[str] = ()) -> Dict[str, Any]:
+    """
+    Validate one check declaration and return its normalized form
+
+    Args:
+        raw: Check mapping from the catalog
+        where: Location used in error messages
+        shared: Names of the declared shared checks
+    """
+    if not isinstance(raw, dict) or 'type' not in raw:
+        raise CatalogError(f"{where}: each check must be a mapping with a 'type'")
+    check_type = raw['type']
+    if check_type not in CHECK_SCHEMA:
+        raise CatalogError(f"{where}: unknown check type '{check_type}'")
+
+    required, optional = CHECK_SCHEMA[check_type]
+    missing = [field for field in required if field not in raw]
+    if missing:
+        raise CatalogError(f"{where}: {check_type} check missing {', '.join(missing)}")
+    unknown = set(raw) - set(required) - set(optional) - set(COMMON_FIELDS)
+    if unknown:
+        raise CatalogError(f"{where}: unsupported fields for {check_type}: {', '.join(sorted(unknown))}")
+
+    check = {key: raw[key] for key in raw if key not in ('checks',)}
+    if check_type == 'file_mode':
+        if 'mode' in raw and 'max_mode' in raw:
+            raise CatalogError(f"{where}: file_mode takes mode or max_mode, not both")
+        if not any(field in raw for field in ('mode', 'max_mode', 'owner', 'group')):
+            raise CatalogError(f"{where}: file_mode needs mode, max_mode, owner or group")
+        for field in ('owner', 'group'):
+            if field in raw:
+                check[field] = str(raw[field])
+        for field in ('mode', 'max_mode'):
+            if field in raw:
+                check[field] = _octal_mode(raw[field], f"{where}: file_mode {field}")
+    elif check_type == 'command_output':
+        if not isinstance(raw['argv'], list) or not raw['argv']:
+            raise CatalogError(f"{where}: command_output argv must be a non-empty list")
+        check['argv'] = [str(arg) for arg in raw['argv']]
+    elif check_type == 'package_installed':
+        check['package'] = str(raw['package'])
+    elif check_type in ('directive', 'sshd_option'):
+        for field in ('matches', 'not_matches'):
+            if field in raw:
+                try:
+                    re.compile(raw[field])
+                except re.error as e:
+                    raise CatalogError(f"{where}: invalid {field} pattern: {e}")
+    elif check_type == 'any_of':
+        if not isinstance(raw['checks'], list) or not raw['checks']:
+            raise CatalogError(f"{where}: any_of needs a non-empty checks list")
+        check['checks'] = [_compile_check(child, f"{where}.any_of[{index}]", shared)
+                           for index, child in enumerate(raw['checks'])]
+    elif check_type == 'shared':
+        check['check'] = str(raw['check'])
+        if check['check'] not in shared:
+            raise CatalogError(f"{where}: unknown shared check '{check['check']}'")
+
+    check.setdefault('name', _default_name(check))
+    return check
+
+
+def _compile_shared_checks(definitions: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Compile shared_checks and verify that their requirements form a DAG
+
+    Malformed entries, unknown requirements and cycles mark the entries involved
+    with a 'compile_error'; controls referencing them are reported as ERROR.
+    """
+    raw_checks = definitions or {}
+    names = set(raw_checks)
+    compiled: Dict[str, Dict[str, Any]] = {}
+    for name, raw in raw_checks.items():
+        where = f"shared_checks.{name}"
+        raw = raw if isinstance(raw, dict) else {}
+        requires = raw.get('requires') or []
+        try:
+            if not isinstance(requires, list):
+                raise CatalogError(f"{where}: requires must be a list of shared check names")
+            unknown = [str(prerequisite) for prerequisite in requires if prerequisite not in names]
+            if unknown:
+                raise CatalogError(f"{where}: requires unknown shared checks {', '.join(unknown)}")
+            check = _compile_check({key: value for key, value in raw.items() if key not in SHARED_FIELDS},
+                                   where, names)
+            check['requires'] = [str(prerequisite) for prerequisite in requires]
+        except CatalogError as e:
+            check = {'type': 'invalid', 'requires': [], 'compile_error': str(e)}
+        check['name'] = str(name)
+        compiled[str(name)] = check
+
+    # Depth-first search over requires (and references through `shared` checks)
+    state: Dict[str, str] = {}
+
+    def visit(name: str, path: List[str]) -> None:
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'active':
+            cycle = path[path.index(name):] + [name]
+            for member in cycle[:-1]:
+                compiled[member].setdefault(
+                    'compile_error', f"shared_checks.{member}: dependency cycle {' -> '.join(cycle)}")
+            return
+        state[name] = 'active'
+        for child in _shared_dependencies(compiled[name]):
+            visit(child, path + [name])
+        state[name] = 'done'
+
+    for name in compiled:
+        visit(name, [])
+    return compiled
+
+
+def _shared_dependencies(check: Dict[str, Any]) -> List[str]:
+    """Shared checks a check requires or references"""
+    dependencies = list(check.get('requires', []))
+    if check['type'] == 'shared':
+        dependencies.append(check['check'])
+    for child in check.get('checks', []):
+        dependencies.extend(_shared_dependencies(child))
+    return dependencies
+
+
+def _seconds(value: Any, where: str) -> float:
+    """Convert a duration ('90s', '1h') or a non-negative number to seconds"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0:
+        return float(value)
+    try:
+        return parse_duration(value)
+    except ValueError:
+        raise CatalogError(f"{where}: invalid duration {value!r}")
+
+
+def _compile_controls(definitions: Dict[str, Any], shared: Collection[str],
+                      prefix: str = '') -> Dict[str, Dict[str, Any]]:
+    """Compile a controls mapping; controls with malformed checks or scheduling keys carry a 'compile_error'"""
+    controls: Dict[str, Dict[str, Any]] = {}
+    for control_id, raw in (definitions or {}).items():
+        raw = raw or {}
+        control = {key: raw[key] for key in CONTROL_KEYS if key in raw}
+        try:
+            for key in SCHEDULING_KEYS:
+                if key in raw:
+                    control[key] = _seconds(raw[key], f"{prefix}{control_id}.{key}")
+            if 'checks' in raw:
+                control['checks'] = [_compile_check(check, f"{prefix}{control_id}.checks[{index}]", shared)
+                                     for index, check in enumerate(raw['checks'] or [])]
+        except CatalogError as e:
+            control['compile_error'] = str(e)
+        controls[control_id] = control
+    return controls
+
+
+def compile_catalog(definitions: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compile a parsed cmmc_controls.yaml into its normalized form
+
+    Malformed checks do not abort compilation; the affected control carries a
+    'compile_error' and is reported as ERROR when evaluated.
+
+    Returns:
+        Dictionary with 'control_families', 'controls', 'shared_checks',
+        'frameworks', 'validation_settings' and 'reporting_settings'
+    """
+    definitions = definitions or {}
+    shared_checks = _compile_shared_checks(definitions.get('shared_checks'))
+    frameworks = {}
+    for framework, raw in (definitions.get('frameworks') or {}).items():
+        raw = raw or {}
+        frameworks[str(framework)] = {
+            'title': raw.get('title', framework),
+            'controls': _compile_controls(raw.get('controls'), shared_checks, f"frameworks.{framework}."),
+        }
+
+    return {
+        'control_families': {
+            family: {'name': (info or {}).get('name', family)}
+            for family, info in (definitions.get('control_families') or {}).items()
+        },
+        'controls': _compile_controls(definitions.get('controls'), shared_checks),
+        'shared_checks': shared_checks,
+        'frameworks': frameworks,
+        'validation_settings': definitions.get('validation_settings') or {},
+        'reporting_settings': definitions.get('reporting_settings') or {},
+    }
+
+
+def load_compiled_catalog(control_file: Path, cache_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Return the compiled catalog for a YAML file, using the cache when valid
+
+    The cache is keyed by the SHA-256 of the YAML bytes and COMPILER_VERSION. When
+    the YAML's mtime and size match the values recorded in the cache the file is
+    not even read; otherwise it is hashed and only recompiled if the content
+    changed. PyYAML is imported only when compiling. An unwritable cache
+    directory only costs a recompile on the next run.
+
+    Raises:
+        OSError: The YAML file cannot be read
+        yaml.YAMLError: The YAML file cannot be parsed
+    """
+    st = os.stat(control_file)
+    cache_file = Path(cache_dir) / COMPILED_CACHE_NAME if cache_dir else None
+    cached: Dict[str, Any] = {}
+
+    if cache_file is not None:
+        try:
+            with open(cache_file, 'r') as f:
+                cached = json.load(f)
+            if cached.get('compiler_version') != COMPILER_VERSION:
+                cached = {}
+            elif (cached.get('source_mtime_ns') == st.st_mtime_ns
+                    and cached.get('source_size') == st.st_size):
+                return cached['catalog']
+        except (OSError, ValueError, KeyError):
+            cached = {}
+
+    source = Path(control_file).read_bytes()
+    source_hash = hashlib.sha256(source).hexdigest()
+    if cached.get('source_sha256') == source_hash and 'catalog' in cached:
+        # Touched but unchanged; refresh the recorded mtime below
+        catalog = cached['catalog']
+    else:
+        import yaml
+        catalog = compile_catalog(yaml.safe_load(source))
+
+    if cache_file is not None:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_name(cache_file.name + '.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump({'source_sha256': source_hash,
+                           'source_mtime_ns': st.st_mtime_ns,
+                           'source_size': st.st_size,
+                           'compiler_version': COMPILER_VERSION,
+                           'catalog': catalog}, f, separators=(',', ':'))
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass
+    return catalog
+
+
+# =============================================================================
+# EVALUATION
+# =============================================================================
+
+class CheckContext:
+    """Run-scoped evaluation context shared by all declarative checks"""
+
+    def __init__(self, probes, services, sshd_config: Optional[Callable[[], Any]] = None,
+                 packages: Optional[Callable[[], Any]] = None,
+                 shared_checks: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Args:
+            probes: ProbeCache for files and commands
+            services: ServiceStateProvider for unit states
+            sshd_config: Callable returning the run's shared SshdConfig
+            packages: Callable returning the run's shared PackageIndex
+            shared_checks: Compiled shared checks referenced by `shared` checks
+        """
+        self.probes = probes
+        self.services = services
+        self.sshd_config = sshd_config
+        self.packages = packages
+        self.shared_checks = shared_checks or {}
+        # Span recorder shared with the probe layer (timings.span(category, name))
+        self.timings = probes.timings
+        self._directives: Dict[Tuple[str, Optional[str], bool], Dict[str, str]] = {}
+        self._shared_results: Dict[str, Tuple[bool, str]] = {}
+        # Shared checks not evaluated -> the prerequisite that failed
+        self.skipped: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def shared_result(self, name: str) -> Tuple[bool, str]:
+        """
+        Evaluate a shared check once per run, after its prerequisites
+
+        A check whose prerequisite failed is not evaluated; it fails with the
+        prerequisite's message. Concurrent callers may evaluate a check twice,
+        but its probes are memoized by the probe layer.
+
+        Raises:
+            CatalogError: The shared check, or one it depends on, is malformed
+        """
+        with self._lock:
+            if name in self._shared_results:
+                return self._shared_results[name]
+
+        check = self.shared_checks[name]
+        if 'compile_error' in check:
+            raise CatalogError(check['compile_error'])
+        failed = next((prerequisite for prerequisite in check['requires']
+                       if not self.shared_result(prerequisite)[0]), None)
+        if failed is not None:
+            result = (False, f"Requires {failed}: {self.shared_result(failed)[1]}")
+        else:
+            result = evaluate_check(check, self)
+
+        with self._lock:
+            if failed is not None:
+                self.skipped[name] = failed
+            return self._shared_results.setdefault(name, result)
+
+    def directives(self, path: str, separator: Optional[str], ignore_case: bool) -> Dict[str, str]:
+        """
+        Parse a key/value configuration file once per run
+
+        The first occurrence of a key wins (sshd_config, login.defs semantics).
+
+        Raises:
+            OSError: The file cannot be read
+        """
+        cache_key = (path, separator, ignore_case)
+        with self._lock:
+            if cache_key in self._directives:
+                return self._directives[cache_key]
+
+        values: Dict[str, str] = {}
+        for line in self.probes.read_text(path).splitlines():
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if separator:
+                key, found, value = line.partition(separator)
+                if not found:
+                    continue
+            else:
+                parts = line.split(None, 1)
+                key, value = parts[0], parts[1] if len(parts) > 1 else ''
+            key, value = key.strip(), value.strip()
+            if ignore_case:
+                key = key.lower()
+            values.setdefault(key, value)
+
+        with self._lock:
+            self._directives[cache_key] = values
+        return values
+
+
+def _paths(ctx: CheckContext, pattern: str) -> List[str]:
+    """Expand a glob pattern; literal paths are returned unchanged"""
+    if _is_glob(pattern):
+        return ctx.probes.glob(pattern)
+    return [pattern]
+
+
+def _eval_file_exists(check: Dict[str, Any], ctx: CheckContext) -> Tuple[bool, str]:
+    exists = any(ctx.probes.exists(path) for path in _paths(ctx, check['path']))
+    return exists, f"Required file not found: {check['path']}"
+
+
+def _is_glob(pattern: str) -> bool:
+    return any(char in pattern for char in '*?[')
+
+
+def _account_id(ctx: CheckContext, database: str, name: str) -> Optional[int]:
+    """Resolve a user or group name (or numeric id) against the probed system's database"""
+    if name.isdigit():
+        return int(name)
+    try:
+        return parse_ids(ctx.probes.read_text(database)).get(name)
+    except OSError:
+        return None
+
+
+def _eval_file_mode(check: Dict[str, Any], ctx: CheckContext) -> Tuple[bool, str]:
+    pattern = check['path']
+    entries = ctx.probes.scan(pattern)
+    if not entries:
+        if check.get('allow_missing'):
+            return True, ''
+        return False, f"No files match {pattern}" if _is_glob(pattern) else f"Cannot stat {pattern}"
+
+    ids = {}
+    for field, database in (('owner', '/etc/passwd'), ('group', '/etc/group')):
+        if field in check:
+            ids[field] = _account_id(ctx, database, check[field])
+            if ids[field] is None:
+                return False, f"Unknown {field} {check[field]} for {pattern}"
+
+    violations = permission_violations(entries, check.get('mode'), check.get('max_mode'),
+                                       ids.get('owner'), ids.get('group'),
+                                       check.get('owner', ''), check.get('group', ''))
+    if not violations:
+        return True, ''
+    message = '; '.join(violations[:MAX_LISTED_VIOLATIONS])
+    if len(violations) > MAX_LISTED_VIOLATIONS:
+        message += f" (+{len(violations) - MAX_LISTED_VIOLATIONS} more)"
+    return False, message
+
+
+def _eval_directive(check: Dict[str, Any], ctx: CheckContext) -> Tuple[bool, str]:
+    ignore_case = bool(check.get('ignore_case', False))
+    key = check['key'].lower() if ignore_case else check['key']
+    try:
+        values = ctx.directives(check['path'], check.get('separator'), ignore_case)
+    except OSError:
+        values = {}
+    value = values.get(key, check.get('default'))
+    label = f"{check['key']} in {check['path']}"
+    if value is None:
+        return False, f"{label} is not set"
+
+    return _compare_value(check, label, str(value), ignore_case)
+
+
+def _compare_value(check: Dict[str, Any], label: str, value: str,
+                   ignore_case: bool) -> Tuple[bool, str]:
+    """Apply equals/matches/not_matches/min/max constraints to a configured value"""
+    flags = re.IGNORECASE if ignore_case else 0
+    if 'equals' in check:
+        expected = str(check['equals'])
+        if (value.lower() != expected.lower()) if ignore_case else (value != expected):
+            return False, f"{label} is '{value}', expected '{expected}'"
+    if 'matches' in check and not re.search(check['matches'], value, flags):
+        return False, f"{label} '{value}' does not match {check['matches']}"
+    if 'not_matches' in check and re.search(check['not_matches'], value, flags):
+        return False, f"{label} '{value}' matches disallowed {check['not_matches']}"
+    if 'min' in check or 'max' in check:
+        try:
+            number = float(value)
+        except ValueError:
+            return False, f"{label} '{value}' is not numeric"
+        if 'min' in check and number < float(check['min']):
+            return False, f"{label} is {value}, minimum {check['min']}"
+        if 'max' in check and number > float(check['max']):
+            return False, f"{label} is {value}, maximum {check['max']}"
+    return True, ''
+
+
+def _eval_sshd_option(check: Dict[str, Any], ctx: CheckContext) -> Tuple[bool, str]:
+    """Compare an effective sshd setting (Includes resolved, OpenSSH defaults applied)"""
+    try:
+        value = ctx.sshd_config().get(check['key'], '')
+    except OSError:
+        return False, 'SSH daemon configuration not readable'
+    return _compare_value(check, f"sshd {check['key']}", value or '', True)
+
+
+def _eval_service_active(check: Dict[str, Any], ctx: CheckContext) -> Tuple[bool, str]:
+    state = ctx.services.state(check['service'])
+    return ctx.services.is_active(check['service']), f"Service {check['service']} is {state}"
+
+
+def _eval_package_installed(check: Dict[str, Any], ctx: CheckContext) -> Tuple[bool, str]:
+    try:
+        index = ctx.packages()
+    except PackageQueryError as e:
+        # The index is shared by all checks, but only the thread that built it saw
+        # the failed query; repeating it (memoized, so nothing runs again) lets an
+        # offline run mark this check too as needing a running system
+        ctx.probes.run_command(list(RPM_QUERY))
+        return False, f"Cannot read package database: {e}"
+    except OSError as e:
+        return False, f"Cannot read package database: {e}"
+    if index.source is None:
+        return False, "No package database found"
+    return check['package'] in index, f"Package {check['package']} is not installed"
+
+
+def _eval_command_output(check: Dict[str, Any], ctx: CheckContext) -> Tuple[bool, str]:
+    rc, stdout, stderr = ctx.probes.run_command(check['argv'])
+    command = ' '.join(check['argv'])
+    if rc != check.get('returncode', 0):
+        return False, f"'{command}' exited with {rc}"
+    if 'matches' in check and not re.search(check['matches'], stdout, re.MULTILINE):
+        return False, f"'{command}' output does not match {check['matches']}"
+    return True, ''
+
+
+def _eval_any_of(check: Dict[str, Any], ctx: CheckContext) -> Tuple[bool, str]:
+    messages = []
+    for child in check['checks']:
+        passed, message = evaluate_check(child, ctx)
+        if passed:
+            return True, ''
+        messages.append(message)
+    return False, 'None of the alternatives passed: ' + '; '.join(messages)
+
+
+def _eval_shared(check: Dict[str, Any], ctx: CheckContext) -> Tuple[bool, str]:
+    return ctx.shared_result(check['check'])
+
+
+EVALUATORS: Dict[str, Callable[[Dict[str, Any], CheckContext], Tuple[bool, str]]] = {
+    'file_exists': _eval_file_exists,
+    'file_mode': _eval_file_mode,
+    'directive': _eval_directive,
+    'sshd_option': _eval_sshd_option,
+    'service_active': _eval_service_active,
+    'command_output': _eval_command_output,
+    'package_installed': _eval_package_installed,
+    'any_of': _eval_any_of,
+    'shared': _eval_shared,
+}
+
+
+def evaluate_check(check: Dict[str, Any], ctx: CheckContext) -> Tuple[bool, str]:
+    """Evaluate one compiled check; returns (passed, failure_message)"""
+    return EVALUATORS[check['type']](check, ctx)
+
+
+def framework_control_id(framework: str, control_id: str) -> str:
+    """Identity of another framework's control in costs, state and timings (e.g. soc2:CC6.1)"""
+    return f"{framework}:{control_id}"
+
+
+class CheckPlan:
+    """
+    Executable plan over every control that declares checks
+
+    Beyond per-control evaluation, the plan exposes the deduplicated set of
+    probes and services its checks need so they can be resolved in bulk.
+    Controls of other frameworks are addressed by framework_control_id().
+    """
+
+    def __init__(self, catalog: Dict[str, Any]):
+        self.controls = {
+            control_id: control
+            for control_id, control in catalog.get('controls', {}).items()
+            if 'checks' in control or 'compile_error' in control
+        }
+        self.shared_checks: Dict[str, Dict[str, Any]] = catalog.get('shared_checks', {})
+        # Framework name -> title, and framework name -> its controls in catalog order
+        self.frameworks: Dict[str, str] = {}
+        self.framework_controls: Dict[str, List[str]] = {}
+        self._qualified: Dict[str, Dict[str, Any]] = {}
+        for framework, info in catalog.get('frameworks', {}).items():
+            self.frameworks[framework] = info.get('title', framework)
+            self.framework_controls[framework] = []
+            for control_id, control in info.get('controls', {}).items():
+                if 'checks' in control or 'compile_error' in control:
+                    self.framework_controls[framework].append(control_id)
+                    self._qualified[framework_control_id(framework, control_id)] = control
+
+        self.probes: List[Tuple[str, ...]] = []
+        self.services: List[str] = []
+        seen = set()
+        for control in list(self.controls.values()) + list(self._qualified.values()):
+            for check in self._walk(control.get('checks', [])):
+                probe = self._probe_key(check)
+                if probe and probe not in seen:
+                    seen.add(probe)
+                    self.probes.append(probe)
+                    if probe[0] == 'service':
+                        self.services.append(probe[1])
+
+    def __contains__(self, control_id: str) -> bool:
+        return control_id in self.controls or control_id in self._qualified
+
+    def _control(self, control_id: str) -> Dict[str, Any]:
+        return self.controls[control_id] if control_id in self.controls else self._qualified[control_id]
+
+    def _walk(self, checks: List[Dict[str, Any]], visited: Optional[set] = None):
+        """Yield checks depth-first, including the shared checks they reference and require"""
+        visited = set() if visited is None else visited
+        for check in checks:
+            yield check
+            if check['type'] == 'any_of':
+                yield from self._walk(check['checks'], visited)
+            elif check['type'] == 'shared' and check['check'] not in visited:
+                visited.add(check['check'])
+                shared = self.shared_checks.get(check['check'], {'type': 'invalid', 'requires': []})
+                prerequisites = [{'type': 'shared', 'check': name} for name in shared.get('requires', [])]
+                yield from self._walk([shared] + prerequisites, visited)
+
+    @staticmethod
+    def _probe_key(check: Dict[str, Any]) -> Optional[Tuple[str, ...]]:
+        """Identity of the system probe behind a check"""
+        check_type = check['type']
+        if check_type in ('file_exists', 'file_mode'):
+            return ('stat', check['path'])
+        if check_type == 'directive':
+            return ('read', check['path'])
+        if check_type == 'sshd_option':
+            return ('sshd', check['key'].lower())
+        if check_type == 'service_active':
+            return ('service', check['service'])
+        if check_type == 'command_output':
+            return ('command',) + tuple(check['argv'])
+        if check_type == 'package_installed':
+            return ('package', check['package'])
+        return None
+
+    def inputs(self, control_id: str) -> Tuple[List[str], List[str]]:
+        """Return the (paths, services) probed by a control's checks"""
+        paths: List[str] = []
+        services: List[str] = []
+        for check in self._walk(self._control(control_id).get('checks', [])):
+            probe = self._probe_key(check)
+            if probe and probe[0] in ('stat', 'read') and probe[1] not in paths:
+                paths.append(probe[1])
+            elif probe and probe[0] == 'sshd':
+                paths.extend(path for path in SSHD_INPUTS if path not in paths)
+            elif probe and probe[0] == 'package':
+                paths.extend(path for path in PACKAGE_DB_PATHS if path not in paths)
+            elif probe and probe[0] == 'service' and probe[1] not in services:
+                services.append(probe[1])
+        return paths, services
+
+    def evaluate(self, control_id: str, ctx: CheckContext) -> Dict[str, Any]:
+        """Evaluate a control's checks and build its result dictionary"""
+        control = self._control(control_id)
+        result = {
+            'control': control_id.split(':', 1)[-1],
+            'title': control.get('title', ''),
+            'status': 'UNKNOWN',
+            'details': {},
+            'findings': []
+        }
+        if 'compile_error' in control:
+            result['status'] = 'ERROR'
+            result['findings'].append(f"Invalid check definition: {control['compile_error']}")
+            return result
+
+        try:
+            for check in control['checks']:
+                passed, message = evaluate_check(check, ctx)
+                result['details'][check['name']] = passed
+                if not passed:
+                    source = ctx.shared_checks.get(check['check'], {}) if check['type'] == 'shared' else check
+                    finding = check.get('finding') or source.get('finding') or message
+                    # Name the offending files when a glob check has a generic finding
+                    if finding != message and source.get('type') == 'file_mode' and _is_glob(source['path']):
+                        finding = f"{finding}: {message}"
+                    elif check['type'] == 'shared' and check['check'] in ctx.skipped:
+                        finding = f"{finding} (not evaluated, {ctx.skipped[check['check']]} failed)"
+                    result['findings'].append(finding)
+            result['status'] = 'FAIL' if result['findings'] else 'PASS'
+        except Exception as e:
+            result['status'] = 'ERROR'
+            result['findings'].append(f'Check evaluation error: {str(e)}')
+        return result
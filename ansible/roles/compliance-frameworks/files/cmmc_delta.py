@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Delta Reports
+Author: thndrchckn
+Purpose: Ship only what changed since the previous report
+
+Clients behind the reverse tunnel or pull infrastructure usually produce a report
+that differs from the previous one in little more than its timestamp and timings.
+A delta lists the changed values by path, the controls whose status, details or
+findings changed, and content hashes of the report it applies to and of the
+report it produces, so the receiver can verify its reconstruction. Measurements
+of the run itself (durations, timings, probe statistics, the timestamp) change
+every time and are left out unless asked for, so an unchanged host ships an
+almost empty delta.
+
+    delta = make_delta(previous, current)        # on the client
+    current = apply_delta(previous, delta)       # at the MSP, verified by hash
+"""
+
+import copy
+import hashlib
+import json
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Tuple
+
+from cmmc_report import dumps
+
+DELTA_FORMAT = 'cmmc-report-delta'
+DELTA_VERSION = 2
+# Version 1 deltas always carried the volatile fields
+SUPPORTED_VERSIONS = (1, DELTA_VERSION)
+
+# Report fields that differ on every run without the system changing
+VOLATILE_FIELDS = ('timestamp', 'durations', 'timings', 'probe_cache')
+# Audit log analysis counters describing the records read by this run alone
+_VOLATILE_AUDIT_FIELDS = ('bytes_read', 'records', 'events', 'first_event', 'last_event',
+                          'events_per_minute', 'term_events', 'analysis_seconds')
+# The same within a control result; staleness grows with the time between runs,
+# and whether a result was evaluated or reused depends on the run's mode and age
+VOLATILE_CONTROL_PATHS = (('staleness',), ('evaluation',)) + tuple(
+    ('details', 'audit_log_analysis', field) for field in _VOLATILE_AUDIT_FIELDS)
+
+# Control result fields that make a control count as changed
+_CONTROL_FIELDS = ('status', 'details', 'findings')
+
+KeyPath = List[str]
+
+
+class DeltaMismatch(ValueError):
+    """The delta does not apply to the given base report, or did not reproduce the report"""
+
+
+def report_hash(report: Optional[Dict[str, Any]]) -> Optional[str]:
+    """SHA-256 of the canonical JSON encoding (sorted keys, no whitespace) of a report"""
+    if report is None:
+        return None
+    canonical = dumps(report, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _without(value: Any, path: Tuple[str, ...]) -> Any:
+    """Copy of value without the key at path, or value itself when there is none"""
+    if not isinstance(value, Mapping) or path[0] not in value:
+        return value
+    copied = {key: item for key, item in value.items() if key != path[0]}
+    if len(path) > 1:
+        copied[path[0]] = _without(value[path[0]], path[1:])
+    return copied
+
+
+def _stable_controls(results: Any) -> Any:
+    if not isinstance(results, Mapping):
+        return results
+    stable = {}
+    for control_id, result in results.items():
+        for path in VOLATILE_CONTROL_PATHS:
+            result = _without(result, path)
+        stable[control_id] = result
+    return stable
+
+
+def stable_report(report: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Return the report without its volatile fields
+
+    Values that contain no volatile field are shared with the report, not copied.
+    """
+    if report is None:
+        return None
+    stable = {key: value for key, value in report.items() if key not in VOLATILE_FIELDS}
+    if isinstance(stable.get('controls'), Mapping):
+        stable['controls'] = {family: _stable_controls(results) for family, results in stable['controls'].items()}
+    if isinstance(stable.get('frameworks'), Mapping):
+        stable['frameworks'] = {
+            name: dict(framework, controls=_stable_controls(framework['controls']))
+            if isinstance(framework, Mapping) and 'controls' in framework else framework
+            for name, framework in stable['frameworks'].items()}
+    return stable
+
+
+def _equal(old: Any, new: Any) -> bool:
+    """Equality that also tells 1, 1.0 and True apart, as their JSON encodings differ"""
+    # Result records and the dicts they were loaded as encode identically
+    if isinstance(old, Mapping) and isinstance(new, Mapping):
+        return set(old) == set(new) and all(_equal(old[key], new[key]) for key in old)
+    if type(old) is not type(new):
+        return False
+    if isinstance(old, list):
+        return len(old) == len(new) and all(_equal(a, b) for a, b in zip(old, new))
+    return old == new
+
+
+def _diff(old: Any, new: Any, path: KeyPath, changes: List[Tuple[KeyPath, Any]], removed: List[KeyPath]) -> None:
+    """Record the assignments and removals turning old into new; dicts are compared per key"""
+    if isinstance(old, Mapping) and isinstance(new, Mapping):
+        for key, value in new.items():
+            if key not in old:
+                changes.append((path + [key], value))
+            elif not _equal(old[key], value):
+                _diff(old[key], value, path + [key], changes, removed)
+        removed.extend(path + [key] for key in old if key not in new)
+    elif not _equal(old, new):
+        changes.append((path, new))
+
+
+def changed_controls(base: Optional[Dict[str, Any]], current: Dict[str, Any]) -> List[str]:
+    """Control IDs that are new, removed, or whose status, details or findings changed"""
+    def index(report: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        return {control_id: result
+                for family in ((report or {}).get('controls') or {}).values()
+                for control_id, result in family.items()}
+
+    before, after = index(base), index(current)
+    changed = [control_id for control_id, result in after.items()
+               if control_id not in before
+               or not all(_equal(before[control_id].get(field), result.get(field)) for field in _CONTROL_FIELDS)]
+    return changed + [control_id for control_id in before if control_id not in after]
+
+
+def make_delta(base: Optional[Dict[str, Any]], current: Dict[str, Any],
+               volatile: bool = False) -> Dict[str, Any]:
+    """
+    Build the delta from base to current
+
+    Args:
+        base: Previously shipped report, or None to ship current in full
+        current: New report
+        volatile: Also ship VOLATILE_FIELDS and VOLATILE_CONTROL_PATHS; without
+            them the hashes cover the stable part of the reports
+
+    Returns:
+        Delta document; `changes` holds [path, value] pairs (an empty path
+        replaces the whole report) and `removed` the paths of deleted keys
+    """
+    timestamp = current.get('timestamp')
+    if not volatile:
+        base, current = stable_report(base), stable_report(current)
+    changes: List[Tuple[KeyPath, Any]] = []
+    removed: List[KeyPath] = []
+    if base is None:
+        changes.append(([], current))
+    else:
+        _diff(base, current, [], changes, removed)
+    return {
+        'format': DELTA_FORMAT,
+        'version': DELTA_VERSION,
+        'volatile': volatile,
+        'base_hash': report_hash(base),
+        'report_hash': report_hash(current),
+        'hostname': current.get('hostname'),
+        'timestamp': timestamp,
+        'changed_controls': changed_controls(base, current),
+        'changes': [[path, value] for path, value in changes],
+        'removed': removed,
+    }
+
+
+def apply_delta(base: Optional[Dict[str, Any]], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rebuild the full report from the base report and a delta
+
+    The base is not modified. A delta made without volatile fields rebuilds
+    the report without them, except for the timestamp, which the delta carries.
+
+    Raises:
+        DeltaMismatch: The base is not the report the delta was made from, or the
+            reconstruction does not match the delta's report hash
+        ValueError: The document is not a delta this version understands
+    """
+    if delta.get('format') != DELTA_FORMAT or delta.get('version') not in SUPPORTED_VERSIONS:
+        raise ValueError(f"Unsupported delta: {delta.get('format')} version {delta.get('version')}")
+    volatile = delta.get('volatile', True)
+    if not volatile:
+        base = stable_report(base)
+    if delta.get('base_hash') is not None and report_hash(base) != delta['base_hash']:
+        raise DeltaMismatch(f"Delta applies to report {delta['base_hash'][:12]}, "
+                            f"not {(report_hash(base) or 'none')[:12]}")
+
+    # Through JSON, so ControlResult records in an in-memory base become dicts
+    report: Any = json.loads(dumps(base)) if delta.get('base_hash') is not None else {}
+    for path, value in delta.get('changes', []):
+        if not path:
+            report = copy.deepcopy(value)
+            continue
+        target = report
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = copy.deepcopy(value)
+    for path in delta.get('removed', []):
+        target = report
+        for key in path[:-1]:
+            target = target.get(key, {})
+        target.pop(path[-1], None)
+
+    if report_hash(report) != delta.get('report_hash'):
+        raise DeltaMismatch("Reconstructed report does not match the delta's report hash")
+    if not volatile and delta.get('timestamp') is not None:
+        report = {'timestamp': delta['timestamp'], **report}
+    return report
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Fleet Mode
+Author: thndrchckn
+Purpose: Validate many hosts from one controller process over persistent SSH
+         connections
+
+Instead of copying the validator to every host and starting one interpreter per
+host through Ansible, the controller runs the checks itself and sends only probes
+(file reads, stat calls, commands) to the hosts. Each host gets one multiplexed SSH
+connection (OpenSSH ControlMaster) that all of its probes reuse. Hosts are validated
+concurrently up to a limit, each within its own deadline, and every result is
+streamed to a JSONL file as soon as the host finishes.
+
+Transports are pluggable: SSHTransport for real hosts and LocalTransport, which
+runs probes on the controller itself, for tests and lab setups.
+"""
+
+import asyncio
+import errno
+import os
+import shlex
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import (Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Sequence, Set,
+                    TextIO, Tuple)
+
+from cmmc_probes import DEFAULT_COMMAND_TIMEOUT, ProbeCache
+from cmmc_report import dumps
+from cmmc_timing import Timings
+
+DEFAULT_FLEET_CONCURRENCY = int(os.environ.get('CMMC_FLEET_CONCURRENCY', '20'))
+DEFAULT_HOST_DEADLINE = float(os.environ.get('CMMC_HOST_DEADLINE', '120'))  # seconds
+DEFAULT_CONNECT_TIMEOUT = 10  # seconds
+
+# Host outcome in the JSONL stream (the validation status is in 'summary')
+HOST_COMPLETED = 'COMPLETED'
+HOST_TIMEOUT = 'TIMEOUT'
+HOST_UNREACHABLE = 'UNREACHABLE'
+HOST_ERROR = 'ERROR'
+
+# Stable, unlocalized output from the remote coreutils
+_REMOTE_ENV = ['env', 'LC_ALL=C']
+_STAT_FORMAT = '%f %i %d %h %u %g %s %X %Y %Z'
+_GLOB_SCRIPT = 'for f in $1; do [ -e "$f" ] && printf "%s\\n" "$f"; done; exit 0'
+# One round trip stats every match; the path is the last field
+_SCAN_SCRIPT = 'for f in $1; do [ -e "$f" ] && stat -L -c "$2 %n" -- "$f"; done; exit 0'
+
+
+class Transport(ABC):
+    """
+    Interface of a connection to one host
+
+    Implementations run argument vectors on the host and return
+    (return_code, stdout, stderr). All methods are coroutines executed on the
+    fleet runner's event loop.
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        self._processes: Set[asyncio.subprocess.Process] = set()
+        self.closed = False
+
+    async def open(self) -> None:
+        """Establish the connection; raises ConnectionError when unreachable"""
+
+    @abstractmethod
+    def _command(self, argv: Sequence[str]) -> List[str]:
+        """Return the local argument vector that runs argv on the host"""
+
+    async def run(self, argv: Sequence[str], timeout: float) -> Tuple[int, str, str]:
+        """Run argv on the host; the process is killed when timeout expires"""
+        if self.closed:
+            raise ConnectionError(f"Transport to {self.host} is closed")
+        process = await asyncio.create_subprocess_exec(
+            *self._command(argv),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE)
+        self._processes.add(process)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return 1, '', 'Command timeout'
+        finally:
+            self._processes.discard(process)
+        return (process.returncode,
+                stdout.decode('utf-8', errors='replace'),
+                stderr.decode('utf-8', errors='replace'))
+
+    async def close(self) -> None:
+        """Kill in-flight commands and release the connection"""
+        self.closed = True
+        for process in list(self._processes):
+            if process.returncode is None:
+                process.kill()
+
+
+class LocalTransport(Transport):
+    """Runs probes on the controller itself (tests, lab setups)"""
+
+    def _command(self, argv: Sequence[str]) -> List[str]:
+        return list(argv)
+
+
+class SSHTransport(Transport):
+    """
+    OpenSSH transport with one multiplexed master connection per host
+
+    The first command starts a ControlMaster; all later probes open sessions on
+    it, avoiding a TCP and key exchange round trip per probe. Authentication must
+    be non-interactive (keys or an agent).
+    """
+
+    def __init__(self, host: str, control_dir: str, ssh_options: Sequence[str] = (),
+                 connect_timeout: int = DEFAULT_CONNECT_TIMEOUT):
+        """
+        Args:
+            host: Host name or ssh_config alias, optionally user@host
+            control_dir: Directory for ControlMaster sockets
+            ssh_options: Extra ssh arguments, e.g. ['-p', '2222'] or ['-F', 'ssh_config']
+            connect_timeout: ConnectTimeout passed to ssh
+        """
+        super().__init__(host)
+        self._ssh = ['ssh',
+                     '-o', 'BatchMode=yes',
+                     '-o', 'ControlMaster=auto',
+                     '-o', f'ControlPath={os.path.join(control_dir, "%C")}',
+                     '-o', 'ControlPersist=60',
+                     '-o', f'ConnectTimeout={connect_timeout}',
+                     *ssh_options]
+
+    def _command(self, argv: Sequence[str]) -> List[str]:
+        # ssh hands the remote shell a single command line
+        remote = ' '.join(shlex.quote(arg) for arg in _REMOTE_ENV + list(argv))
+        return self._ssh + [self.host, '--', remote]
+
+    async def open(self) -> None:
+        rc, _, stderr = await self.run(['true'], DEFAULT_CONNECT_TIMEOUT * 2)
+        if rc != 0:
+            raise ConnectionError(stderr.strip() or f"ssh exited with {rc}")
+
+    async def close(self) -> None:
+        await super().close()
+        process = await asyncio.create_subprocess_exec(
+            *self._ssh, '-O', 'exit', self.host,
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        await process.wait()
+
+
+def _os_error(stderr: str, path: str) -> OSError:
+    """Map coreutils error messages back to OSError subclasses"""
+    if 'No such file' in stderr:
+        return FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+    if 'Permission denied' in stderr:
+        return PermissionError(errno.EACCES, os.strerror(errno.EACCES), path)
+    if 'Not a directory' in stderr:
+        return NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+    return OSError(errno.EIO, stderr.strip() or os.strerror(errno.EIO), path)
+
+
+class RemoteProbeCache(ProbeCache):
+    """
+    Probe layer whose primitives run over a Transport
+
+    Checks run in worker threads and use the regular synchronous probe API;
+    each primitive is submitted to the event loop that owns the transport.
+    """
+
+    local = False
+
+    def __init__(self, transport: Transport, loop: asyncio.AbstractEventLoop,
+                 command_timeout: int = DEFAULT_COMMAND_TIMEOUT, timings: Optional[Timings] = None):
+        super().__init__(command_timeout=command_timeout, timings=timings)
+        self.transport = transport
+        self.loop = loop
+
+    def _call(self, argv: Sequence[str]) -> Tuple[int, str, str]:
+        # Checks of an abandoned host fail fast once its transport is closed
+        if self.transport.closed:
+            raise ConnectionError(f"Transport to {self.transport.host} is closed")
+        timeout = self.command_timeout_now()
+        future = asyncio.run_coroutine_threadsafe(self.transport.run(argv, timeout), self.loop)
+        return future.result(timeout + DEFAULT_CONNECT_TIMEOUT)
+
+    def _spawn(self, argv: Sequence[str]) -> Tuple[int, str, str]:
+        try:
+            return self._call(argv)
+        except Exception as e:
+            return 1, '', str(e) or type(e).__name__
+
+    def _read(self, path: str) -> str:
+        rc, stdout, stderr = self._call(['cat', '--', path])
+        if rc != 0:
+            raise _os_error(stderr, path)
+        return stdout
+
+    def host_path(self, path: str) -> str:
+        """Remote files have no path on the controller"""
+        raise OSError(errno.EREMOTE, os.strerror(errno.EREMOTE), path)
+
+    def _realpath(self, path: str) -> str:
+        rc, stdout, _ = self._call(['readlink', '-m', '--', path])
+        return stdout.rstrip('\n') if rc == 0 and stdout.strip() else path
+
+    def _stat(self, path: str) -> os.stat_result:
+        rc, stdout, stderr = self._call(['stat', '-L', '-c', _STAT_FORMAT, '--', path])
+        if rc != 0:
+            raise _os_error(stderr, path)
+        fields = stdout.split()
+        mode, numbers = int(fields[0], 16), [int(field) for field in fields[1:]]
+        return os.stat_result([mode] + numbers)
+
+    def _listdir(self, path: str) -> List[str]:
+        rc, stdout, stderr = self._call(['ls', '-A1', '--', path])
+        if rc != 0:
+            raise _os_error(stderr, path)
+        return [name for name in stdout.split('\n') if name]
+
+    def _glob(self, pattern: str) -> List[str]:
+        # The unquoted $1 is expanded by the remote shell; nothing is evaluated
+        rc, stdout, _ = self._call(['sh', '-c', _GLOB_SCRIPT, 'sh', pattern])
+        return [path for path in stdout.split('\n') if path] if rc == 0 else []
+
+    def _scan(self, pattern: str) -> List[Tuple[str, Optional[os.stat_result]]]:
+        rc, stdout, _ = self._call(['sh', '-c', _SCAN_SCRIPT, 'sh', pattern, _STAT_FORMAT])
+        entries = []
+        for line in stdout.split('\n') if rc == 0 else []:
+            fields = line.split(' ', 10)
+            if len(fields) == 11:
+                numbers = [int(fields[0], 16)] + [int(field) for field in fields[1:10]]
+                entries.append((fields[10], os.stat_result(numbers)))
+        return entries
+
+
+ProbeFactory = Callable[[Timings], ProbeCache]
+HostValidator = Callable[[str, ProbeFactory], Dict[str, Any]]
+
+
+class FleetRunner:
+    """Validate hosts concurrently and stream one JSON line per host"""
+
+    def __init__(self, validate: HostValidator, transport_factory: Callable[[str], Transport],
+                 concurrency: int = DEFAULT_FLEET_CONCURRENCY,
+                 host_deadline: float = DEFAULT_HOST_DEADLINE,
+                 command_timeout: int = DEFAULT_COMMAND_TIMEOUT):
+        """
+        Args:
+            validate: Runs all checks for a host with probes from the given factory
+                and returns the results dictionary
+            transport_factory: Creates the transport for a host
+            concurrency: Maximum number of hosts validated at the same time
+            host_deadline: Seconds after which a host is abandoned as TIMEOUT
+            command_timeout: Timeout of each probe command
+        """
+        self.validate = validate
+        self.transport_factory = transport_factory
+        self.concurrency = max(1, concurrency)
+        self.host_deadline = host_deadline
+        self.command_timeout = command_timeout
+
+    async def _validate_host(self, host: str, executor: ThreadPoolExecutor) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        transport = self.transport_factory(host)
+        record: Dict[str, Any] = {'host': host, 'started_at': datetime.now().isoformat()}
+        started = time.monotonic()
+
+        def probes_factory(timings: Timings) -> ProbeCache:
+            return RemoteProbeCache(transport, loop, self.command_timeout, timings)
+
+        async def validate() -> Dict[str, Any]:
+            await transport.open()
+            return await loop.run_in_executor(executor, self.validate, host, probes_factory)
+
+        try:
+            results = await asyncio.wait_for(validate(), self.host_deadline)
+            record.update(status=HOST_COMPLETED, summary=results.get('summary', {}),
+                          controls=results.get('controls', {}))
+        except asyncio.TimeoutError:
+            record.update(status=HOST_TIMEOUT, error=f"Deadline of {self.host_deadline:g}s exceeded")
+        except ConnectionError as e:
+            record.update(status=HOST_UNREACHABLE, error=str(e))
+        except Exception as e:
+            record.update(status=HOST_ERROR, error=str(e))
+        finally:
+            # Closing kills in-flight probes, so an abandoned check thread
+            # fails fast instead of holding a worker
+            try:
+                await transport.close()
+            except Exception:
+                pass
+        record['duration_seconds'] = round(time.monotonic() - started, 3)
+        return record
+
+    async def run(self, hosts: Iterable[str], output: TextIO) -> Dict[str, Any]:
+        """
+        Validate all hosts, writing each host's record to output as it completes
+
+        Returns:
+            Counts of host outcomes and compliant hosts
+        """
+        hosts = list(dict.fromkeys(hosts))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        counts: Dict[str, Any] = {'hosts': len(hosts), 'compliant': 0}
+        started = time.monotonic()
+
+        async def bounded(host: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._validate_host(host, executor)
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='cmmc-host')
+        try:
+            for finished in asyncio.as_completed([bounded(host) for host in hosts]):
+                record = await finished
+                output.write(dumps(record) + '\n')
+                output.flush()
+                counts[record['status'].lower()] = counts.get(record['status'].lower(), 0) + 1
+                if record.get('summary', {}).get('overall_status') == 'COMPLIANT':
+                    counts['compliant'] += 1
+        finally:
+            # Abandoned checks still need the loop to finish their last probe,
+            # so wait for the workers without blocking it
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+        counts['duration_seconds'] = round(time.monotonic() - started, 3)
+        return counts
+
+
+@contextmanager
+def ssh_transport_factory(ssh_options: Sequence[str] = ()) -> Iterator[Callable[[str], Transport]]:
+    """
+    Provide a factory creating SSHTransports that share one control socket directory
+
+    Each transport stops its master connection when its host is done; the
+    directory is removed when the context exits.
+    """
+    with tempfile.TemporaryDirectory(prefix='cmmc-ssh-') as control_dir:
+        yield lambda host: SSHTransport(host, control_dir, ssh_options)
+
+
+# Context managers providing the transport factory for the duration of a fleet run
+TRANSPORTS: Dict[str, Callable[[], ContextManager[Callable[[str], Transport]]]] = {
+    'ssh': ssh_transport_factory,
+    'local': lambda: nullcontext(LocalTransport),
+}
+
+
+def read_hosts(path: str) -> List[str]:
+    """Read one host per line; blank lines and '#' comments are ignored"""
+    with open(path, 'r') as f:
+        return [line.split('#', 1)[0].strip() for line in f if line.split('#', 1)[0].strip()]
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Report History
+Author: thndrchckn
+Purpose: Append-only store of validation runs with retention and indexed trend queries
+
+Writing one pretty-printed JSON file per run fills the reports directory with tens of
+thousands of files at a 15-minute cadence. Runs are instead appended to a single SQLite
+database: one row per run (with the zlib-compressed report) and one row per control
+result, indexed by control and time, so questions such as "AC.1.001 over the last 30
+days" never open individual reports.
+"""
+
+import json
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from cmmc_report import compress_report
+from cmmc_scheduler import parse_duration
+
+HISTORY_DB_NAME = 'report_history.sqlite'
+
+# Retention defaults, overridden by reporting_settings.retention in cmmc_controls.yaml
+DEFAULT_RETENTION_DAYS = 90
+DEFAULT_MAX_FULL_REPORTS = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    hostname TEXT,
+    overall_status TEXT,
+    compliance_percentage REAL,
+    report BLOB
+);
+CREATE INDEX IF NOT EXISTS runs_ts ON runs (ts);
+CREATE TABLE IF NOT EXISTS control_results (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    control_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    status TEXT NOT NULL,
+    findings INTEGER NOT NULL,
+    PRIMARY KEY (run_id, control_id)
+);
+CREATE INDEX IF NOT EXISTS control_results_control_ts ON control_results (control_id, ts);
+"""
+
+def parse_since(value: str, now: Optional[float] = None) -> float:
+    """
+    Convert a duration ('30d', '12h', '1.5h', '2w', see parse_duration) or an ISO
+    date/time into an epoch timestamp
+
+    Raises:
+        ValueError: The value is neither a duration nor an ISO timestamp
+    """
+    now = time.time() if now is None else now
+    try:
+        return now - parse_duration(value)
+    except ValueError:
+        return datetime.fromisoformat(value.strip()).timestamp()
+
+
+class ReportHistory:
+    """SQLite-backed history of validation runs"""
+
+    def __init__(self, db_path: Path, retention_days: int = DEFAULT_RETENTION_DAYS,
+                 max_full_reports: int = DEFAULT_MAX_FULL_REPORTS):
+        """
+        Args:
+            db_path: SQLite database file
+            retention_days: Runs older than this are deleted entirely
+            max_full_reports: Only the newest N runs keep their full report; older
+                runs keep per-control status rows for trend queries
+        """
+        self.db_path = Path(db_path)
+        self.retention_days = retention_days
+        self.max_full_reports = max_full_reports
+
+    @contextmanager
+    def _session(self) -> Iterator[sqlite3.Connection]:
+        """Open the database, commit on success and always close the connection"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA foreign_keys=ON')
+            connection.executescript(_SCHEMA)
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def append(self, results: Dict[str, Any], ts: Optional[float] = None) -> int:
+        """
+        Store one run and apply the retention policy
+
+        Returns:
+            Row ID of the stored run
+        """
+        ts = time.time() if ts is None else ts
+        summary = results.get('summary', {})
+        report = compress_report(results, 6)
+        with self._session() as connection:
+            cursor = connection.execute(
+                'INSERT INTO runs (ts, hostname, overall_status, compliance_percentage, report) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (ts, results.get('hostname'), summary.get('overall_status'),
+                 summary.get('compliance_percentage'), report))
+            run_id = cursor.lastrowid
+            connection.executemany(
+                'INSERT INTO control_results (run_id, control_id, ts, status, findings) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(run_id, control_id, ts, control.get('status', 'UNKNOWN'), len(control.get('findings', [])))
+                 for controls in results.get('controls', {}).values()
+                 for control_id, control in controls.items()])
+            self._apply_retention(connection, ts)
+        return run_id
+
+    def _apply_retention(self, connection: sqlite3.Connection, now: float) -> None:
+        """Delete expired runs and drop full reports beyond the newest N"""
+        connection.execute('DELETE FROM runs WHERE ts < ?', (now - self.retention_days * 86400,))
+        connection.execute(
+            'UPDATE runs SET report = NULL WHERE report IS NOT NULL AND id NOT IN '
+            '(SELECT id FROM runs ORDER BY ts DESC LIMIT ?)', (self.max_full_reports,))
+
+    def compact(self) -> None:
+        """Reclaim space freed by retention"""
+        with self._session() as connection:
+            self._apply_retention(connection, time.time())
+        with self._session() as connection:
+            connection.execute('VACUUM')
+
+    def query(self, control_id: Optional[str] = None, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Return per-control results (with control_id) or per-run summaries (without)
+
+        Rows are ordered oldest first.
+        """
+        since = since or 0
+        with self._session() as connection:
+            if control_id:
+                rows = connection.execute(
+                    'SELECT ts, control_id, status, findings FROM control_results '
+                    'WHERE control_id = ? AND ts >= ? ORDER BY ts', (control_id, since)).fetchall()
+                return [{'timestamp': datetime.fromtimestamp(ts).isoformat(), 'control': control,
+                         'status': status, 'findings': findings}
+                        for ts, control, status, findings in rows]
+            rows = connection.execute(
+                'SELECT ts, hostname, overall_status, compliance_percentage FROM runs '
+                'WHERE ts >= ? ORDER BY ts', (since,)).fetchall()
+            return [{'timestamp': datetime.fromtimestamp(ts).isoformat(), 'hostname': hostname,
+                     'overall_status': status, 'compliance_percentage': percentage}
+                    for ts, hostname, status, percentage in rows]
+
+    def pass_rate(self, control_id: str, since: Optional[float] = None) -> Optional[float]:
+        """Percentage of runs in which a control passed, computed in SQLite"""
+        with self._session() as connection:
+            total, passed = connection.execute(
+                "SELECT COUNT(*), SUM(status = 'PASS') FROM control_results "
+                'WHERE control_id = ? AND ts >= ?', (control_id, since or 0)).fetchone()
+        return round(passed * 100.0 / total, 2) if total else None
+
+    def load_report(self, run_id: int) -> Optional[Dict[str, Any]]:
+        """Return the full report of a run if it has not been compacted away"""
+        with self._session() as connection:
+            row = connection.execute('SELECT report FROM runs WHERE id = ?', (run_id,)).fetchone()
+        if not row or row[0] is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
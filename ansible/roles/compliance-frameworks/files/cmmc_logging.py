@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Logging
+Author: thndrchckn
+Purpose: Keep log I/O off the check threads and bound the log's size
+
+Check threads used to write every record to the log file and the console
+themselves, so a slow disk or a blocked terminal stalled validation, and watch
+mode and fleet runs grew the log without limit. Records are now put on a bounded
+queue by a QueueHandler and written by a single QueueListener thread: to a
+size-rotated file as JSON lines, and to stderr as text (stdout carries the
+reports). Identical messages repeated within a window are counted instead of
+written, and records are dropped, and counted, rather than waited on when the
+queue is full.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+LOG_FILE_NAME = 'compliance_validation.log'
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# The log file is rotated at this size, keeping LOG_BACKUPS older files
+LOG_MAX_BYTES = int(os.environ.get('CMMC_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+LOG_BACKUPS = int(os.environ.get('CMMC_LOG_BACKUPS', '5'))
+# Records waiting for the writer thread; further records are dropped
+LOG_QUEUE_SIZE = int(os.environ.get('CMMC_LOG_QUEUE_SIZE', '10000'))
+# Identical messages written per window; 0 disables the limit
+LOG_REPEAT_LIMIT = int(os.environ.get('CMMC_LOG_REPEAT_LIMIT', '5'))
+LOG_REPEAT_WINDOW = float(os.environ.get('CMMC_LOG_REPEAT_WINDOW', '60'))
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, thread, message, extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RepeatLimiter:
+    """
+    Let through the first `limit` occurrences of a message per window
+
+    Messages are identical when logger, level and text match. When a window
+    ends, one summary record per suppressed message reports how often it repeated.
+    """
+
+    def __init__(self, limit: int = LOG_REPEAT_LIMIT, window: float = LOG_REPEAT_WINDOW):
+        self.limit = limit
+        self.window = window
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        # key -> [occurrences, first suppressed record]
+        self._seen: Dict[Tuple[str, int, str], List] = {}
+
+    def admit(self, record: logging.LogRecord) -> Tuple[bool, List[logging.LogRecord]]:
+        """
+        Returns:
+            (write, summaries): whether to write the record, and summaries of
+            the window that just ended
+        """
+        if self.limit <= 0:
+            return True, []
+        key = (record.name, record.levelno, record.getMessage())
+        with self._lock:
+            summaries = self._roll(time.monotonic())
+            seen = self._seen.setdefault(key, [0, None])
+            seen[0] += 1
+            if seen[0] <= self.limit:
+                return True, summaries
+            if seen[1] is None:
+                seen[1] = record
+            return False, summaries
+
+    def flush(self) -> List[logging.LogRecord]:
+        """End the current window, returning its summaries"""
+        with self._lock:
+            return self._roll(None)
+
+    def _roll(self, now: Optional[float]) -> List[logging.LogRecord]:
+        if now is not None and now - self._window_start < self.window:
+            return []
+        summaries = []
+        for count, record in self._seen.values():
+            if record is None:
+                continue
+            summary = logging.makeLogRecord(vars(record))
+            summary.msg = f"{record.getMessage()} (repeated {count - self.limit} more times, suppressed)"
+            summary.args = None
+            summary.exc_info = summary.exc_text = None
+            summary.repeats = count - self.limit
+            summaries.append(summary)
+        self._seen.clear()
+        self._window_start = time.monotonic() if now is None else now
+        return summaries
+
+
+class _DeferredRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that creates its directory and opens the file on first use"""
+
+    def __init__(self, filename: Path, max_bytes: int, backups: int):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backups, delay=True)
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records on a full queue and applies the repeat limit"""
+
+    def __init__(self, log_queue: queue.Queue, limiter: RepeatLimiter):
+        super().__init__(log_queue)
+        self.limiter = limiter
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments and render the traceback here: they may not be
+        # picklable or may change before the writer thread gets to them
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record: logging.LogRecord) -> None:
+        write, summaries = self.limiter.admit(record)
+        for summary in summaries:
+            self.enqueue(summary)
+        if write:
+            super().emit(record)
+
+    def dropped_notice(self) -> logging.LogRecord:
+        return logging.makeLogRecord({
+            'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+            'msg': f"Log queue full, {self.dropped} records dropped", 'dropped': self.dropped,
+        })
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.dropped:
+            try:
+                self.queue.put_nowait(self.dropped_notice())
+                self.dropped = 0
+            except queue.Full:
+                pass
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Pipeline:
+    """The installed queue handler and its listener"""
+
+    def __init__(self, log_file: Path, handler: _NonBlockingQueueHandler,
+                 listener: logging.handlers.QueueListener):
+        self.log_file = log_file
+        self.handler = handler
+        self.listener = listener
+
+    def close(self) -> None:
+        logging.getLogger().removeHandler(self.handler)
+        # Closing happens between runs or at exit, so wait for room instead of dropping
+        pending = self.handler.limiter.flush()
+        if self.handler.dropped:
+            pending.append(self.handler.dropped_notice())
+        for record in pending:
+            self.handler.queue.put(record)
+        # The sentinel cannot be queued while the queue is full; the writer drains it
+        while True:
+            try:
+                self.listener.stop()
+                break
+            except queue.Full:
+                time.sleep(0.01)
+        for handler in self.listener.handlers:
+            handler.close()
+
+
+_pipeline: Optional[_Pipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def configure_logging(log_dir: Path, level: int = logging.INFO) -> None:
+    """
+    Route the root logger through the queue to the log file and stderr
+
+    Calling it again with the same directory does nothing, so every validator
+    instance of a fleet or offline run can call it; a different directory
+    replaces the previous pipeline. A root level already set below `level`
+    (e.g. DEBUG by --verbose) is kept.
+    """
+    global _pipeline
+    log_file = Path(log_dir) / LOG_FILE_NAME
+    with _pipeline_lock:
+        if _pipeline is not None:
+            if _pipeline.log_file == log_file:
+                return
+            _pipeline.close()
+        else:
+            atexit.register(shutdown_logging)
+
+        file_handler = _DeferredRotatingFileHandler(log_file, LOG_MAX_BYTES, LOG_BACKUPS)
+        file_handler.setFormatter(JsonLineFormatter())
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+        log_queue: queue.Queue = queue.Queue(LOG_QUEUE_SIZE)
+        handler = _NonBlockingQueueHandler(log_queue, RepeatLimiter())
+        listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler,
+                                                  respect_handler_level=True)
+        listener.start()
+
+        root = logging.getLogger()
+        root.addHandler(handler)
+        if root.level == logging.NOTSET or root.level > level:
+            root.setLevel(level)
+        _pipeline = _Pipeline(log_file, handler, listener)
+
+
+def shutdown_logging() -> None:
+    """Write the queued records and repeat summaries, and stop the writer thread"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is not None:
+            _pipeline.close()
+            _pipeline = None
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Prometheus Metrics
+Author: thndrchckn
+Purpose: Render validation results in the Prometheus text exposition format and
+         publish them through the node_exporter textfile collector
+
+Per-control status and duration gauges, the compliance percentage, probe cache
+counters and duration histograms per probe kind let dashboards spot slow checks and
+fleet-wide regressions without collecting JSON reports centrally. A control is
+evaluated once per run, so its duration is a gauge: a histogram holding a single
+observation would restart from zero every run instead of accumulating.
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Sequence
+
+TEXTFILE_NAME = 'cmmc_compliance.prom'
+
+# Upper bounds (seconds) of the duration histogram buckets
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_STATUSES = ('PASS', 'FAIL', 'ERROR', 'TIMEOUT', 'NOT_APPLICABLE', 'UNKNOWN')
+
+
+def histogram(values: Iterable[float], buckets: Sequence[float] = DURATION_BUCKETS) -> Dict[str, Any]:
+    """
+    Summarize observations as a cumulative histogram
+
+    Returns:
+        {'buckets': [[upper_bound, cumulative_count], ...], 'sum': float, 'count': int}
+    """
+    values = list(values)
+    return {
+        'buckets': [[bound, sum(1 for value in values if value <= bound)] for bound in buckets],
+        'sum': round(sum(values), 6),
+        'count': len(values),
+    }
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels: Any) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class _Exposition:
+    """Accumulates metric families with their HELP/TYPE headers"""
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+
+    def family(self, name: str, metric_type: str, help_text: str) -> None:
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {metric_type}')
+
+    def sample(self, name: str, value: float, **labels: Any) -> None:
+        self.lines.append(f'{name}{_labels(**labels)} {value:g}' if isinstance(value, float)
+                          else f'{name}{_labels(**labels)} {value}')
+
+    def histogram(self, name: str, data: Dict[str, Any], **labels: Any) -> None:
+        for bound, count in data['buckets']:
+            self.sample(f'{name}_bucket', count, **labels, le=f'{bound:g}')
+        self.sample(f'{name}_bucket', data['count'], **labels, le='+Inf')
+        self.sample(f'{name}_sum', float(data['sum']), **labels)
+        self.sample(f'{name}_count', data['count'], **labels)
+
+
+def render_prometheus(results: Dict[str, Any]) -> str:
+    """
+    Render a validation report as Prometheus text exposition
+
+    Args:
+        results: Report produced by CMICComplianceValidator.run_all_validations()
+
+    Returns:
+        Exposition text terminated by a newline
+    """
+    out = _Exposition()
+    controls = [(family, control_id, result)
+                for family, family_results in results.get('controls', {}).items()
+                for control_id, result in family_results.items()]
+
+    out.family('cmmc_control_passed', 'gauge', 'Whether the control passed (1) or not (0)')
+    for family, control_id, result in controls:
+        out.sample('cmmc_control_passed', int(result.get('status') == 'PASS'),
+                   control=control_id, family=family.upper())
+
+    out.family('cmmc_control_status', 'gauge', 'Current status of the control (1 for the active status)')
+    for family, control_id, result in controls:
+        current = result.get('status', 'UNKNOWN')
+        for status in _STATUSES:
+            out.sample('cmmc_control_status', int(status == current),
+                       control=control_id, family=family.upper(), status=status)
+
+    out.family('cmmc_control_findings', 'gauge', 'Number of findings reported by the control')
+    for family, control_id, result in controls:
+        out.sample('cmmc_control_findings', len(result.get('findings', [])),
+                   control=control_id, family=family.upper())
+    stale = [(family, control_id, result) for family, control_id, result in controls if 'staleness' in result]
+    if stale:
+        out.family('cmmc_control_staleness_seconds', 'gauge', 'Age of the control result in the report')
+        for family, control_id, result in stale:
+            out.sample('cmmc_control_staleness_seconds', float(result['staleness']),
+                       control=control_id, family=family.upper())
+
+    summary = results.get('summary', {})
+    out.family('cmmc_compliance_percentage', 'gauge', 'Percentage of controls that passed')
+    out.sample('cmmc_compliance_percentage', float(summary.get('compliance_percentage', 0)))
+    out.family('cmmc_compliant', 'gauge', 'Whether the host is compliant (1) or not (0)')
+    out.sample('cmmc_compliant', int(summary.get('overall_status') == 'COMPLIANT'))
+    out.family('cmmc_controls', 'gauge', 'Number of controls by outcome')
+    for outcome in ('passed', 'failed', 'error', 'timeout', 'not_applicable'):
+        out.sample('cmmc_controls', summary.get(f'{outcome}_controls', 0), outcome=outcome)
+    out.sample('cmmc_controls', summary.get('total_controls', 0), outcome='total')
+
+    probe_cache = results.get('probe_cache', {})
+    out.family('cmmc_probe_requests', 'gauge', 'Probe requests in the last run by kind and cache result')
+    for kind, counts in probe_cache.items():
+        if isinstance(counts, dict):
+            out.sample('cmmc_probe_requests', counts.get('hits', 0), kind=kind, result='hit')
+            out.sample('cmmc_probe_requests', counts.get('misses', 0), kind=kind, result='miss')
+
+    durations = results.get('durations', {})
+    if durations.get('controls'):
+        out.family('cmmc_control_duration_seconds', 'gauge', 'Time spent on the last evaluation of the control')
+        for control_id, seconds in durations['controls'].items():
+            out.sample('cmmc_control_duration_seconds', float(seconds), control=control_id)
+    if durations.get('probes'):
+        out.family('cmmc_probe_duration_seconds', 'histogram', 'Time spent executing uncached probes by kind')
+        for kind, data in durations['probes'].items():
+            out.histogram('cmmc_probe_duration_seconds', data, kind=kind)
+    if 'run_seconds' in durations:
+        out.family('cmmc_validation_duration_seconds', 'gauge', 'Wall-clock duration of the last run')
+        out.sample('cmmc_validation_duration_seconds', float(durations['run_seconds']))
+
+    if results.get('timestamp'):
+        out.family('cmmc_last_run_timestamp_seconds', 'gauge', 'Unix time the last run started')
+        out.sample('cmmc_last_run_timestamp_seconds',
+                   float(round(datetime.fromisoformat(results['timestamp']).timestamp(), 3)))
+
+    return '\n'.join(out.lines) + '\n'
+
+
+def write_textfile(text: str, directory: str, name: str = TEXTFILE_NAME) -> str:
+    """
+    Atomically publish metrics to a node_exporter textfile collector directory
+
+    The file is written under a temporary name in the same directory and renamed
+    into place, so the collector never reads a partial file.
+
+    Returns:
+        Path of the published file
+    """
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, name)
+    # node_exporter only reads *.prom, so the temporary file is never collected
+    tmp_path = os.path.join(directory, f'.{name}.{os.getpid()}.tmp')
+    try:
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return target
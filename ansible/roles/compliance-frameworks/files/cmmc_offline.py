@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Offline Mode
+Author: thndrchckn
+Purpose: Validate an unpacked image or mounted filesystem tree instead of the
+         running system
+
+Golden images and container layers should be checked before they are deployed.
+With a root directory every file probe is re-based below it, and symbolic links
+are resolved inside the tree so an absolute link in the image never escapes to
+the scanning host. Probes that need a running system are answered from the files
+that configure them where possible (audit rules, unit files); the rest report
+themselves unavailable so affected controls become NOT_APPLICABLE instead of FAIL.
+"""
+
+import errno
+import fnmatch
+import os
+import shlex
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+from cmmc_permissions import ScanEntry
+from cmmc_probes import ProbeCache
+
+# Rule files augenrules compiles into audit.rules at boot, and the compiled file
+AUDIT_RULES_DIR = '/etc/audit/rules.d'
+AUDIT_RULES_FILE = '/etc/audit/audit.rules'
+
+# Same limit as the kernel's path resolution
+MAX_SYMLINK_HOPS = 40
+
+_GLOB_CHARS = ('*', '?', '[')
+
+# auditctl -l lists rules only; control options (-D, -b, -e, ...) are not shown
+_AUDIT_RULE_PREFIXES = ('-a', '-A', '-w')
+
+
+class RootedProbeCache(ProbeCache):
+    """
+    Probe layer reading a filesystem tree below a root directory
+
+    Paths requested by checks are absolute paths of the image; they are never
+    resolved against the scanning host.
+    """
+
+    local = False
+
+    def __init__(self, root: str, **kwargs):
+        """
+        Args:
+            root: Directory holding the image's filesystem
+            **kwargs: Passed to ProbeCache
+        """
+        super().__init__(**kwargs)
+        self.root = os.path.realpath(root)
+        self._unavailable = threading.local()
+        # Commands answered from the image's configuration files
+        self._offline_commands: Dict[str, Callable[[Sequence[str]], Tuple[int, str, str]]] = {
+            'auditctl -l': self._audit_rules,
+        }
+
+    def host_path(self, path: str) -> str:
+        """
+        Map an absolute image path to the scanning host, resolving symlinks in the image
+
+        Raises:
+            OSError: ELOOP when links nest deeper than MAX_SYMLINK_HOPS
+        """
+        pending = [part for part in str(path).split('/') if part][::-1]
+        resolved: List[str] = []
+        hops = 0
+        while pending:
+            part = pending.pop()
+            if part == '.':
+                continue
+            if part == '..':
+                if resolved:
+                    resolved.pop()
+                continue
+            candidate = os.path.join(self.root, *resolved, part)
+            if not os.path.islink(candidate):
+                resolved.append(part)
+                continue
+            hops += 1
+            if hops > MAX_SYMLINK_HOPS:
+                raise OSError(errno.ELOOP, os.strerror(errno.ELOOP), path)
+            target = os.readlink(candidate)
+            if target.startswith('/'):
+                resolved = []
+            pending.extend(part for part in target.split('/')[::-1] if part)
+        return os.path.join(self.root, *resolved)
+
+    def _read(self, path: str) -> str:
+        return super()._read(self.host_path(path))
+
+    def _realpath(self, path: str) -> str:
+        try:
+            relative = os.path.relpath(self.host_path(path), self.root)
+        except OSError:
+            return path
+        return '/' if relative == '.' else '/' + relative
+
+    def _stat(self, path: str) -> os.stat_result:
+        return os.stat(self.host_path(path))
+
+    def _listdir(self, path: str) -> List[str]:
+        return os.listdir(self.host_path(path))
+
+    def _glob(self, pattern: str) -> List[str]:
+        """Expand pattern component by component, following links inside the root"""
+        matches = ['/']
+        for part in [part for part in pattern.split('/') if part]:
+            expanded = []
+            for directory in matches:
+                if not any(char in part for char in _GLOB_CHARS):
+                    expanded.append(os.path.join(directory, part))
+                    continue
+                try:
+                    names = self._listdir(directory)
+                except OSError:
+                    continue
+                expanded.extend(os.path.join(directory, name) for name in sorted(names)
+                                if fnmatch.fnmatchcase(name, part)
+                                and (part.startswith('.') or not name.startswith('.')))
+            matches = expanded
+        return [path for path in matches if path != '/' and self._lexists(path)]
+
+    def _scan(self, pattern: str) -> List[ScanEntry]:
+        return self._scan_primitives(pattern)
+
+    def _lexists(self, path: str) -> bool:
+        try:
+            return os.path.lexists(self.host_path(path))
+        except OSError:
+            return False
+
+    def run_command(self, argv: Union[Sequence[str], str]) -> Tuple[int, str, str]:
+        """
+        Answer a command from the image's configuration, or report it unavailable
+
+        Commands without an offline equivalent return 127 and are recorded for
+        the calling thread (see take_unavailable()).
+        """
+        argv = tuple(shlex.split(argv) if isinstance(argv, str) else argv)
+        resolver = self._offline_commands.get(' '.join((os.path.basename(argv[0]),) + argv[1:]))
+        if resolver is None:
+            unavailable = getattr(self._unavailable, 'commands', None)
+            if unavailable is None:
+                unavailable = self._unavailable.commands = []
+            unavailable.append(' '.join(argv))
+            return 127, '', f"Not available offline: {argv[0]}"
+        return self._memoize('command', argv, lambda: resolver(argv))
+
+    def take_unavailable(self) -> List[str]:
+        """Return and clear the live-only commands requested by the calling thread"""
+        unavailable = getattr(self._unavailable, 'commands', None) or []
+        self._unavailable.commands = []
+        return list(dict.fromkeys(unavailable))
+
+    def _audit_rules(self, argv: Sequence[str]) -> Tuple[int, str, str]:
+        """Rules auditd loads at boot, in the order augenrules would load them"""
+        try:
+            sources = [os.path.join(AUDIT_RULES_DIR, name) for name in self.listdir(AUDIT_RULES_DIR)
+                       if name.endswith('.rules')]
+        except OSError:
+            sources = []
+        if not sources:
+            sources = [AUDIT_RULES_FILE]
+
+        rules = []
+        for source in sources:
+            try:
+                content = self.read_text(source)
+            except OSError:
+                continue
+            rules.extend(line.strip() for line in content.splitlines()
+                         if line.strip().startswith(_AUDIT_RULE_PREFIXES))
+        return 0, ''.join(rule + '\n' for rule in rules), ''
+
+
+def image_hostname(probes: RootedProbeCache) -> str:
+    """Return the hostname configured in the image, or the root directory's name"""
+    try:
+        hostname = probes.read_text('/etc/hostname').strip()
+    except OSError:
+        hostname = ''
+    return hostname or os.path.basename(probes.root) or probes.root
+
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Package Inventory
+Author: thndrchckn
+Purpose: Answer "is package X installed" without forking the package manager
+
+`rpm -qa` and `dpkg -l` take seconds on hosts with thousands of packages. The
+inventory reads `/var/lib/dpkg/status` directly, and on rpm systems queries the
+sqlite rpm database (rpm >= 4.16) read-only, falling back to a single `rpm -qa`
+for Berkeley DB databases and remote hosts. The resulting name -> version index is
+built at most once per run and persisted in the state directory, keyed by the
+package database's mtime/size/inode, so runs between package changes load it from
+JSON and every lookup is a dictionary hit.
+"""
+
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+INDEX_FILE_NAME = 'package_index.json'
+INDEX_FORMAT_VERSION = 1
+
+DPKG_STATUS = '/var/lib/dpkg/status'
+# rpm's database directory moved to /usr/lib/sysimage/rpm on newer distributions
+RPM_DB_DIRS = ('/var/lib/rpm', '/usr/lib/sysimage/rpm')
+RPM_SQLITE_NAME = 'rpmdb.sqlite'
+# Files whose metadata changes when packages are installed or removed (sqlite
+# database and its write-ahead log, or the Berkeley DB Packages file)
+RPM_DB_PREFIXES = ('rpmdb.sqlite', 'Packages')
+RPM_QUERY = ('rpm', '-qa', '--qf', '%{NAME} %|EPOCH?{%{EPOCH}:}:{}|%{VERSION}-%{RELEASE}\\n')
+
+# Package databases a control depends on when it declares package checks
+PACKAGE_DB_PATHS = (DPKG_STATUS,) + RPM_DB_DIRS
+
+# Header tags read from rpm database blobs, and the header data types used by them
+_RPMTAG_NAME, _RPMTAG_VERSION, _RPMTAG_RELEASE, _RPMTAG_EPOCH = 1000, 1001, 1002, 1003
+_RPM_INT32, _RPM_STRING = 4, 6
+
+
+class PackageQueryError(OSError):
+    """The rpm query used in place of reading the database failed"""
+
+
+class PackageIndex:
+    """Installed packages of one system, by name"""
+
+    def __init__(self, source: Optional[str], packages: Dict[str, str]):
+        """
+        Args:
+            source: 'dpkg', 'rpm', or None when no package database was found
+            packages: Package name -> installed version
+        """
+        self.source = source
+        self.packages = packages
+
+    def version(self, name: str) -> Optional[str]:
+        """Installed version of a package, or None if it is not installed"""
+        return self.packages.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.packages
+
+    def __len__(self) -> int:
+        return len(self.packages)
+
+
+def parse_dpkg_status(content: str) -> Dict[str, str]:
+    """
+    Map installed package names to versions from dpkg's status file
+
+    Only packages in the 'installed' state count; removed packages whose
+    configuration files remain ('config-files') are skipped.
+    """
+    packages: Dict[str, str] = {}
+    for stanza in content.split('\n\n'):
+        fields: Dict[str, str] = {}
+        for line in stanza.splitlines():
+            if line and not line[0].isspace():
+                key, _, value = line.partition(':')
+                fields[key] = value.strip()
+        name = fields.get('Package')
+        if name and fields.get('Status', '').endswith(' installed'):
+            packages.setdefault(name, fields.get('Version', ''))
+    return packages
+
+
+def parse_rpm_query(stdout: str) -> Dict[str, str]:
+    """Map package names to versions from RPM_QUERY output (first of several versions wins)"""
+    packages: Dict[str, str] = {}
+    for line in stdout.splitlines():
+        name, _, version = line.partition(' ')
+        if name:
+            packages.setdefault(name, version)
+    return packages
+
+
+def _rpm_header_fields(blob: bytes) -> Dict[int, Any]:
+    """Read the name/version/release/epoch tags of an rpm header blob"""
+    index_length, _ = struct.unpack_from('>II', blob, 0)
+    data_start = 8 + 16 * index_length
+    fields: Dict[int, Any] = {}
+    for entry in range(index_length):
+        tag, kind, offset, _ = struct.unpack_from('>iIiI', blob, 8 + 16 * entry)
+        if tag not in (_RPMTAG_NAME, _RPMTAG_VERSION, _RPMTAG_RELEASE, _RPMTAG_EPOCH):
+            continue
+        start = data_start + offset
+        if kind == _RPM_INT32:
+            fields[tag] = struct.unpack_from('>I', blob, start)[0]
+        elif kind == _RPM_STRING:
+            fields[tag] = blob[start:blob.index(b'\0', start)].decode('utf-8', 'replace')
+    return fields
+
+
+def read_rpm_sqlite(path: str) -> Dict[str, str]:
+    """
+    Map package names to versions from an rpm sqlite database, read-only
+
+    Raises:
+        sqlite3.Error, struct.error, ValueError: The database cannot be read
+    """
+    import sqlite3
+
+    # immutable: never create or take locks on the WAL, which may belong to a
+    # running rpm transaction or live on a read-only image
+    connection = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True)
+    try:
+        packages: Dict[str, str] = {}
+        for (blob,) in connection.execute('SELECT blob FROM Packages ORDER BY hnum'):
+            fields = _rpm_header_fields(bytes(blob))
+            name = fields.get(_RPMTAG_NAME)
+            if not name:
+                continue
+            version = f"{fields.get(_RPMTAG_VERSION, '')}-{fields.get(_RPMTAG_RELEASE, '')}"
+            if _RPMTAG_EPOCH in fields:
+                version = f"{fields[_RPMTAG_EPOCH]}:{version}"
+            packages.setdefault(name, version)
+        return packages
+    finally:
+        connection.close()
+
+
+def _stat_entry(probes, path: str) -> Optional[List[Any]]:
+    try:
+        st = probes.stat(path)
+    except OSError:
+        return None
+    return [path, st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+def database_fingerprint(probes) -> Tuple[Optional[str], List[List[Any]]]:
+    """
+    Identify the system's package database
+
+    Returns:
+        (source, fingerprint): 'dpkg', 'rpm' or None, and the mtime/size/inode
+        of the database files, which change with every package transaction
+    """
+    entry = _stat_entry(probes, DPKG_STATUS)
+    if entry is not None:
+        return 'dpkg', [entry]
+    for directory in RPM_DB_DIRS:
+        try:
+            names = probes.listdir(directory)
+        except OSError:
+            continue
+        entries = [_stat_entry(probes, os.path.join(directory, name))
+                   for name in names if name.startswith(RPM_DB_PREFIXES)]
+        entries = [entry for entry in entries if entry is not None]
+        if entries:
+            return 'rpm', entries
+    return None, []
+
+
+def _read_rpm(probes, fingerprint: List[List[Any]]) -> Dict[str, str]:
+    """Read the sqlite database where it is reachable on this machine, else query rpm once"""
+    database = next((path for path, *_ in fingerprint if os.path.basename(path) == RPM_SQLITE_NAME), None)
+    if database is not None:
+        try:
+            return read_rpm_sqlite(probes.host_path(database))
+        except Exception:
+            # Remote host, or a database layout this reader does not understand
+            pass
+    rc, stdout, stderr = probes.run_command(list(RPM_QUERY))
+    if rc != 0:
+        raise PackageQueryError(f"rpm query failed: {stderr.strip() or rc}")
+    return parse_rpm_query(stdout)
+
+
+def load_package_index(probes, state_path: Optional[Path] = None) -> PackageIndex:
+    """
+    Return the installed package index, rebuilding it only when the database changed
+
+    Args:
+        probes: ProbeCache of the system being validated
+        state_path: State directory persisting the index; None keeps it in memory
+            (remote hosts and images)
+
+    Raises:
+        OSError: The package database exists but cannot be read (PackageQueryError
+            when the fallback rpm query failed)
+    """
+    source, fingerprint = database_fingerprint(probes)
+    if source is None:
+        return PackageIndex(None, {})
+
+    index_file = Path(state_path) / INDEX_FILE_NAME if state_path is not None else None
+    if index_file is not None:
+        try:
+            with open(index_file, 'r') as f:
+                stored = json.load(f)
+            if (stored.get('version') == INDEX_FORMAT_VERSION and stored.get('source') == source
+                    and stored.get('fingerprint') == fingerprint):
+                return PackageIndex(source, stored['packages'])
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+    if source == 'dpkg':
+        packages = parse_dpkg_status(probes.read_text(DPKG_STATUS))
+    else:
+        packages = _read_rpm(probes, fingerprint)
+
+    if index_file is not None:
+        try:
+            index_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = index_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump({'version': INDEX_FORMAT_VERSION, 'source': source,
+                           'fingerprint': fingerprint, 'packages': packages}, f)
+            os.replace(tmp_file, index_file)
+        except OSError:
+            # The index is an optimization; validation continues without it
+            pass
+    return PackageIndex(source, packages)
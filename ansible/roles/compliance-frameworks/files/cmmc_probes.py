@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Probe Layer
+Author: thndrchckn
+Purpose: Memoized system queries (commands, file reads, stat calls) shared by all
+         checks within a single validation run
+
+Several controls inspect the same system state - `auditctl -l`, `/etc/ssh/sshd_config`,
+`/etc/issue` - so every probe is keyed by its command or path and executed at most once
+per run, even when checks execute concurrently.
+
+Cheap questions are answered in-process (hostname, sudoers directives, file content
+matching). External commands remain available as a fallback through an argv-list API;
+no probe goes through /bin/sh.
+"""
+
+import glob
+import os
+import re
+import shlex
+import socket
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+from cmmc_permissions import ScanEntry, scan_local, stat_paths
+from cmmc_timing import Timings
+
+DEFAULT_COMMAND_TIMEOUT = int(os.environ.get('CMMC_COMMAND_TIMEOUT', '30'))  # seconds
+
+
+class _ProbeEntry:
+    """Single memoized probe outcome; waiters block until the owning thread finishes"""
+
+    __slots__ = ('ready', 'value', 'error', 'discarded')
+
+    def __init__(self) -> None:
+        self.ready = threading.Event()
+        self.value: Any = None
+        self.error: Optional[Exception] = None
+        # Set when the outcome only held for the owning thread; waiters retry
+        self.discarded = False
+
+
+class _CutShort(Exception):
+    """A command was killed by the calling check's deadline; its outcome is not memoized"""
+
+    def __init__(self, result: Tuple[int, str, str]):
+        super().__init__(result[2])
+        self.result = result
+
+
+class ProbeCache:
+    """
+    Run-scoped memoizing probe layer
+
+    Probes are grouped by kind (``command``, ``read``, ``stat``) for the hit/miss
+    counters. Failures are memoized as well, so a missing file is only stat'ed once.
+    Concurrent requests for the same key wait for the first caller instead of
+    repeating the work. Commands killed by the calling check's deadline are the
+    exception: their outcome says nothing about the system, so the next caller
+    runs them again.
+    """
+
+    KINDS = ('command', 'read', 'stat', 'list', 'glob', 'scan', 'realpath')
+
+    # Probes observe the machine running the validator; remote probe layers
+    # (fleet mode) override the primitives below and set this to False
+    local = True
+
+    def __init__(self, command_timeout: int = DEFAULT_COMMAND_TIMEOUT, timings: Optional[Timings] = None):
+        """
+        Initialize an empty probe cache
+
+        Args:
+            command_timeout: Timeout in seconds applied to each command probe
+            timings: Span recorder for command executions and file reads
+        """
+        self.command_timeout = command_timeout
+        self._budget = threading.local()
+        self.timings = timings or Timings()
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, Hashable], _ProbeEntry] = {}
+        self._hits = {kind: 0 for kind in self.KINDS}
+        self._misses = {kind: 0 for kind in self.KINDS}
+        self._durations: Dict[str, List[float]] = {kind: [] for kind in self.KINDS}
+
+    def _memoize(self, kind: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached outcome for (kind, key), computing it once via loader"""
+        while True:
+            with self._lock:
+                entry = self._entries.get((kind, key))
+                owner = entry is None
+                if owner:
+                    entry = _ProbeEntry()
+                    self._entries[(kind, key)] = entry
+                    self._misses[kind] += 1
+                else:
+                    self._hits[kind] += 1
+
+            if owner:
+                started = time.perf_counter()
+                try:
+                    entry.value = loader()
+                except _CutShort as e:
+                    entry.error = e
+                    entry.discarded = True
+                except Exception as e:
+                    entry.error = e
+                finally:
+                    elapsed = time.perf_counter() - started
+                    with self._lock:
+                        self._durations[kind].append(elapsed)
+                        if entry.discarded:
+                            del self._entries[(kind, key)]
+                    entry.ready.set()
+            else:
+                entry.ready.wait()
+                if entry.discarded:
+                    # The owner's deadline cut the probe short; run it under ours
+                    continue
+
+            if entry.error is not None:
+                raise entry.error
+            return entry.value
+
+    def set_deadline(self, deadline: Optional[float]) -> None:
+        """
+        Bound commands started by the calling thread
+
+        Args:
+            deadline: time.monotonic() value after which commands are killed, or
+                None to apply only command_timeout
+        """
+        self._budget.deadline = deadline
+        self._budget.expired = False
+
+    def deadline_expired(self) -> bool:
+        """True if a command of the calling thread was killed by its deadline since set_deadline()"""
+        return getattr(self._budget, 'expired', False)
+
+    def command_timeout_now(self) -> float:
+        """Timeout for a command started now by the calling thread"""
+        deadline = getattr(self._budget, 'deadline', None)
+        if deadline is None:
+            return self.command_timeout
+        return max(0.01, min(self.command_timeout, deadline - time.monotonic()))
+
+    def run_command(self, argv: Union[Sequence[str], str]) -> Tuple[int, str, str]:
+        """
+        Execute an external command once per run, without a shell
+
+        Args:
+            argv: Argument vector; a plain string is split with shlex for
+                convenience but never passed to a shell
+
+        Returns:
+            Tuple of (return_code, stdout, stderr)
+        """
+        argv = tuple(shlex.split(argv) if isinstance(argv, str) else argv)
+        try:
+            return self._memoize('command', argv, lambda: self._execute(argv))
+        except _CutShort as e:
+            self._budget.expired = True
+            return e.result
+
+    def _execute(self, argv: Sequence[str]) -> Tuple[int, str, str]:
+        """Execute an argument vector without caching"""
+        with self.timings.span('command', ' '.join(argv)):
+            result = self._spawn(argv)
+        deadline = getattr(self._budget, 'deadline', None)
+        if deadline is not None and time.monotonic() >= deadline:
+            raise _CutShort(result)
+        return result
+
+    def _spawn(self, argv: Sequence[str]) -> Tuple[int, str, str]:
+        """Run argv with the command timeout, mapping failures to return codes"""
+        try:
+            result = subprocess.run(
+                list(argv),
+                capture_output=True,
+                text=True,
+                timeout=self.command_timeout_now()
+            )
+            return result.returncode, result.stdout, result.stderr
+        except subprocess.TimeoutExpired:
+            return 1, "", "Command timeout"
+        except FileNotFoundError:
+            return 127, "", f"Command not found: {argv[0]}"
+        except Exception as e:
+            return 1, "", str(e)
+
+    def read_text(self, path: str) -> str:
+        """Read a text file once per run; raises OSError like open()"""
+        def load() -> str:
+            with self.timings.span('read', str(path)):
+                return self._read(str(path))
+        return self._memoize('read', str(path), load)
+
+    def _read(self, path: str) -> str:
+        with open(path, 'r') as f:
+            return f.read()
+
+    def stat(self, path: str) -> os.stat_result:
+        """Stat a path once per run; raises OSError like os.stat()"""
+        return self._memoize('stat', str(path), lambda: self._stat(str(path)))
+
+    def _stat(self, path: str) -> os.stat_result:
+        return os.stat(path)
+
+    def exists(self, path: str) -> bool:
+        """Check whether a path exists, sharing the cached stat result"""
+        try:
+            self.stat(path)
+            return True
+        except OSError:
+            return False
+
+    def host_path(self, path: str) -> str:
+        """Path on the machine running the validator that holds path (identity here)"""
+        return path
+
+    def realpath(self, path: str) -> str:
+        """Resolve symlinks in path once per run; the path is kept where it cannot be resolved"""
+        return self._memoize('realpath', str(path), lambda: self._realpath(str(path)))
+
+    def _realpath(self, path: str) -> str:
+        return os.path.realpath(path)
+
+    def listdir(self, path: str) -> List[str]:
+        """List a directory once per run (sorted); raises OSError like os.listdir()"""
+        return self._memoize('list', str(path), lambda: sorted(self._listdir(str(path))))
+
+    def _listdir(self, path: str) -> List[str]:
+        return os.listdir(path)
+
+    def glob(self, pattern: str) -> List[str]:
+        """Expand a glob pattern once per run (sorted)"""
+        return self._memoize('glob', pattern, lambda: sorted(self._glob(pattern)))
+
+    def _glob(self, pattern: str) -> List[str]:
+        return glob.glob(pattern)
+
+    def scan(self, pattern: str) -> List[ScanEntry]:
+        """
+        Expand a glob pattern and stat every match once per run (sorted)
+
+        Returns:
+            (path, stat_result) pairs; None for matches that cannot be stat'ed
+        """
+        return self._memoize('scan', pattern, lambda: sorted(self._scan(pattern), key=lambda entry: entry[0]))
+
+    def _scan(self, pattern: str) -> List[ScanEntry]:
+        return scan_local(pattern)
+
+    def _scan_primitives(self, pattern: str) -> List[ScanEntry]:
+        """Scan through _glob and _stat, for probe layers that override them"""
+        paths = self._glob(pattern) if any(char in pattern for char in '*?[') else [pattern]
+        return stat_paths(paths, self._stat)
+
+    def contains(self, path: str, text: str) -> bool:
+        """True if the file exists and contains text; unreadable files never match"""
+        try:
+            return text in self.read_text(path)
+        except OSError:
+            return False
+
+    def search_lines(self, path: str, pattern: str, flags: int = 0) -> List[str]:
+        """
+        Return non-comment lines of a file matching a regular expression
+
+        Lines whose first non-blank character is '#' are skipped, which avoids
+        matching commented-out directives. Unreadable files yield no matches.
+        """
+        try:
+            content = self.read_text(path)
+        except OSError:
+            return []
+        regex = re.compile(pattern, flags)
+        return [
+            line for line in content.splitlines()
+            if not line.lstrip().startswith('#') and regex.search(line)
+        ]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return hit/miss counters per probe kind"""
+        with self._lock:
+            return {
+                kind: {'hits': self._hits[kind], 'misses': self._misses[kind]}
+                for kind in self.KINDS
+            }
+
+    def durations(self) -> Dict[str, List[float]]:
+        """Return execution times in seconds of uncached probes per kind"""
+        with self._lock:
+            return {kind: list(values) for kind, values in self._durations.items()}
+
+
+def get_hostname() -> str:
+    """Return the system hostname without spawning `hostname`"""
+    try:
+        return socket.gethostname() or os.uname().nodename
+    except Exception:
+        return 'unknown'
+
+
+# Include directives; the legacy '#' prefix is not a comment for these
+_SUDOERS_INCLUDE = re.compile(r'^[#@](include|includedir)\s+(.+?)\s*$')
+
+
+def scan_sudoers(probes: ProbeCache, path: str = '/etc/sudoers',
+                 _seen: Optional[set] = None) -> List[Tuple[str, int, str]]:
+    """
+    Read the effective sudoers configuration, following include directives
+
+    Handles `#include`/`@include` and `#includedir`/`@includedir` (relative paths
+    resolve against the including file's directory), joins backslash line
+    continuations and drops comments.
+
+    Returns:
+        List of (file, line_number, logical_line) tuples in sudo's parse order
+    """
+    seen = _seen if _seen is not None else set()
+    real = os.path.realpath(path)
+    if real in seen:
+        return []
+    seen.add(real)
+
+    try:
+        content = probes.read_text(path)
+    except OSError:
+        return []
+
+    entries: List[Tuple[str, int, str]] = []
+    pending, start = '', 0
+    for number, raw in enumerate(content.splitlines(), 1):
+        line = raw.strip()
+        if not pending:
+            start = number
+        include = _SUDOERS_INCLUDE.match(line) if not pending else None
+        if include:
+            kind, target = include.group(1), include.group(2).strip('"')
+            if not os.path.isabs(target):
+                target = os.path.join(os.path.dirname(path), target)
+            if kind == 'include':
+                entries.extend(scan_sudoers(probes, target, seen))
+            else:
+                try:
+                    names = probes.listdir(target)
+                except OSError:
+                    names = []
+                for name in names:
+                    # sudo skips names ending in '~' or containing a '.'
+                    if name.endswith('~') or '.' in name:
+                        continue
+                    entries.extend(scan_sudoers(probes, os.path.join(target, name), seen))
+            continue
+        if not pending and (not line or line.startswith('#')):
+            continue
+        if line.endswith('\\'):
+            pending += line[:-1] + ' '
+            continue
+        entries.append((path, start, pending + line))
+        pending = ''
+    return entries
+
+
+def find_sudoers_defaults(probes: ProbeCache, option: str,
+                          path: str = '/etc/sudoers') -> List[Tuple[str, str]]:
+    """
+    Find a `Defaults` option anywhere in the effective sudoers configuration
+
+    Args:
+        probes: Probe cache used for file access
+        option: Option name, e.g. 'logfile'
+        path: Top-level sudoers file
+
+    Returns:
+        List of (file, value) pairs; value is '' for boolean flags. Negated
+        options are not reported.
+    """
+    pattern = re.compile(r'(?:^|[\s,])(!?)' + re.escape(option)
+                         + r'\b(?:\s*[+-]?=\s*("[^"]*"|[^,\s]+))?')
+    matches = []
+    for file_name, _, line in scan_sudoers(probes, path):
+        if not re.match(r'Defaults\b', line):
+            continue
+        for match in pattern.finditer(line[len('Defaults'):]):
+            if match.group(1) == '!':
+                continue  # negated option, e.g. Defaults !logfile
+            matches.append((file_name, (match.group(2) or '').strip('"')))
+    return matches
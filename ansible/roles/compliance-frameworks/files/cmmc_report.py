@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Report Records and Writer
+Author: thndrchckn
+Purpose: Hold control results compactly and write reports without building them
+         in memory as one string
+
+Every control result used to be a dict, and reports were written with
+`json.dump(..., indent=2)` and printed or stored with `json.dumps(...)`, which
+materializes the whole serialized report next to the results. Results are kept as
+ControlResult records (`__slots__`, read through the Mapping interface so existing
+consumers keep calling `result.get('status')`), and reports are encoded
+incrementally: the writers hand one small chunk at a time to the file, stdout or
+compressor. Output is compact unless pretty printing is requested, which roughly
+halves report size.
+"""
+
+import json
+import os
+import zlib
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, TextIO
+
+_MISSING = object()
+
+
+class ControlResult(Mapping):
+    """
+    One control's result: control, title, status, details, findings, evaluation,
+    and with tiered scheduling evaluated_at and staleness
+
+    Fields beyond these are kept in a small dict. Iteration order matches the
+    dict results built by the checks, so reports keep their key order.
+    """
+
+    __slots__ = ('control', 'title', 'status', 'details', 'findings', 'evaluation',
+                 'evaluated_at', 'staleness', '_extra')
+
+    FIELDS = ('control', 'title', 'status', 'details', 'findings', 'evaluation', 'evaluated_at', 'staleness')
+
+    def __init__(self, **fields: Any):
+        extra = {}
+        for key, value in fields.items():
+            if key in self.FIELDS:
+                setattr(self, key, value)
+            else:
+                extra[key] = value
+        self._extra = extra or None
+
+    @classmethod
+    def from_mapping(cls, result: Mapping) -> 'ControlResult':
+        """Build a record from a check's result dict (records are returned unchanged)"""
+        return result if isinstance(result, cls) else cls(**result)
+
+    def __getitem__(self, key: str) -> Any:
+        value = getattr(self, key, _MISSING) if key in self.FIELDS else (self._extra or {}).get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.FIELDS:
+            if hasattr(self, key):
+                yield key
+        yield from self._extra or ()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"ControlResult({dict(self)!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self)
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, ControlResult):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encoder(pretty: bool = False, **kwargs: Any) -> json.JSONEncoder:
+    """JSON encoder for reports: compact, or indented by two spaces when pretty"""
+    if pretty:
+        return json.JSONEncoder(indent=2, default=_encode_default, **kwargs)
+    return json.JSONEncoder(separators=(',', ':'), default=_encode_default, **kwargs)
+
+
+def dumps(report: Any, pretty: bool = False, **kwargs: Any) -> str:
+    """Encode a small document (e.g. one JSONL record) that may contain ControlResults"""
+    return encoder(pretty, **kwargs).encode(report)
+
+
+def write_stream(report: Any, output: TextIO, pretty: bool = False) -> None:
+    """Encode a report chunk by chunk into an open text stream"""
+    for chunk in encoder(pretty).iterencode(report):
+        output.write(chunk)
+
+
+def write_report(report: Any, path: Path, pretty: bool = False) -> None:
+    """Write a report file atomically, encoding it chunk by chunk"""
+    path = Path(path)
+    tmp_file = path.with_name(path.name + '.tmp')
+    with open(tmp_file, 'w') as f:
+        write_stream(report, f, pretty)
+    os.replace(tmp_file, path)
+
+
+def compress_report(report: Any, level: int = 6) -> bytes:
+    """zlib-compressed compact JSON of a report, without materializing the JSON text"""
+    compressor = zlib.compressobj(level)
+    parts = [compressor.compress(chunk.encode()) for chunk in encoder().iterencode(report)]
+    parts.append(compressor.flush())
+    return b''.join(parts)
+
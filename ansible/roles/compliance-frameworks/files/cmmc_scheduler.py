@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Deadline Scheduler
+Author: thndrchckn
+Purpose: Bound the latency of a validation run with a run-level deadline
+
+A wedged `auditctl` or a hanging NFS home directory must not hold an Ansible batch
+for minutes. With a deadline, every check receives a time budget carved from the
+time that is left, proportional to its historical cost. Probe commands are killed
+when the budget of the check that runs them expires, checks that overrun are
+abandoned and reported as TIMEOUT, and the most expensive checks start first so
+they are not the ones left waiting when time runs out.
+
+Tiered scheduling spreads controls over runs instead. Cheap controls run every
+time; the others may be served from their stored result until it is older than
+their maximum staleness, and the controls that are due share a per-run budget of
+check time, most overdue first.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+COSTS_FILE_NAME = 'control_costs.json'
+
+# Assumed cost (seconds) of a control that has never been timed
+DEFAULT_CHECK_COST = 1.0
+# Weight of the newest observation in the moving average of a control's cost
+COST_SMOOTHING = 0.3
+# Smallest budget handed to a check while at least this much time is left
+MIN_CHECK_BUDGET = float(os.environ.get('CMMC_MIN_CHECK_BUDGET', '2'))
+# Time allowed after a budget expires for killed probes to unwind the check
+BUDGET_GRACE_SECONDS = 0.25
+
+# Tiered scheduling: controls cheaper than this (learned seconds) run every time,
+# the others may be DEFAULT_MAX_STALENESS old unless the catalog sets max_staleness
+CHEAP_CHECK_COST = float(os.environ.get('CMMC_CHEAP_CHECK_COST', '0.1'))
+DEFAULT_MAX_STALENESS = float(os.environ.get('CMMC_MAX_STALENESS', '3600'))
+
+_DURATION = re.compile(r'^(\d+(?:\.\d+)?)(ms|s|m|h|d|w)?$')
+_UNIT_SECONDS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def parse_duration(value: str) -> float:
+    """
+    Convert '20s', '1500ms', '2m', '1.5h', '1d', '2w' or plain seconds into seconds
+
+    Raises:
+        ValueError: The value is not a positive duration
+    """
+    match = _DURATION.match(str(value).strip())
+    if not match or float(match.group(1)) <= 0:
+        raise ValueError(f"Invalid duration: {value}")
+    return float(match.group(1)) * _UNIT_SECONDS[match.group(2) or 's']
+
+
+class CostStore:
+    """Exponentially smoothed wall-clock cost per control, kept in the state directory"""
+
+    def __init__(self, state_path: Path):
+        self.costs_file = Path(state_path) / COSTS_FILE_NAME
+        self._lock = threading.Lock()
+        try:
+            with open(self.costs_file, 'r') as f:
+                self._costs: Dict[str, float] = {
+                    str(key): float(value) for key, value in json.load(f).items()}
+        except (OSError, ValueError, AttributeError):
+            self._costs = {}
+
+    def cost(self, control_id: str, default: float = DEFAULT_CHECK_COST) -> float:
+        """Learned cost of a control, or default when it has never been timed"""
+        return self._costs.get(control_id, default)
+
+    def record(self, control_id: str, seconds: float) -> None:
+        with self._lock:
+            previous = self._costs.get(control_id)
+            self._costs[control_id] = round(seconds if previous is None else
+                                            previous + COST_SMOOTHING * (seconds - previous), 6)
+
+    def order(self, control_ids: Iterable[str]) -> List[str]:
+        """Return control IDs most expensive first (ties keep their order)"""
+        return sorted(control_ids, key=self.cost, reverse=True)
+
+    def save(self) -> None:
+        with self._lock:
+            costs = dict(self._costs)
+        self.costs_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.costs_file.with_name(self.costs_file.name + '.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(costs, f, sort_keys=True)
+        os.replace(tmp_file, self.costs_file)
+
+
+class TieredSchedule:
+    """
+    Choose the controls a run evaluates from their cost and the age of their results
+
+    A control is due when it has no stored result or its result is older than
+    its maximum staleness: 0 for controls cheaper than CHEAP_CHECK_COST (every
+    run), DEFAULT_MAX_STALENESS for the others, or what the catalog declares.
+    Costs are learned; a catalog cost stands in until a control has been timed.
+    """
+
+    def __init__(self, costs: CostStore, budget: Optional[float] = None):
+        """
+        Args:
+            costs: Learned check costs
+            budget: Seconds of check time a run may spend; None runs every due control
+        """
+        self.costs = costs
+        self.budget = budget
+
+    def cost(self, control_id: str, declared: Optional[float] = None) -> float:
+        return self.costs.cost(control_id, DEFAULT_CHECK_COST if declared is None else declared)
+
+    def max_staleness(self, control_id: str, declared: Optional[float] = None,
+                      declared_cost: Optional[float] = None) -> float:
+        """Seconds a control's result may age before it is due"""
+        if declared is not None:
+            return declared
+        return 0.0 if self.cost(control_id, declared_cost) < CHEAP_CHECK_COST else DEFAULT_MAX_STALENESS
+
+    def select(self, controls: Dict[str, Tuple[Optional[float], float, float]],
+               now: Optional[float] = None) -> List[str]:
+        """
+        Return the controls due in this run
+
+        Controls without a stored result and controls due every run are always
+        taken. Stale controls follow, most overdue first, while their summed
+        cost fits the budget; one that does not fit is skipped in favour of
+        cheaper ones. The most overdue control is taken even beyond the budget,
+        so a control costing more than the whole budget is not starved.
+
+        Args:
+            controls: Control ID -> (evaluated_at or None, max staleness, cost)
+            now: time.time() of the run (default now)
+        """
+        now = time.time() if now is None else now
+        selected = [control_id for control_id, (evaluated_at, max_staleness, _) in controls.items()
+                    if evaluated_at is None or max_staleness <= 0]
+        overdue = {control_id: (now - evaluated_at) / max_staleness
+                   for control_id, (evaluated_at, max_staleness, _) in controls.items()
+                   if evaluated_at is not None and max_staleness > 0
+                   and now - evaluated_at >= max_staleness}
+        stale = sorted(overdue, key=lambda control_id: -overdue[control_id])
+        if self.budget is None:
+            return selected + stale
+
+        spent = sum(controls[control_id][2] for control_id in selected)
+        for index, control_id in enumerate(stale):
+            cost = controls[control_id][2]
+            if index == 0 or spent + cost <= self.budget:
+                selected.append(control_id)
+                spent += cost
+        return selected
+
+
+class BudgetExpired(Exception):
+    """Raised by a BudgetedRunner whose check was cut short by its budget"""
+
+
+Check = Tuple[str, Callable[[], Dict[str, Any]]]
+# (control_id, check, budget_deadline) -> result; raises BudgetExpired
+BudgetedRunner = Callable[[str, Callable[[], Dict[str, Any]], float], Dict[str, Any]]
+# (control_id, budget_seconds, reason) -> TIMEOUT result
+TimeoutResult = Callable[[str, float, str], Dict[str, Any]]
+
+
+class DeadlineScheduler:
+    """
+    Run checks on worker threads within a run-level deadline
+
+    Workers are daemon threads, so a check blocked in the kernel (e.g. a read
+    from an unresponsive NFS mount) is abandoned rather than waited for, and
+    does not keep the process alive after the report is written. An abandoned
+    worker takes no further checks and its late result is dropped, so at most
+    `jobs` checks are started concurrently and none after run() returns.
+    """
+
+    def __init__(self, seconds: float, jobs: int, costs: CostStore,
+                 started: Optional[float] = None):
+        """
+        Args:
+            seconds: Run-level deadline
+            jobs: Number of checks executed concurrently
+            costs: Historical costs used for ordering and budgets
+            started: time.monotonic() at which the run started (default now)
+        """
+        self.seconds = seconds
+        self.jobs = max(1, jobs)
+        self.costs = costs
+        self.deadline = (time.monotonic() if started is None else started) + seconds
+
+    def run(self, checks: List[Check], run_one: BudgetedRunner,
+            on_timeout: TimeoutResult) -> Dict[str, Dict[str, Any]]:
+        """
+        Execute checks, most expensive first, and return results keyed by control ID
+
+        Checks still running when their budget (plus a short grace period)
+        expires, checks whose runner raises BudgetExpired, and checks not
+        started before the deadline, are reported through on_timeout.
+        """
+        callables = dict(checks)
+        queue = self.costs.order(callables)
+        pending_cost = sum(self.costs.cost(control_id) for control_id in queue)
+        results: Dict[str, Dict[str, Any]] = {}
+        # control_id -> (budget deadline, budget, cost, token of the worker running it)
+        running: Dict[str, Tuple[float, float, float, object]] = {}
+        abandoned: Set[object] = set()
+        condition = threading.Condition()
+        state = {'pending_cost': pending_cost, 'done': False}
+
+        def worker(token: object) -> None:
+            while True:
+                with condition:
+                    now = time.monotonic()
+                    if state['done'] or token in abandoned or not queue or now >= self.deadline:
+                        return
+                    control_id = queue.pop(0)
+                    remaining = self.deadline - now
+                    cost = self.costs.cost(control_id)
+                    share = remaining * min(1.0, self.jobs * cost / max(state['pending_cost'], 1e-9))
+                    budget = min(remaining, max(share, MIN_CHECK_BUDGET))
+                    running[control_id] = (now + budget, budget, cost, token)
+
+                try:
+                    result: Optional[Dict[str, Any]] = run_one(control_id, callables[control_id], now + budget)
+                except BudgetExpired:
+                    result = None
+
+                with condition:
+                    # The check was abandoned or the run is over; a replacement
+                    # worker holds this slot, so the result is dropped
+                    if state['done'] or token in abandoned:
+                        return
+                    state['pending_cost'] -= cost
+                    running.pop(control_id, None)
+                    if result is None or time.monotonic() > now + budget:
+                        result = on_timeout(control_id, budget, 'exceeded its time budget')
+                    results[control_id] = result
+                    condition.notify_all()
+
+        def start_worker() -> None:
+            threading.Thread(target=worker, args=(object(),), name='cmmc-deadline', daemon=True).start()
+
+        for _ in range(min(self.jobs, len(queue))):
+            start_worker()
+
+        with condition:
+            try:
+                while len(results) < len(callables):
+                    now = time.monotonic()
+                    for control_id, (budget_deadline, budget, cost, token) in list(running.items()):
+                        if now >= budget_deadline + BUDGET_GRACE_SECONDS:
+                            # Abandon the stuck check; a fresh worker takes over its slot
+                            running.pop(control_id)
+                            abandoned.add(token)
+                            state['pending_cost'] -= cost
+                            results[control_id] = on_timeout(control_id, budget, 'exceeded its time budget')
+                            if queue:
+                                start_worker()
+                    if now >= self.deadline + BUDGET_GRACE_SECONDS:
+                        for control_id in queue:
+                            results[control_id] = on_timeout(control_id, 0.0, 'was not started before the run deadline')
+                        queue.clear()
+                        for control_id, (_, budget, _, _) in list(running.items()):
+                            results[control_id] = on_timeout(control_id, budget, 'exceeded its time budget')
+                        running.clear()
+                        break
+                    wake = [budget_deadline + BUDGET_GRACE_SECONDS for budget_deadline, _, _, _ in running.values()]
+                    wake.append(self.deadline + BUDGET_GRACE_SECONDS)
+                    condition.wait(max(0.01, min(wake) - now))
+            finally:
+                state['done'] = True
+
+        return {control_id: results[control_id] for control_id, _ in checks}
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Service State Provider
+Author: thndrchckn
+Purpose: Resolve systemd unit states for all controls with a single batched query
+
+Every control in cmmc_controls.yaml lists `services_affected`. Instead of forking
+`systemctl is-active` once per service, the provider collects every unit the enabled
+controls need, resolves them in one `systemctl show` call and serves later lookups
+from memory. Backends are pluggable so the provider can be exercised without systemd.
+"""
+
+import os
+import subprocess
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Unit states as reported by systemd's ActiveState property
+STATE_ACTIVE = 'active'
+STATE_UNKNOWN = 'unknown'
+# Offline images have no ActiveState; enabled units are started at boot
+STATE_ENABLED = 'enabled'
+STATE_DISABLED = 'disabled'
+STATE_MASKED = 'masked'
+STATE_NOT_FOUND = 'not-found'
+
+# Unit file search path, most specific first
+UNIT_DIRECTORIES = ('/etc/systemd/system', '/run/systemd/system', '/usr/lib/systemd/system',
+                    '/lib/systemd/system')
+
+CommandRunner = Callable[[Sequence[str]], Tuple[int, str, str]]
+
+
+def _run_argv(argv: Sequence[str]) -> Tuple[int, str, str]:
+    """Default command runner used when no probe layer is supplied"""
+    try:
+        result = subprocess.run(list(argv), capture_output=True, text=True, timeout=30)
+        return result.returncode, result.stdout, result.stderr
+    except Exception as e:
+        return 1, "", str(e)
+
+
+class SystemctlBackend:
+    """Query unit states with one `systemctl show` invocation per batch"""
+
+    PROPERTIES = 'Id,LoadState,ActiveState'
+
+    def __init__(self, run_command: Optional[CommandRunner] = None):
+        """
+        Args:
+            run_command: Callable executing an argument vector and returning
+                (return_code, stdout, stderr); defaults to a plain subprocess call
+        """
+        self.run_command = run_command or _run_argv
+
+    def query(self, units: List[str]) -> Dict[str, str]:
+        """
+        Resolve the ActiveState of each unit
+
+        `systemctl show` prints one property block per requested unit, separated by
+        blank lines and in argument order, so blocks are matched back to the
+        requested names positionally (the Id may be an alias target such as
+        ssh.service for sshd).
+        """
+        if not units:
+            return {}
+
+        argv = ['systemctl', 'show', '--no-pager', f'--property={self.PROPERTIES}', '--'] + list(units)
+        rc, stdout, stderr = self.run_command(argv)
+
+        blocks = self._parse_blocks(stdout)
+        if len(blocks) != len(units):
+            # Unexpected output (systemctl missing, no systemd as PID 1, ...)
+            return {unit: STATE_UNKNOWN for unit in units}
+
+        states = {}
+        for unit, properties in zip(units, blocks):
+            if properties.get('LoadState') == 'not-found':
+                states[unit] = 'not-found'
+            else:
+                states[unit] = properties.get('ActiveState') or STATE_UNKNOWN
+        return states
+
+    @staticmethod
+    def _parse_blocks(output: str) -> List[Dict[str, str]]:
+        """Split `systemctl show` output into per-unit property dictionaries"""
+        blocks: List[Dict[str, str]] = []
+        current: Dict[str, str] = {}
+        for line in output.splitlines():
+            if not line.strip():
+                if current:
+                    blocks.append(current)
+                    current = {}
+                continue
+            key, _, value = line.partition('=')
+            current[key.strip()] = value.strip()
+        if current:
+            blocks.append(current)
+        return blocks
+
+
+class StaticBackend:
+    """In-memory backend returning fixed states; unknown units are 'not-found'"""
+
+    def __init__(self, states: Dict[str, str]):
+        self.states = dict(states)
+        self.queries: List[List[str]] = []
+
+    def query(self, units: List[str]) -> Dict[str, str]:
+        self.queries.append(list(units))
+        return {unit: self.states.get(unit, 'not-found') for unit in units}
+
+
+class UnitFileBackend:
+    """
+    Resolve unit states from unit files in an offline image
+
+    A unit is 'masked' when /etc/systemd/system or /run/systemd/system links it
+    to /dev/null, 'enabled' when a target's .wants/ or .requires/ directory links
+    it (under its own name, or under the unit name an alias installed in
+    /etc/systemd/system points to), 'disabled' when only its unit file exists,
+    including units written to /etc/systemd/system that nothing links, and
+    'not-found' otherwise.
+    """
+
+    def __init__(self, probes):
+        """
+        Args:
+            probes: Probe layer rooted at the image (glob, exists, realpath)
+        """
+        self.probes = probes
+
+    def query(self, units: List[str]) -> Dict[str, str]:
+        return {unit: self._state(unit) for unit in units}
+
+    def _state(self, unit: str) -> str:
+        name = unit if '.' in unit else f'{unit}.service'
+        # A mask overrides everything, including leftover .wants/ links
+        if any(self.probes.realpath(f'{directory}/{name}') == '/dev/null' for directory in UNIT_DIRECTORIES[:2]):
+            return STATE_MASKED
+        # `systemctl enable` links an alias such as sshd.service to ssh.service,
+        # and the .wants/ link carries the name of the unit it points to
+        names = [name]
+        target = self.probes.realpath(f'/etc/systemd/system/{name}')
+        if os.path.basename(target) != name:
+            names.append(os.path.basename(target))
+        for directory in UNIT_DIRECTORIES:
+            for candidate in names:
+                for pattern in (f'{directory}/*.wants/{candidate}', f'{directory}/*.requires/{candidate}'):
+                    if self.probes.glob(pattern):
+                        return STATE_ENABLED
+        if any(self.probes.exists(f'{directory}/{name}') for directory in UNIT_DIRECTORIES):
+            return STATE_DISABLED
+        return STATE_NOT_FOUND
+
+
+class ServiceStateProvider:
+    """
+    Batched, memoized unit state lookups
+
+    Units registered up front are resolved together on the first lookup. Units
+    requested later without registration are resolved individually and cached.
+    """
+
+    def __init__(self, backend=None, units: Iterable[str] = ()):
+        """
+        Args:
+            backend: Object with a ``query(units) -> {unit: state}`` method;
+                defaults to SystemctlBackend
+            units: Units to resolve in the initial batch
+        """
+        self.backend = backend or SystemctlBackend()
+        self._pending: List[str] = []
+        self._states: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.register(units)
+
+    def register(self, units: Iterable[str]) -> None:
+        """Add units to the next batch query"""
+        with self._lock:
+            for unit in units:
+                if unit and unit not in self._states and unit not in self._pending:
+                    self._pending.append(unit)
+
+    def state(self, unit: str) -> str:
+        """Return the ActiveState of a unit ('active', 'inactive', 'failed', ...)"""
+        with self._lock:
+            if unit not in self._states:
+                batch = self._pending + ([unit] if unit not in self._pending else [])
+                self._pending = []
+                self._states.update(self.backend.query(batch))
+            return self._states.get(unit, STATE_UNKNOWN)
+
+    def is_active(self, unit: str) -> bool:
+        """True for units whose ActiveState is 'active' or that an offline image enables"""
+        return self.state(unit) in (STATE_ACTIVE, STATE_ENABLED)
+
+    def snapshot(self) -> Dict[str, str]:
+        """Return all unit states resolved so far"""
+        with self._lock:
+            return dict(sorted(self._states.items()))
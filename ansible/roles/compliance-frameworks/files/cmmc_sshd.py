@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator sshd_config Parser
+Author: thndrchckn
+Purpose: Build the effective OpenSSH server settings once per run for all SSH-based
+         controls
+
+Substring tests against the raw file match commented-out lines, ignore keyword case
+and first-value-wins semantics, and miss `Include`d drop-ins. This parser resolves
+Include directives, tracks Match blocks and builds a keyword index so lookups are
+O(1). Output of `sshd -T` can be used instead as the authoritative source.
+"""
+
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+SSHD_CONFIG_PATH = '/etc/ssh/sshd_config'
+SSHD_CONFIG_DIR = '/etc/ssh'
+
+# Paths whose changes can alter the effective configuration (used for fingerprints)
+SSHD_INPUTS = [SSHD_CONFIG_PATH, os.path.join(SSHD_CONFIG_DIR, 'sshd_config.d')]
+
+# OpenSSH defaults for keywords the controls evaluate when they are not configured
+SSHD_DEFAULTS = {
+    'passwordauthentication': 'yes',
+    'pubkeyauthentication': 'yes',
+    'permitemptypasswords': 'no',
+    'permitrootlogin': 'prohibit-password',
+    'banner': 'none',
+    'maxauthtries': '6',
+    'logingracetime': '120',
+}
+
+# Keywords whose values accumulate across lines instead of first-value-wins
+MULTI_VALUE_KEYWORDS = {
+    'acceptenv', 'allowgroups', 'allowusers', 'denygroups', 'denyusers',
+    'hostcertificate', 'hostkey', 'listenaddress', 'port', 'setenv', 'subsystem',
+}
+
+MAX_INCLUDE_DEPTH = 16
+
+_LINE = re.compile(r'^(\S+?)(?:\s*=\s*|\s+)(.*)$')
+
+
+class SshdConfig:
+    """Effective sshd settings with keyword index and Match block overrides"""
+
+    def __init__(self, source: str = 'file'):
+        """
+        Args:
+            source: 'file' for parsed configuration, 'sshd -T' for daemon output
+        """
+        self.source = source
+        self.settings: Dict[str, List[str]] = {}
+        self.locations: Dict[str, Tuple[str, int]] = {}
+        self.match_blocks: List[Tuple[str, Dict[str, List[str]]]] = []
+        self.files: List[str] = []
+        self.errors: List[str] = []
+
+    def get(self, keyword: str, default: Optional[str] = None) -> Optional[str]:
+        """
+        Return the effective global value of a keyword
+
+        Values from `Match all` blocks apply to every connection and take
+        precedence; otherwise the first global occurrence wins, then the OpenSSH
+        default. Multi-value keywords are returned space-joined.
+        """
+        keyword = keyword.lower()
+        for criteria, block in self.match_blocks:
+            if criteria.lower() == 'all' and keyword in block:
+                return ' '.join(block[keyword])
+        if keyword in self.settings:
+            return ' '.join(self.settings[keyword])
+        return SSHD_DEFAULTS.get(keyword, default)
+
+    def is_set(self, keyword: str) -> bool:
+        """True if the keyword is configured explicitly (globally or in Match all)"""
+        keyword = keyword.lower()
+        return keyword in self.settings or any(
+            criteria.lower() == 'all' and keyword in block for criteria, block in self.match_blocks)
+
+    def match_overrides(self, keyword: str) -> List[Tuple[str, str]]:
+        """Return (criteria, value) for every Match block that sets the keyword"""
+        keyword = keyword.lower()
+        return [(criteria, ' '.join(block[keyword]))
+                for criteria, block in self.match_blocks if keyword in block]
+
+    def _set(self, target: Dict[str, List[str]], keyword: str, value: str) -> bool:
+        """Store a value honoring first-value-wins; returns True if it was stored"""
+        if keyword in MULTI_VALUE_KEYWORDS:
+            target.setdefault(keyword, []).append(value)
+            return True
+        if keyword in target:
+            return False
+        target[keyword] = [value]
+        return True
+
+
+def _strip_quotes(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def parse_sshd_config(probes, path: str = SSHD_CONFIG_PATH) -> SshdConfig:
+    """
+    Parse an sshd_config file and everything it includes
+
+    Include patterns are globbed (relative patterns resolve against /etc/ssh) and
+    parsed in lexical order at the point of inclusion. A Match block lasts until
+    the next Match line or the end of the file it started in.
+
+    Args:
+        probes: ProbeCache used for file reads
+        path: Top-level configuration file
+
+    Raises:
+        OSError: The top-level file cannot be read
+    """
+    config = SshdConfig()
+    probes.read_text(path)  # surface a missing top-level file to the caller
+    _parse_file(probes, path, config, None, 0)
+    return config
+
+
+def _parse_file(probes, path: str, config: SshdConfig,
+                block: Optional[Dict[str, List[str]]], depth: int) -> None:
+    """Parse one file into the global settings or the enclosing Match block"""
+    if depth > MAX_INCLUDE_DEPTH:
+        config.errors.append(f"Include depth exceeded at {path}")
+        return
+    try:
+        content = probes.read_text(path)
+    except OSError as e:
+        config.errors.append(f"Cannot read {path}: {e.strerror or e}")
+        return
+    config.files.append(path)
+
+    current = block
+    for number, raw in enumerate(content.splitlines(), 1):
+        line = raw.strip()
+        if not line or line.startswith('#'):
+            continue
+        parsed = _LINE.match(line)
+        if not parsed:
+            config.errors.append(f"{path}:{number}: missing value for '{line}'")
+            continue
+        keyword, value = parsed.group(1).lower(), _strip_quotes(parsed.group(2))
+
+        if keyword == 'match':
+            current = {}
+            config.match_blocks.append((value, current))
+        elif keyword == 'include':
+            for pattern in value.split():
+                pattern = _strip_quotes(pattern)
+                if not os.path.isabs(pattern):
+                    pattern = os.path.join(SSHD_CONFIG_DIR, pattern)
+                for included in probes.glob(pattern):
+                    _parse_file(probes, included, config, current, depth + 1)
+        elif current is not None:
+            config._set(current, keyword, value)
+        elif config._set(config.settings, keyword, value):
+            config.locations.setdefault(keyword, (path, number))
+
+
+def parse_sshd_t(output: str) -> SshdConfig:
+    """
+    Build settings from `sshd -T` output
+
+    sshd prints the fully resolved global configuration, one lower-case keyword
+    per line, with multi-value keywords repeated.
+    """
+    config = SshdConfig(source='sshd -T')
+    for line in output.splitlines():
+        keyword, _, value = line.strip().partition(' ')
+        if keyword:
+            config._set(config.settings, keyword.lower(), value.strip())
+    return config
+
+
+def load_sshd_config(probes, path: str = SSHD_CONFIG_PATH, use_sshd_t: bool = False) -> SshdConfig:
+    """
+    Return the effective sshd configuration
+
+    With use_sshd_t, `sshd -T` is tried first and the file parser is the fallback
+    (sshd -T needs root and host keys).
+
+    Raises:
+        OSError: The configuration file cannot be read and sshd -T was not used
+            or failed
+    """
+    if use_sshd_t:
+        rc, stdout, stderr = probes.run_command(['sshd', '-T', '-f', path])
+        if rc == 0 and stdout.strip():
+            return parse_sshd_t(stdout)
+    return parse_sshd_config(probes, path)
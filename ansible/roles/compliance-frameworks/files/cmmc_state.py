@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Incremental State
+Author: thndrchckn
+Purpose: Persist per-control input fingerprints so unchanged controls can reuse their
+         previous result instead of re-running the check
+
+A control's fingerprint covers the files it reads (mtime, size, inode, mode, owner,
+group and optionally a content hash) and the state of the services it depends on. When the fingerprint of a
+control matches the one stored in the state directory, the stored result is reused.
+Log files a control only requires to exist are fingerprinted by their presence, since
+they change on almost every run. All file access goes through the probe layer, so
+fingerprints of an image (--root) or remote host describe that system.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import stat
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+STATE_FILE_NAME = 'control_fingerprints.json'
+STATE_FORMAT_VERSION = 1
+
+# Stored results older than this are re-evaluated even if inputs look unchanged,
+# which bounds drift that is not visible in files (e.g. rules loaded with auditctl)
+DEFAULT_MAX_REUSE_AGE = int(os.environ.get('CMMC_MAX_REUSE_AGE', '3600'))  # seconds
+
+_GLOB_CHARS = ('*', '?', '[')
+
+
+class ExistenceInput(str):
+    """Input path whose presence matters, not its metadata or content (e.g. a log file)"""
+
+
+def _file_digest(probes, path: str) -> Optional[str]:
+    """SHA-256 of a file's content read through the probe layer, or None if it cannot be read"""
+    try:
+        content = probes.read_text(path)
+    except (OSError, ValueError):
+        return None
+    return hashlib.sha256(content.encode('utf-8', 'surrogateescape')).hexdigest()
+
+
+def expand_paths(patterns: Iterable[str]) -> List[str]:
+    """Expand glob patterns; literal paths are kept even when missing"""
+    paths: List[str] = []
+    for pattern in patterns:
+        if any(char in pattern for char in _GLOB_CHARS):
+            paths.extend(sorted(glob.glob(pattern)))
+        else:
+            paths.append(pattern)
+    return paths
+
+
+class ControlStateStore:
+    """
+    Fingerprint store persisted as JSON in the CMMC state directory
+
+    The store is loaded once per run, updated as checks complete (thread-safe)
+    and written back atomically at the end of the run.
+    """
+
+    def __init__(self, state_path: Path, hash_contents: bool = False,
+                 max_reuse_age: int = DEFAULT_MAX_REUSE_AGE):
+        """
+        Args:
+            state_path: CMMC state directory
+            hash_contents: Include a SHA-256 of each input file in fingerprints
+            max_reuse_age: Maximum age in seconds of a result that may be reused
+        """
+        self.state_file = Path(state_path) / STATE_FILE_NAME
+        self.hash_contents = hash_contents
+        self.max_reuse_age = max_reuse_age
+        self._lock = threading.Lock()
+        self._previous = self._load()
+        self._current: Dict[str, Dict[str, Any]] = {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load stored fingerprints; a missing or unreadable file means a cold start"""
+        try:
+            with open(self.state_file, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != STATE_FORMAT_VERSION:
+            return {}
+        return data.get('controls', {})
+
+    def fingerprint(self, probes, services, files: Iterable[str],
+                    units: Iterable[str], salt: str = '') -> str:
+        """
+        Compute a control's input fingerprint
+
+        Args:
+            probes: ProbeCache used for stat calls
+            services: ServiceStateProvider used for unit states
+            files: Paths or glob patterns the control depends on; directories
+                contribute their direct entries, ExistenceInput paths only
+                whether they exist
+            units: Services the control depends on
+            salt: Extra identity mixed into the fingerprint (e.g. validator version)
+        """
+        inputs: List[Any] = [salt]
+        for pattern in files:
+            if isinstance(pattern, ExistenceInput):
+                inputs.append([pattern, self._stat(probes, pattern) is not None])
+                continue
+            # Glob matches come from the probe layer's scan, which the checks share
+            if any(char in pattern for char in _GLOB_CHARS):
+                matches = probes.scan(pattern)
+            else:
+                matches = [(pattern, self._stat(probes, pattern))]
+            for path, st in matches:
+                inputs.append(self._path_fingerprint(probes, path, st))
+                try:
+                    entries = probes.listdir(path)
+                except OSError:
+                    continue
+                for name in entries:
+                    child = os.path.join(path, name)
+                    inputs.append(self._path_fingerprint(probes, child, self._stat(probes, child)))
+        for unit in units:
+            inputs.append([unit, services.state(unit)])
+
+        encoded = json.dumps(inputs, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    @staticmethod
+    def _stat(probes, path: str) -> Optional[os.stat_result]:
+        try:
+            return probes.stat(path)
+        except OSError:
+            return None
+
+    def _path_fingerprint(self, probes, path: str, st: Optional[os.stat_result]) -> List[Any]:
+        """Identity of one path: [path, mtime_ns, size, inode, mode, uid, gid(, sha256)] or [path, None]"""
+        if st is None:
+            return [path, None]
+        # chmod/chown leave mtime alone, and file_mode checks depend on them
+        entry = [path, st.st_mtime_ns, st.st_size, st.st_ino, st.st_mode, st.st_uid, st.st_gid]
+        if self.hash_contents and stat.S_ISREG(st.st_mode):
+            entry.append(_file_digest(probes, path))
+        return entry
+
+    def reusable(self, control_id: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return the stored result if its fingerprint matches and it is recent enough"""
+        stored = self._previous.get(control_id)
+        if not stored or stored.get('fingerprint') != fingerprint:
+            return None
+        if time.time() - stored.get('evaluated_at', 0) > self.max_reuse_age:
+            return None
+        return stored.get('result')
+
+    def record(self, control_id: str, fingerprint: str, result: Dict[str, Any],
+               evaluated_at: float) -> None:
+        """Remember the fingerprint and result of a control for the next run"""
+        with self._lock:
+            self._current[control_id] = {
+                'fingerprint': fingerprint,
+                'evaluated_at': evaluated_at,
+                'result': result,
+            }
+
+    def evaluated_at(self, control_id: str) -> Optional[float]:
+        """Return when a stored result was originally evaluated"""
+        stored = self._previous.get(control_id)
+        return stored.get('evaluated_at') if stored else None
+
+    def stored_result(self, control_id: str) -> Optional[Dict[str, Any]]:
+        """Return the stored result of a control regardless of its inputs and age"""
+        stored = self._previous.get(control_id)
+        return stored.get('result') if stored else None
+
+    def save(self) -> None:
+        """Write the store atomically; controls not seen this run are kept"""
+        with self._lock:
+            controls = dict(self._previous)
+            controls.update(self._current)
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_name(self.state_file.name + '.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump({'version': STATE_FORMAT_VERSION, 'controls': controls}, f)
+        os.replace(tmp_file, self.state_file)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Instrumentation
+Author: thndrchckn
+Purpose: Record wall-clock and CPU time of checks, commands and file reads
+
+Spans are aggregated per (category, name) into count, total and maximum times, and
+reported in the `timings` section of the results. When instrumentation is disabled
+span() returns a shared no-op context manager, so instrumented code paths cost one
+attribute lookup and call.
+
+Usage from a check:
+
+    with timings.span('probe', 'parse-login-defs'):
+        ...
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+
+class _NullSpan:
+    """No-op context manager returned while instrumentation is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _SpanStats:
+    __slots__ = ('count', 'wall', 'cpu', 'wall_max')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.wall_max = 0.0
+
+
+class Timings:
+    """Thread-safe span recorder"""
+
+    def __init__(self, enabled: bool = False):
+        """
+        Args:
+            enabled: Record spans; when False every span is a no-op
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._spans: Dict[Tuple[str, str], _SpanStats] = {}
+
+    def span(self, category: str, name: str):
+        """
+        Context manager timing the enclosed block
+
+        CPU time is measured per thread (time.thread_time), so concurrently
+        running checks do not inflate each other's CPU figures.
+
+        Args:
+            category: Span group in the report, e.g. 'validate', 'command', 'read'
+            name: Span name within the category, e.g. a control ID or a path
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._record(category, name)
+
+    @contextmanager
+    def _record(self, category: str, name: str) -> Iterator[None]:
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_started
+            cpu = time.thread_time() - cpu_started
+            with self._lock:
+                stats = self._spans.get((category, name))
+                if stats is None:
+                    stats = self._spans[(category, name)] = _SpanStats()
+                stats.count += 1
+                stats.wall += wall
+                stats.cpu += cpu
+                stats.wall_max = max(stats.wall_max, wall)
+
+    def timed(self, category: str, name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decorator form of span()"""
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.span(category, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def report(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Return aggregated spans grouped by category, slowest first
+
+        Returns:
+            {category: {name: {'count', 'wall_seconds', 'cpu_seconds', 'max_wall_seconds'}}}
+        """
+        with self._lock:
+            spans = sorted(self._spans.items(), key=lambda item: item[1].wall, reverse=True)
+        report: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (category, name), stats in spans:
+            report.setdefault(category, {})[name] = {
+                'count': stats.count,
+                'wall_seconds': round(stats.wall, 6),
+                'cpu_seconds': round(stats.cpu, 6),
+                'max_wall_seconds': round(stats.wall_max, 6),
+            }
+        return report
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+CMMC Validator Watch Mode
+Author: thndrchckn
+Purpose: Re-validate only the controls whose input files changed, as they change
+
+Between scheduled runs drift goes unnoticed. Watch mode subscribes to inotify events
+on the directories holding each control's inputs (files_affected and the paths its
+check reads), debounces bursts such as package upgrades, and re-runs only the mapped
+controls. Where inotify is unavailable (non-Linux, exhausted watch limits) the same
+loop is driven by periodic stat polling. Glob inputs such as
+/home/*/.ssh/authorized_keys are re-expanded whenever something changes below their
+static prefix, so directories created later (a new .ssh directory) are watched too.
+"""
+
+import ctypes
+import ctypes.util
+import fnmatch
+import glob
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from cmmc_state import expand_paths
+
+# Quiet period that ends a burst of events before controls are re-run
+DEFAULT_DEBOUNCE_SECONDS = float(os.environ.get('CMMC_WATCH_DEBOUNCE', '1.0'))
+# Stat interval of the polling fallback
+DEFAULT_POLL_INTERVAL = float(os.environ.get('CMMC_WATCH_POLL_INTERVAL', '5'))
+# Full re-validation interval; catches drift that is not visible in files
+DEFAULT_FULL_INTERVAL = float(os.environ.get('CMMC_WATCH_FULL_INTERVAL', '3600'))
+
+# Inputs below these prefixes are appended to continuously (or written by the
+# validator itself) and are left to the periodic full re-validation
+DEFAULT_EXCLUDED_PREFIXES = ('/var/log/',)
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT = struct.Struct('iIII')
+_GLOB_CHARS = ('*', '?', '[')
+
+logger = logging.getLogger(__name__)
+
+
+def _static_prefix(pattern: str) -> str:
+    """Longest leading directory of a glob pattern without glob characters"""
+    parts = []
+    for part in pattern.split(os.sep):
+        if any(char in part for char in _GLOB_CHARS):
+            break
+        parts.append(part)
+    return os.sep.join(parts) or os.sep
+
+
+def _glob_levels(pattern: str) -> List[str]:
+    """
+    Existing directories matching each level of a glob below its static prefix
+
+    For /home/*/.ssh/authorized_keys these are the matches of /home/* and
+    /home/*/.ssh; the last component is left to the caller.
+    """
+    parts = pattern.split(os.sep)
+    first = len(_static_prefix(pattern).split(os.sep)) + 1
+    directories = []
+    for end in range(first, len(parts)):
+        directories.extend(path for path in sorted(glob.glob(os.sep.join(parts[:end])))
+                           if os.path.isdir(path))
+    return directories
+
+
+class ControlPathMap:
+    """Map changed paths back to the controls that depend on them"""
+
+    def __init__(self, inputs: Dict[str, Iterable[str]],
+                 exclude: Iterable[str] = DEFAULT_EXCLUDED_PREFIXES):
+        """
+        Args:
+            inputs: Paths or glob patterns per control ID
+            exclude: Path prefixes that are never watched
+        """
+        exclude = tuple(prefix.rstrip(os.sep) + os.sep for prefix in exclude)
+        self.inputs = {control_id: [path for path in paths
+                                    if not (path + os.sep).startswith(exclude)]
+                       for control_id, paths in inputs.items()}
+
+    def directories(self) -> List[str]:
+        """
+        Directories to watch
+
+        Files are watched through their parent directory so atomic replacements
+        (write to a temporary file, then rename) are seen; directories are also
+        watched themselves so changes to their entries are seen. Globs are watched
+        at their static prefix and at every directory level they currently match,
+        so newly matching paths trigger a re-run; call again after
+        touches_glob() to pick up directories created since.
+        """
+        directories: Dict[str, None] = {}
+        for patterns in self.inputs.values():
+            for pattern in patterns:
+                if any(char in pattern for char in _GLOB_CHARS):
+                    directories[_static_prefix(pattern)] = None
+                    directories.update(dict.fromkeys(_glob_levels(pattern)))
+                for path in expand_paths([pattern]):
+                    directories[os.path.dirname(path) or os.sep] = None
+                    if os.path.isdir(path):
+                        directories[path] = None
+        return [directory for directory in directories if os.path.isdir(directory)]
+
+    def affected(self, paths: Iterable[str]) -> List[str]:
+        """Return control IDs whose inputs include any of the changed paths"""
+        paths = set(paths)
+        affected = []
+        for control_id, patterns in self.inputs.items():
+            for pattern in patterns:
+                if any(self._matches(pattern, path) for path in paths):
+                    affected.append(control_id)
+                    break
+        return affected
+
+    def touches_glob(self, paths: Iterable[str]) -> bool:
+        """True if any changed path lies below the static prefix of a glob input"""
+        prefixes = {_static_prefix(pattern).rstrip(os.sep) + os.sep
+                    for patterns in self.inputs.values() for pattern in patterns
+                    if any(char in pattern for char in _GLOB_CHARS)}
+        return any((path + os.sep).startswith(prefix) for path in paths for prefix in prefixes)
+
+    @staticmethod
+    def _matches(pattern: str, path: str) -> bool:
+        if any(char in pattern for char in _GLOB_CHARS):
+            prefix = _static_prefix(pattern).rstrip(os.sep) + os.sep
+            return fnmatch.fnmatch(path, pattern) or path.startswith(prefix)
+        pattern = pattern.rstrip(os.sep)
+        # A changed ancestor (directory replaced or moved) affects everything below it
+        return (path == pattern or path.startswith(pattern + os.sep)
+                or pattern.startswith(path.rstrip(os.sep) + os.sep))
+
+
+class InotifyWatcher:
+    """Directory watcher backed by inotify(7) through libc"""
+
+    def __init__(self, directories: Iterable[str]):
+        """
+        Raises:
+            OSError: inotify is unavailable or no directory could be watched
+        """
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError('inotify is not available on this platform')
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._directories = list(directories)
+        self._watches: Dict[int, str] = {}
+        self.refresh()
+        if not self._watches:
+            self.close()
+            raise OSError('no directory could be watched')
+
+    def update(self, directories: Iterable[str]) -> None:
+        """Watch exactly these directories from now on"""
+        self._directories = list(directories)
+        wanted = set(self._directories)
+        for wd, directory in list(self._watches.items()):
+            if directory not in wanted:
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._watches[wd]
+        self.refresh()
+
+    def refresh(self) -> None:
+        """(Re)add watches for directories that are not currently watched"""
+        watched = set(self._watches.values())
+        for directory in self._directories:
+            if directory in watched:
+                continue
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if wd >= 0:
+                self._watches[wd] = directory
+            else:
+                errno = ctypes.get_errno()
+                logger.debug(f"Cannot watch {directory}: {os.strerror(errno)}")
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Return paths changed within timeout seconds (empty if none)"""
+        ready, _, _ = select.select([self._fd], [], [], max(0.0, timeout))
+        if not ready:
+            return set()
+        changed: Set[str] = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+            offset += _EVENT.size + length
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                # Watched directory was removed or replaced; re-added on refresh
+                del self._watches[wd]
+                changed.add(directory)
+                continue
+            changed.add(os.path.join(directory, os.fsdecode(name)) if name else directory)
+        if len(self._watches) < len(self._directories):
+            self.refresh()
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """Fallback watcher comparing stat snapshots of the watched directories"""
+
+    def __init__(self, directories: Iterable[str], interval: float = DEFAULT_POLL_INTERVAL):
+        self._directories = list(directories)
+        self.interval = interval
+        self._snapshot = self._scan(self._directories)
+
+    def update(self, directories: Iterable[str]) -> None:
+        """Watch exactly these directories from now on"""
+        added = [directory for directory in directories if directory not in self._directories]
+        self._directories = list(directories)
+        # Entries of added directories are the baseline of the next scan
+        self._snapshot.update(self._scan(added))
+
+    def _scan(self, directories: Iterable[str]) -> Dict[str, tuple]:
+        snapshot = {}
+        for directory in directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        snapshot[entry.path] = (st.st_mtime_ns, st.st_size, st.st_ino, st.st_mode,
+                                                st.st_uid, st.st_gid)
+            except OSError:
+                continue
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Return paths whose stat identity changed since the previous scan"""
+        time.sleep(max(0.0, min(timeout, self.interval)))
+        current = self._scan(self._directories)
+        changed = {path for path in current.keys() | self._snapshot.keys()
+                   if current.get(path) != self._snapshot.get(path)}
+        self._snapshot = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+def open_watcher(directories: List[str], poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 force_polling: bool = False):
+    """Return an inotify watcher, or a polling watcher when inotify is unavailable"""
+    if not force_polling:
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable ({e}); polling every {poll_interval:g}s")
+    return PollingWatcher(directories, poll_interval)
+
+
+def watch(path_map: ControlPathMap, revalidate: Callable[[Optional[List[str]]], None],
+          debounce: float = DEFAULT_DEBOUNCE_SECONDS, poll_interval: float = DEFAULT_POLL_INTERVAL,
+          full_interval: float = DEFAULT_FULL_INTERVAL, force_polling: bool = False,
+          stop: Optional[threading.Event] = None) -> None:
+    """
+    Re-validate affected controls whenever their inputs change
+
+    Args:
+        path_map: Control to input path mapping
+        revalidate: Called with the affected control IDs, or None for a full run
+        debounce: Seconds without further events that end a burst
+        poll_interval: Scan interval of the polling fallback
+        full_interval: Seconds between full re-validations (0 disables)
+        force_polling: Skip inotify
+        stop: Event that ends the loop (runs until interrupted otherwise)
+    """
+    stop = stop or threading.Event()
+    directories = path_map.directories()
+    watcher = open_watcher(directories, poll_interval, force_polling)
+    logger.info(f"Watching {len(directories)} directories for "
+                f"{len(path_map.inputs)} controls ({type(watcher).__name__})")
+
+    def wait(timeout: float) -> Set[str]:
+        changed = watcher.wait(timeout)
+        # New directories below a glob (a user's new .ssh) must be watched before
+        # the files in them change
+        if changed and path_map.touches_glob(changed):
+            watcher.update(path_map.directories())
+        return changed
+
+    next_full = time.monotonic() + full_interval if full_interval > 0 else None
+    try:
+        while not stop.is_set():
+            timeout = 1.0 if next_full is None else min(1.0, next_full - time.monotonic())
+            changed = wait(timeout)
+
+            if changed:
+                # Collect the rest of the burst, bounded so a constantly
+                # changing file cannot postpone re-validation forever
+                deadline = time.monotonic() + debounce * 5
+                while time.monotonic() < deadline:
+                    more = wait(debounce)
+                    if not more:
+                        break
+                    changed |= more
+                control_ids = path_map.affected(changed)
+                if control_ids:
+                    logger.info(f"Change detected in {len(changed)} path(s); "
+                                f"re-validating {', '.join(control_ids)}")
+                    revalidate(control_ids)
+
+            if next_full is not None and time.monotonic() >= next_full:
+                logger.info("Periodic full re-validation")
+                revalidate(None)
+                next_full = time.monotonic() + full_interval
+    finally:
+        watcher.close()
@@ -11,18 +11,57 @@ and ongoing compliance monitoring without MSP dependency.
 import os
 import sys
 import json
-import yaml
-import subprocess
 import logging
 import argparse
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Callable, Iterable, Tuple, Sequence, Union
+
+from cmmc_auditlog import AUDIT_LOG_PATH, AuditLogAnalyzer
+from cmmc_checks import CheckContext, CheckPlan, framework_control_id, load_compiled_catalog
+from cmmc_logging import configure_logging
+from cmmc_metrics import histogram, render_prometheus, write_textfile
+from cmmc_packages import PackageIndex, load_package_index
+from cmmc_probes import ProbeCache, find_sudoers_defaults, get_hostname
+from cmmc_report import ControlResult, dumps, write_report, write_stream
+from cmmc_scheduler import BudgetExpired, CostStore, DeadlineScheduler, TieredSchedule, parse_duration
+from cmmc_services import ServiceStateProvider, SystemctlBackend, UnitFileBackend
+from cmmc_sshd import SSHD_CONFIG_PATH, SSHD_INPUTS, SshdConfig, load_sshd_config
+from cmmc_state import ControlStateStore, ExistenceInput
+from cmmc_timing import Timings
+
+# asyncio (fleet), sqlite3 (history), ctypes (watch), cProfile and the offline probes
+# (--root) are imported where they are used; together they would double the cold
+# start of a plain run
+if TYPE_CHECKING:
+    from cmmc_history import ReportHistory
 
 # Configuration paths - using variables for flexibility
 DEFAULT_CONFIG_PATH = os.environ.get('CMMC_CONFIG_DIR', '/etc/cmmc')
 DEFAULT_LOG_PATH = os.environ.get('CMMC_LOG_DIR', '/var/log/cmmc')
 DEFAULT_STATE_PATH = os.environ.get('CMMC_STATE_DIR', '/var/lib/cmmc')
+DEFAULT_JOBS = int(os.environ.get('CMMC_JOBS', '4'))
+# Individual JSON reports kept next to the history database for existing consumers
+REPORT_FILES_KEPT = int(os.environ.get('CMMC_REPORT_FILES_KEPT', '10'))
+# Median cold start (interpreter, imports, catalog load) allowed by --startup-benchmark
+STARTUP_BUDGET_MS = float(os.environ.get('CMMC_STARTUP_BUDGET_MS', '300'))
+# node_exporter textfile collector directory; metrics are not published when unset
+DEFAULT_TEXTFILE_DIR = os.environ.get('CMMC_TEXTFILE_DIR') or None
+
+# A check is a (control_id, callable) pair; callables return a control result dict
+Check = Tuple[str, Callable[[], Dict[str, Any]]]
+
+# Files and services read by the hand-written checks, in addition to the catalog's
+# files_affected/services_affected; together they form a control's fingerprint inputs
+CHECK_INPUTS = {
+    'AC.1.001': (SSHD_INPUTS, ['sshd']),
+    'AC.1.002': (['/etc/sudoers', '/etc/sudoers.d', ExistenceInput('/var/log/sudo.log')], []),
+    'AC.1.003': (['/etc/issue', '/etc/issue.net'] + SSHD_INPUTS, []),
+    'AU.1.006': (['/etc/audit/audit.rules', '/etc/audit/rules.d', ExistenceInput(AUDIT_LOG_PATH)], ['auditd']),
+    'AU.1.012': (['/etc/audit/audit.rules', '/etc/audit/rules.d', '/etc/logrotate.d/audit'], ['auditd']),
+}
 
 class CMICComplianceValidator:
     """
@@ -39,7 +78,22 @@ class CMICComplianceValidator:
     
     def __init__(self, config_path: str = DEFAULT_CONFIG_PATH, 
                  log_path: str = DEFAULT_LOG_PATH,
-                 state_path: str = DEFAULT_STATE_PATH):
+                 state_path: str = DEFAULT_STATE_PATH,
+                 jobs: int = DEFAULT_JOBS,
+                 service_backend: Optional[Any] = None,
+                 incremental: bool = True,
+                 hash_inputs: bool = False,
+                 use_sshd_t: bool = False,
+                 textfile_dir: Optional[str] = DEFAULT_TEXTFILE_DIR,
+                 instrument: bool = False,
+                 probes_factory: Optional[Callable[[Timings], ProbeCache]] = None,
+                 persist: bool = True,
+                 deadline: Optional[float] = None,
+                 root: Optional[str] = None,
+                 frameworks: Optional[Sequence[str]] = None,
+                 pretty: bool = False,
+                 tiered: bool = False,
+                 cpu_budget: Optional[float] = None):
         """
         Initialize validator with configurable paths
         
@@ -47,10 +101,57 @@ class CMICComplianceValidator:
             config_path: Path to CMMC configuration directory
             log_path: Path to CMMC log directory  
             state_path: Path to CMMC state directory
+            jobs: Maximum number of checks executed concurrently
+            service_backend: Unit state backend (defaults to batched systemctl)
+            incremental: Reuse stored results of controls whose inputs are unchanged
+            hash_inputs: Include file content hashes in input fingerprints
+            use_sshd_t: Prefer `sshd -T` output over parsing sshd_config
+            textfile_dir: Publish Prometheus metrics to this textfile collector directory
+            instrument: Record wall/CPU time of checks, commands and file reads
+            probes_factory: Creates the run's probe layer (fleet mode probes a
+                remote host); defaults to local probes
+            persist: Save reports, history, state and metrics after each run
+            deadline: Seconds within which every check must finish; overrunning
+                checks are reported as TIMEOUT
+            root: Validate the filesystem tree below this directory (an unpacked
+                image) instead of the running system
+            frameworks: Also validate these frameworks declared in the catalog
+                (e.g. soc2, hipaa; 'all' for every one); they share probes and
+                shared checks with the CMMC controls
+            pretty: Indent saved reports (compact by default)
+            tiered: Evaluate only the controls whose stored results are older than
+                their maximum staleness; the others report their stored result
+            cpu_budget: Seconds of check time a tiered run may spend (implies tiered)
         """
         self.config_path = Path(config_path)
         self.log_path = Path(log_path)
         self.state_path = Path(state_path)
+        self.jobs = max(1, jobs)
+        self.service_backend = service_backend
+        self.incremental = incremental
+        self.hash_inputs = hash_inputs
+        self.use_sshd_t = use_sshd_t
+        self.textfile_dir = textfile_dir
+        self.instrument = instrument
+        self.probes_factory = probes_factory
+        self.persist = persist
+        self.deadline = deadline
+        self.root = root
+        self.pretty = pretty
+        self.tiered = tiered or cpu_budget is not None
+        self.cpu_budget = cpu_budget
+        if root is not None:
+            from cmmc_offline import RootedProbeCache
+            
+            # Stored fingerprints describe the running system, and sshd -T
+            # would report the host's daemon rather than the image's
+            self.incremental = False
+            self.use_sshd_t = False
+            self.probes_factory = lambda timings: RootedProbeCache(root, timings=timings)
+        self.costs = CostStore(self.state_path)
+        self._run_started: Optional[float] = None
+        self.report_file: Optional[Path] = None
+        self.state_store: Optional[ControlStateStore] = None
         
         # Validation results storage
         self.results = {
@@ -69,35 +170,52 @@ class CMICComplianceValidator:
         # Setup logging with configurable path
         self._setup_logging()
         
-        # Load control definitions
+        # Load control definitions and compile their declarative checks
         self.control_definitions = self._load_control_definitions()
+        self.check_plan = CheckPlan(self.control_definitions)
+        self.frameworks = self._select_frameworks(frameworks or [])
+        if self.frameworks:
+            self.results['frameworks'] = {}
+        
+        # Memoized system probes; replaced at the start of every run
+        self._reset_probes()
+        if root is not None:
+            from cmmc_offline import image_hostname
+            
+            self.results['hostname'] = image_hostname(self.probes)
+            self.results['root'] = self.probes.root
+    
+    def _select_frameworks(self, names: Sequence[str]) -> List[str]:
+        """Resolve requested framework names against the catalog, in catalog order"""
+        declared = list(self.check_plan.frameworks)
+        requested = set(declared) if 'all' in names else set(names) - {'cmmc'}
+        for name in sorted(requested - set(declared)):
+            self.logger.warning(f"Framework {name} is not declared in the catalog")
+        return [name for name in declared if name in requested]
     
     def _setup_logging(self) -> None:
-        """Setup logging configuration with flexible log path"""
-        # Create log directory if it doesn't exist
-        self.log_path.mkdir(parents=True, exist_ok=True)
-        
-        log_file = self.log_path / 'compliance_validation.log'
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
+        """
+        Setup logging configuration with flexible log path
+        
+        The log directory and file are only created when the first record is
+        written, so starting the validator touches no files. Records are written
+        by a background thread (see cmmc_logging); console output goes to stderr
+        so it never mixes with reports on stdout.
+        """
+        configure_logging(self.log_path)
         self.logger = logging.getLogger(__name__)
     
     def _get_hostname(self) -> str:
         """Get system hostname"""
-        try:
-            return subprocess.getoutput('hostname').strip()
-        except Exception:
-            return 'unknown'
+        return get_hostname()
     
     def _load_control_definitions(self) -> Dict[str, Any]:
-        """Load CMMC control definitions from configuration file"""
+        """
+        Load CMMC control definitions from configuration file
+        
+        The catalog is compiled once and cached in the state directory keyed by
+        the YAML's hash, so unchanged catalogs are not re-parsed on every run.
+        """
         control_file = self.config_path / 'cmmc_controls.yaml'
         
         if not control_file.exists():
@@ -105,54 +223,390 @@ class CMICComplianceValidator:
             return {}
         
         try:
-            with open(control_file, 'r') as f:
-                return yaml.safe_load(f)
+            return load_compiled_catalog(control_file, self.state_path)
         except Exception as e:
             self.logger.error(f"Failed to load control definitions: {e}")
             return {}
     
-    def _run_command(self, command: str) -> tuple[int, str, str]:
+    def _run_command(self, argv: Union[Sequence[str], str]) -> tuple[int, str, str]:
         """
         Execute system command and return results
         
+        Commands run without a shell and identical commands are executed only
+        once per validation run. Prefer the in-process probes where one exists.
+        
         Args:
-            command: Command to execute
+            argv: Argument vector of the command to execute
             
         Returns:
             Tuple of (return_code, stdout, stderr)
         """
-        try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            return result.returncode, result.stdout, result.stderr
-        except subprocess.TimeoutExpired:
-            return 1, "", "Command timeout"
-        except Exception as e:
-            return 1, "", str(e)
+        return self.probes.run_command(argv)
+    
+    def _read_file(self, file_path: str) -> str:
+        """Read file content through the run-scoped probe cache"""
+        return self.probes.read_text(file_path)
+    
+    def _run_scoped(self, name: str, loader: Callable[[], Any]) -> Any:
+        """
+        Compute a derived value at most once per run and share it between checks
+        
+        Exceptions raised by the loader are cached and re-raised to every caller.
+        A value computed while the calling check's deadline killed a probe is
+        not cached; the next caller computes it again.
+        """
+        with self._derived_lock:
+            if name in self._derived:
+                value, error = self._derived[name]
+            else:
+                try:
+                    value, error = loader(), None
+                except Exception as e:
+                    value, error = None, e
+                if not self.probes.deadline_expired():
+                    self._derived[name] = (value, error)
+        if error is not None:
+            raise error
+        return value
+    
+    def _sshd_config(self) -> SshdConfig:
+        """
+        Return the effective sshd configuration, parsed once per run
+        
+        Shared by every SSH-based control. Raises OSError if sshd_config cannot
+        be read (and sshd -T is not in use).
+        """
+        return self._run_scoped(
+            'sshd_config', lambda: load_sshd_config(self.probes, SSHD_CONFIG_PATH, self.use_sshd_t))
+    
+    def _package_index(self) -> PackageIndex:
+        """
+        Return the installed package index, built once per run
+        
+        The index is persisted in the state directory only when it describes
+        this machine; remote hosts and images rebuild it every run.
+        """
+        return self._run_scoped(
+            'packages', lambda: load_package_index(self.probes, self.state_path if self.probes.local else None))
+    
+    def _audit_log_analysis(self) -> Dict[str, Any]:
+        """Analyze audit records written since the previous run (once per run)"""
+        return self._run_scoped(
+            'audit_log',
+            lambda: AuditLogAnalyzer(self.state_path, self.probes.host_path(AUDIT_LOG_PATH)).analyze(self.persist))
     
     def _check_file_exists(self, file_path: str) -> bool:
         """Check if file exists at specified path"""
-        return Path(file_path).exists()
+        return self.probes.exists(file_path)
     
     def _check_service_status(self, service_name: str) -> bool:
         """Check if systemd service is active"""
-        rc, stdout, stderr = self._run_command(f'systemctl is-active {service_name}')
-        return rc == 0 and 'active' in stdout
+        return self.services.is_active(service_name)
+    
+    def _reset_probes(self) -> None:
+        """Create fresh run-scoped probe and service state caches"""
+        self.timings = Timings(enabled=self.instrument)
+        if self.probes_factory is not None:
+            self.probes = self.probes_factory(self.timings)
+        else:
+            self.probes = ProbeCache(timings=self.timings)
+        self._derived_lock = threading.Lock()
+        self._derived: Dict[str, Tuple[Any, Optional[Exception]]] = {}
+        self._control_durations: Dict[str, float] = {}
+        self._evaluated_at: Dict[str, float] = {}
+        backend = self.service_backend
+        if backend is None:
+            # Offline images have no service manager to ask; read their unit files
+            backend = UnitFileBackend(self.probes) if self.root is not None else SystemctlBackend(self._run_command)
+        self.services = ServiceStateProvider(backend, self._required_services())
+        self.check_context = CheckContext(self.probes, self.services, self._sshd_config, self._package_index,
+                                          self.check_plan.shared_checks)
+    
+    def _required_services(self) -> List[str]:
+        """
+        Collect every unit the implemented controls need
+        
+        Combines the catalog's services_affected for each implemented control with
+        the units the hand-written and declarative checks query, so all of them are
+        resolved in a single batch.
+        """
+        catalog = (self.control_definitions or {}).get('controls', {}) or {}
+        units = ['sshd', 'auditd'] + self.check_plan.services
+        for checks in self._family_checks().values():
+            for control_id, _ in checks:
+                for unit in catalog.get(control_id, {}).get('services_affected', []) or []:
+                    if unit not in units:
+                        units.append(unit)
+        return units
     
     def _check_file_permissions(self, file_path: str, expected_mode: str) -> bool:
         """Check if file has expected permissions"""
         try:
-            file_stat = os.stat(file_path)
-            actual_mode = oct(file_stat.st_mode)[-3:]
-            return actual_mode == expected_mode
+            file_stat = self.probes.stat(file_path)
+            return file_stat.st_mode & 0o7777 == int(expected_mode, 8)
         except Exception:
             return False
     
+    def _family_checks(self) -> Dict[str, List[Check]]:
+        """
+        Build the ordered check list for every implemented control family
+        
+        The order here defines the order of controls in the report, regardless
+        of the order in which concurrently executed checks complete.
+        """
+        ssh_config_path = SSHD_CONFIG_PATH
+        sudoers_path = '/etc/sudoers.d/10-cmmc-restrictions'
+        
+        family_checks: Dict[str, List[Check]] = {
+            'ac': [
+                ('AC.1.001', lambda: self._validate_ssh_config(ssh_config_path)),
+                ('AC.1.002', lambda: self._validate_sudo_config(sudoers_path)),
+                ('AC.1.003', self._validate_system_disclosure),
+            ],
+            'au': [
+                ('AU.1.006', self._validate_audit_configuration),
+                ('AU.1.012', self._validate_audit_capability),
+            ],
+        }
+        
+        # Controls declaring checks in the catalog; hand-written checks take precedence
+        implemented = {control_id for checks in family_checks.values() for control_id, _ in checks}
+        for control_id, control in self.check_plan.controls.items():
+            if control_id in implemented:
+                continue
+            family = control.get('family', control_id.split('.')[0]).lower()
+            family_checks.setdefault(family, []).append(
+                (control_id, lambda control_id=control_id: self.check_plan.evaluate(control_id, self.check_context)))
+        
+        return family_checks
+    
+    def _framework_checks(self) -> Dict[str, List[Check]]:
+        """
+        Build the ordered check list of every selected non-CMMC framework
+        
+        Control IDs are qualified with the framework (soc2:CC6.1) so costs,
+        state and timings never collide with CMMC controls.
+        """
+        return {
+            framework: [(framework_control_id(framework, control_id),
+                         lambda control_id=framework_control_id(framework, control_id):
+                             self.check_plan.evaluate(control_id, self.check_context))
+                        for control_id in self.check_plan.framework_controls[framework]]
+            for framework in self.frameworks
+        }
+    
+    def _run_check(self, control_id: str, check: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Run a single check, converting unexpected exceptions into an ERROR result
+        
+        In incremental mode the stored result is reused when the control's input
+        fingerprint is unchanged. Every result is marked 'fresh' or 'reused'.
+        Tiered runs only execute controls that are due, so they never reuse.
+        """
+        fingerprint = None
+        if self.state_store is not None:
+            files, units = self._control_inputs(control_id)
+            with self.timings.span('fingerprint', control_id):
+                fingerprint = self.state_store.fingerprint(
+                    self.probes, self.services, files, units,
+                    salt=f"{control_id}:{self.results['validator_version']}")
+            previous = None if self.tiered else self.state_store.reusable(control_id, fingerprint)
+            if previous is not None:
+                self.logger.debug(f"Inputs of {control_id} unchanged, reusing previous result")
+                self.state_store.record(control_id, fingerprint, previous,
+                                        self.state_store.evaluated_at(control_id))
+                return dict(previous, evaluation='reused')
+        
+        evaluated_at = self._evaluated_at[control_id] = time.time()
+        if self.root is not None:
+            self.probes.take_unavailable()
+        try:
+            with self.timings.span('validate', control_id):
+                result = check()
+        except Exception as e:
+            self.logger.error(f"Check for {control_id} failed unexpectedly: {str(e)}")
+            result = {
+                'control': control_id.split(':', 1)[-1],
+                'title': '',
+                'status': 'ERROR',
+                'details': {},
+                'findings': [f'Unexpected validation error: {str(e)}']
+            }
+        if self.root is not None:
+            result = self._offline_result(result, self.probes.take_unavailable())
+        
+        # Errors, and results of checks whose probes were killed by their deadline,
+        # are never reused so transient failures are retried next run
+        if (fingerprint is not None and result.get('status') != 'ERROR'
+                and not self.probes.deadline_expired()):
+            self.state_store.record(control_id, fingerprint, result, evaluated_at)
+        return dict(result, evaluation='fresh')
+    
+    def _control_definition(self, control_id: str) -> Dict[str, Any]:
+        """Return the compiled catalog entry of a control (framework controls are qualified)"""
+        catalog = self.control_definitions or {}
+        framework, _, local_id = control_id.rpartition(':')
+        controls = (catalog.get('frameworks', {}).get(framework, {}) if framework else catalog).get('controls', {})
+        return controls.get(local_id, {}) or {}
+    
+    def _schedule_tiers(self, checks: List[Check]) -> Tuple[List[Check], Dict[str, Dict[str, Any]]]:
+        """
+        Split checks into those due in this run and the stored results of the others
+        
+        Stored results live in the incremental state, so without it (--full,
+        --root) every check runs. Deferred results are marked 'deferred'.
+        """
+        if self.state_store is None:
+            return checks, {}
+        schedule = TieredSchedule(self.costs, self.cpu_budget)
+        controls = {}
+        for control_id, _ in checks:
+            definition = self._control_definition(control_id)
+            stored = self.state_store.stored_result(control_id) is not None
+            controls[control_id] = (
+                self.state_store.evaluated_at(control_id) if stored else None,
+                schedule.max_staleness(control_id, definition.get('max_staleness'), definition.get('cost')),
+                schedule.cost(control_id, definition.get('cost')))
+        due = set(schedule.select(controls))
+        
+        deferred = {}
+        for control_id, _ in checks:
+            if control_id not in due:
+                self._evaluated_at[control_id] = controls[control_id][0]
+                deferred[control_id] = dict(self.state_store.stored_result(control_id), evaluation='deferred')
+        self.results['schedule'] = {
+            'due_controls': len(due),
+            'deferred_controls': len(deferred),
+            'cpu_budget_seconds': self.cpu_budget,
+            'due_cost_seconds': round(sum(controls[control_id][2] for control_id in due), 6),
+        }
+        self.logger.info(f"Tiered schedule: {len(due)} of {len(checks)} controls due, "
+                         f"{len(deferred)} reported from stored results")
+        return [check for check in checks if check[0] in due], deferred
+    
+    def _report_result(self, control_id: str, result: Dict[str, Any]) -> ControlResult:
+        """Build a control's report record; tiered runs add when and how long ago it was evaluated"""
+        evaluated_at = self._evaluated_at.get(control_id) if self.tiered else None
+        if evaluated_at is not None:
+            result = dict(result,
+                          evaluated_at=datetime.fromtimestamp(evaluated_at).isoformat(timespec='seconds'),
+                          staleness=round(max(0.0, time.time() - evaluated_at), 1))
+        return ControlResult.from_mapping(result)
+    
+    def _offline_result(self, result: Dict[str, Any], unavailable: List[str]) -> Dict[str, Any]:
+        """
+        Mark a failed offline check NOT_APPLICABLE when it depended on a live-only probe
+        
+        The failure may only mean the command cannot run against an image, so it
+        is not counted against the image. Passing checks keep their status.
+        """
+        if not unavailable or result.get('status') not in ('FAIL', 'ERROR'):
+            return result
+        return dict(result,
+                    status='NOT_APPLICABLE',
+                    details=dict(result.get('details', {}), requires_running_system=unavailable),
+                    findings=list(result.get('findings', [])) +
+                             [f"Requires a running system: {', '.join(unavailable)}"])
+    
+    def _run_timed(self, control_id: str, check: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run a check and record its wall-clock duration"""
+        started = time.perf_counter()
+        try:
+            return self._run_check(control_id, check)
+        finally:
+            self._control_durations[control_id] = time.perf_counter() - started
+    
+    def _control_inputs(self, control_id: str) -> Tuple[List[str], List[str]]:
+        """Return the (files, services) a control's result depends on"""
+        catalog = (self.control_definitions or {}).get('controls', {}) or {}
+        definition = catalog.get(control_id, {}) or {}
+        check_files, check_units = CHECK_INPUTS.get(control_id, ([], []))
+        if control_id in self.check_plan:
+            check_files, check_units = self.check_plan.inputs(control_id)
+        files = list(dict.fromkeys(list(definition.get('files_affected', []) or []) + check_files))
+        # A log the check only requires to exist is fingerprinted by presence even
+        # when files_affected also lists it
+        presence = {path for path in check_files if isinstance(path, ExistenceInput)}
+        files = [ExistenceInput(path) if path in presence else path for path in files]
+        units = list(dict.fromkeys(list(definition.get('services_affected', []) or []) + check_units))
+        return files, units
+    
+    def _open_state_store(self) -> Optional[ControlStateStore]:
+        """Load the incremental state store, or None when incremental mode is off"""
+        if not self.incremental:
+            return None
+        try:
+            return ControlStateStore(self.state_path, hash_contents=self.hash_inputs)
+        except Exception as e:
+            self.logger.warning(f"Incremental state unavailable, running full validation: {e}")
+            return None
+    
+    def _execute_checks(self, checks: List[Check]) -> Dict[str, Dict[str, Any]]:
+        """
+        Execute checks on a bounded thread pool
+        
+        Checks spend nearly all of their time waiting on subprocesses and file
+        I/O, so threads let a hung command overlap with the remaining checks
+        instead of stalling the whole run.
+        
+        Args:
+            checks: Ordered list of (control_id, callable) pairs
+            
+        Returns:
+            Results keyed by control ID, in the same order as ``checks``
+        """
+        if self.deadline is not None:
+            scheduler = DeadlineScheduler(self.deadline, self.jobs, self.costs, started=self._run_started)
+            return scheduler.run(checks, self._run_budgeted, self._timeout_result)
+        
+        if self.jobs == 1 or len(checks) <= 1:
+            return {control_id: self._run_timed(control_id, check) for control_id, check in checks}
+        
+        from concurrent.futures import ThreadPoolExecutor
+        
+        # Start historically expensive checks first so they do not trail the run
+        callables = dict(checks)
+        with ThreadPoolExecutor(max_workers=min(self.jobs, len(checks)),
+                                thread_name_prefix='cmmc-check') as executor:
+            futures = {control_id: executor.submit(self._run_timed, control_id, callables[control_id])
+                       for control_id in self.costs.order(callables)}
+            return {control_id: futures[control_id].result() for control_id, _ in checks}
+    
+    def _run_budgeted(self, control_id: str, check: Callable[[], Dict[str, Any]],
+                      budget_deadline: float) -> Dict[str, Any]:
+        """
+        Run a check whose probe commands are killed at budget_deadline
+        
+        Raises:
+            BudgetExpired: A probe command was killed, so the result describes
+                the deadline rather than the system
+        """
+        self.probes.set_deadline(budget_deadline)
+        try:
+            result = self._run_timed(control_id, check)
+            if self.probes.deadline_expired():
+                raise BudgetExpired(control_id)
+            return result
+        finally:
+            self.probes.set_deadline(None)
+    
+    def _timeout_result(self, control_id: str, budget: float, reason: str) -> Dict[str, Any]:
+        """Build the TIMEOUT result of a check that did not finish within its budget"""
+        definition = (self.control_definitions or {}).get('controls', {}).get(control_id, {}) or {}
+        self.logger.warning(f"{control_id} {reason} ({budget:.1f}s)")
+        # Remember at least the budget as its cost so it starts earlier next run
+        if budget > 0:
+            self.costs.record(control_id, max(budget, self.costs.cost(control_id)))
+        self._evaluated_at[control_id] = time.time()
+        return {
+            'control': control_id.split(':', 1)[-1],
+            'title': definition.get('title', ''),
+            'status': 'TIMEOUT',
+            'details': {'budget_seconds': round(budget, 3)},
+            'findings': [f'Check {reason} (run deadline {self.deadline:g}s)'],
+            'evaluation': 'fresh'
+        }
+    
     def validate_ac_controls(self) -> Dict[str, Any]:
         """
         Validate Access Control (AC) controls
@@ -162,20 +616,7 @@ class CMICComplianceValidator:
         - AC.1.002: Authorized transaction controls
         - AC.1.003: Public system information controls
         """
-        ac_results = {}
-        
-        # AC.1.001 - SSH Configuration Validation
-        ssh_config_path = '/etc/ssh/sshd_config'  # Could be made configurable
-        ac_results['AC.1.001'] = self._validate_ssh_config(ssh_config_path)
-        
-        # AC.1.002 - Sudo Configuration Validation
-        sudoers_path = '/etc/sudoers.d/10-cmmc-restrictions'
-        ac_results['AC.1.002'] = self._validate_sudo_config(sudoers_path)
-        
-        # AC.1.003 - System Information Disclosure Controls
-        ac_results['AC.1.003'] = self._validate_system_disclosure()
-        
-        return ac_results
+        return self._execute_checks(self._family_checks()['ac'])
     
     def _validate_ssh_config(self, config_path: str) -> Dict[str, Any]:
         """Validate SSH configuration for AC.1.001 compliance"""
@@ -188,24 +629,31 @@ class CMICComplianceValidator:
         }
         
         try:
-            if not self._check_file_exists(config_path):
+            try:
+                ssh_config = self._sshd_config()
+            except OSError:
                 result['status'] = 'FAIL'
                 result['findings'].append(f'SSH config file not found: {config_path}')
                 return result
+            result['details']['config_source'] = ssh_config.source
             
-            with open(config_path, 'r') as f:
-                config_content = f.read()
-            
-            # Check password authentication is disabled
-            password_auth_disabled = 'PasswordAuthentication no' in config_content
+            # Check password authentication is disabled (OpenSSH default is yes)
+            password_auth_disabled = ssh_config.get('PasswordAuthentication') == 'no'
             result['details']['password_auth_disabled'] = password_auth_disabled
             
-            # Check public key authentication is enabled
-            pubkey_auth_enabled = 'PubkeyAuthentication yes' in config_content
+            # Match blocks can re-enable passwords for a subset of connections
+            password_match_overrides = [
+                criteria for criteria, value in ssh_config.match_overrides('PasswordAuthentication')
+                if value.lower() != 'no'
+            ]
+            result['details']['password_auth_match_overrides'] = password_match_overrides
+            
+            # Check public key authentication is enabled (OpenSSH default is yes)
+            pubkey_auth_enabled = ssh_config.get('PubkeyAuthentication') == 'yes'
             result['details']['pubkey_auth_enabled'] = pubkey_auth_enabled
             
             # Check for AllowUsers restriction
-            allow_users_configured = 'AllowUsers' in config_content
+            allow_users_configured = bool(ssh_config.get('AllowUsers'))
             result['details']['allow_users_configured'] = allow_users_configured
             
             # Check SSH service is running
@@ -213,12 +661,15 @@ class CMICComplianceValidator:
             result['details']['ssh_service_active'] = ssh_service_active
             
             # Determine overall status
-            if all([password_auth_disabled, pubkey_auth_enabled, ssh_service_active]):
+            if all([password_auth_disabled, not password_match_overrides,
+                    pubkey_auth_enabled, ssh_service_active]):
                 result['status'] = 'PASS'
             else:
                 result['status'] = 'FAIL'
                 if not password_auth_disabled:
                     result['findings'].append('Password authentication not disabled')
+                for criteria in password_match_overrides:
+                    result['findings'].append(f'Password authentication enabled in Match block: {criteria}')
                 if not pubkey_auth_enabled:
                     result['findings'].append('Public key authentication not enabled')
                 if not ssh_service_active:
@@ -245,9 +696,9 @@ class CMICComplianceValidator:
             cmmc_sudo_exists = self._check_file_exists(config_path)
             result['details']['cmmc_sudo_config_exists'] = cmmc_sudo_exists
             
-            # Check sudo logging configuration
-            rc, stdout, stderr = self._run_command('grep -r "logfile=" /etc/sudoers /etc/sudoers.d/ 2>/dev/null')
-            sudo_logging_enabled = rc == 0 and 'logfile=' in stdout
+            # Check sudo logging configuration across /etc/sudoers and its includes
+            logfile_settings = [value for _, value in find_sudoers_defaults(self.probes, 'logfile') if value]
+            sudo_logging_enabled = bool(logfile_settings)
             result['details']['sudo_logging_enabled'] = sudo_logging_enabled
             
             # Check sudo log file exists
@@ -286,13 +737,11 @@ class CMICComplianceValidator:
             issue_net_exists = self._check_file_exists('/etc/issue.net')
             result['details']['login_banners_configured'] = issue_exists and issue_net_exists
             
-            # Check SSH banner configuration
-            ssh_config_path = '/etc/ssh/sshd_config'
-            ssh_banner_configured = False
-            if self._check_file_exists(ssh_config_path):
-                with open(ssh_config_path, 'r') as f:
-                    ssh_config = f.read()
-                    ssh_banner_configured = 'Banner' in ssh_config
+            # Check SSH banner configuration (OpenSSH default is none)
+            try:
+                ssh_banner_configured = self._sshd_config().get('Banner', 'none').lower() != 'none'
+            except OSError:
+                ssh_banner_configured = False
             
             result['details']['ssh_banner_configured'] = ssh_banner_configured
             
@@ -300,11 +749,10 @@ class CMICComplianceValidator:
             info_disclosure_found = False
             for banner_file in ['/etc/issue', '/etc/issue.net']:
                 if self._check_file_exists(banner_file):
-                    with open(banner_file, 'r') as f:
-                        content = f.read().lower()
-                        if any(term in content for term in ['version', 'kernel', 'linux', 'ubuntu', 'centos', 'rhel']):
-                            info_disclosure_found = True
-                            break
+                    content = self._read_file(banner_file).lower()
+                    if any(term in content for term in ['version', 'kernel', 'linux', 'ubuntu', 'centos', 'rhel']):
+                        info_disclosure_found = True
+                        break
             
             result['details']['info_disclosure_in_banners'] = info_disclosure_found
             
@@ -334,15 +782,7 @@ class CMICComplianceValidator:
         - AU.1.006: Audit record generation and content
         - AU.1.012: Audit record generation capability
         """
-        au_results = {}
-        
-        # AU.1.006 - Audit Configuration Validation
-        au_results['AU.1.006'] = self._validate_audit_configuration()
-        
-        # AU.1.012 - Audit Capability Validation
-        au_results['AU.1.012'] = self._validate_audit_capability()
-        
-        return au_results
+        return self._execute_checks(self._family_checks()['au'])
     
     def _validate_audit_configuration(self) -> Dict[str, Any]:
         """Validate audit system configuration for AU.1.006"""
@@ -360,7 +800,7 @@ class CMICComplianceValidator:
             result['details']['auditd_service_active'] = auditd_active
             
             # Check audit rules are loaded
-            rc, stdout, stderr = self._run_command('auditctl -l')
+            rc, stdout, stderr = self._run_command(['auditctl', '-l'])
             audit_rules_loaded = rc == 0 and len(stdout.strip()) > 0
             result['details']['audit_rules_loaded'] = audit_rules_loaded
             
@@ -370,10 +810,15 @@ class CMICComplianceValidator:
             result['details']['audit_log_dir_exists'] = audit_log_dir_exists
             
             # Check audit log file exists
-            audit_log_file = '/var/log/audit/audit.log'
+            audit_log_file = AUDIT_LOG_PATH
             audit_log_exists = self._check_file_exists(audit_log_file)
             result['details']['audit_log_exists'] = audit_log_exists
             
+            # Analyze records written since the previous run (rates, gaps, key events);
+            # the checkpointed analyzer reads the log directly, so only on this host
+            if audit_log_exists and self.probes.local:
+                result['details']['audit_log_analysis'] = self._audit_log_analysis()
+            
             # Count audit rules for compliance verification
             rule_count = len(stdout.strip().split('\n')) if audit_rules_loaded else 0
             result['details']['audit_rule_count'] = rule_count
@@ -417,7 +862,7 @@ class CMICComplianceValidator:
                 'privileged'       # Privileged command execution
             ]
             
-            rc, stdout, stderr = self._run_command('auditctl -l')
+            rc, stdout, stderr = self._run_command(['auditctl', '-l'])
             
             rules_configured = {}
             for rule in required_audit_rules:
@@ -448,29 +893,96 @@ class CMICComplianceValidator:
         
         return result
     
-    def run_all_validations(self) -> Dict[str, Any]:
+    def run_all_validations(self, control_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
         """
         Execute all CMMC compliance validations
         
+        Args:
+            control_ids: Re-validate only these controls and keep the previous
+                results of all others (used by watch mode)
+        
         Returns:
             Complete validation results dictionary
         """
-        self.logger.info("Starting comprehensive CMMC compliance validation")
+        selected = set(control_ids) if control_ids is not None else None
+        if selected is None:
+            self.logger.info("Starting comprehensive CMMC compliance validation")
+        
+        # Probe results are only valid for the duration of one run
+        self._reset_probes()
+        self.state_store = self._open_state_store()
+        self.results['timestamp'] = datetime.now().isoformat()
+        run_started = time.perf_counter()
+        self._run_started = time.monotonic()
         
         try:
-            # Validate Access Control controls
-            self.logger.info("Validating Access Control (AC) controls")
-            self.results['controls']['ac'] = self.validate_ac_controls()
+            # Run every family's checks on one shared pool so the run takes
+            # roughly as long as the slowest check rather than the sum of all
+            family_checks = self._family_checks()
+            framework_checks = self._framework_checks()
+            if selected is not None:
+                family_checks = {family: [check for check in checks if check[0] in selected]
+                                 for family, checks in family_checks.items()}
+                framework_checks = {framework: [check for check in checks if check[0] in selected]
+                                    for framework, checks in framework_checks.items()}
+            self.logger.info(f"Validating control families: "
+                             f"{', '.join(family.upper() for family, checks in family_checks.items() if checks)} "
+                             f"({self.jobs} concurrent jobs)")
+            if self.frameworks:
+                self.logger.info(f"Also validating frameworks: {', '.join(self.frameworks)}")
+            # Shared checks are evaluated once, whichever framework reaches them first
+            all_checks = [check for checks in list(family_checks.values()) + list(framework_checks.values())
+                          for check in checks]
+            deferred: Dict[str, Dict[str, Any]] = {}
+            if self.tiered and selected is None:
+                all_checks, deferred = self._schedule_tiers(all_checks)
+            check_results = self._execute_checks(all_checks)
+            check_results.update(deferred)
             
-            # Validate Audit and Accountability controls
-            self.logger.info("Validating Audit and Accountability (AU) controls")
-            self.results['controls']['au'] = self.validate_au_controls()
+            # Learn check costs for ordering and deadline budgets
+            for control_id, result in check_results.items():
+                if result.get('evaluation') == 'fresh' and control_id in self._control_durations:
+                    self.costs.record(control_id, self._control_durations[control_id])
+            
+            # Reassemble per-family results in catalog order
+            for family, checks in family_checks.items():
+                family_results = self.results['controls'].setdefault(family, {})
+                for control_id, _ in checks:
+                    family_results[control_id] = self._report_result(control_id, check_results[control_id])
+            for framework, checks in framework_checks.items():
+                framework_results = self.results['frameworks'].setdefault(
+                    framework, {'title': self.check_plan.frameworks[framework], 'controls': {}})
+                for qualified_id, _ in checks:
+                    framework_results['controls'][qualified_id.split(':', 1)[1]] = \
+                        self._report_result(qualified_id, check_results[qualified_id])
+            
+            # Record probe reuse so growth of the catalog can be tracked
+            self.results['probe_cache'] = self.probes.stats()
+            self.results['service_states'] = self.services.snapshot()
+            self._record_durations(time.perf_counter() - run_started)
+            if self.timings.enabled:
+                self.results['timings'] = self.timings.report()
+            
+            # Persist input fingerprints for the next incremental run
+            if self.state_store is not None and self.persist:
+                try:
+                    self.state_store.save()
+                except OSError as e:
+                    self.logger.warning(f"Failed to save incremental state: {e}")
+            if self.persist:
+                try:
+                    self.costs.save()
+                except OSError as e:
+                    self.logger.warning(f"Failed to save check costs: {e}")
             
             # Generate summary statistics
             self._generate_summary()
             
             # Save results to file
-            self._save_results()
+            if self.persist:
+                self._save_results()
+                if self.textfile_dir:
+                    self._publish_metrics()
             
             self.logger.info("CMMC compliance validation completed")
             
@@ -480,38 +992,143 @@ class CMICComplianceValidator:
         
         return self.results
     
+    def run_profiled(self) -> Dict[str, Any]:
+        """
+        Run all validations under cProfile
+        
+        Checks run sequentially so the profile covers them (cProfile only sees
+        the calling thread). Statistics are written next to the report as
+        cmmc_compliance_report_<timestamp>.pstats.
+        
+        Returns:
+            Complete validation results dictionary
+        """
+        import cProfile
+        
+        self.jobs = 1
+        self.instrument = True
+        profiler = cProfile.Profile()
+        results = profiler.runcall(self.run_all_validations)
+        if self.report_file is not None:
+            profile_file = self.report_file.with_suffix('.pstats')
+            profiler.dump_stats(str(profile_file))
+            self.logger.info(f"Profile written to: {profile_file}")
+        return results
+    
+    def _record_durations(self, run_seconds: float) -> None:
+        """Add per-control durations and per-probe-kind duration histograms to the results"""
+        durations = self.results.setdefault('durations', {})
+        durations['run_seconds'] = round(run_seconds, 6)
+        # Controls not re-run in watch mode keep their previous duration
+        controls = durations.setdefault('controls', {})
+        for control_id, seconds in self._control_durations.items():
+            controls[control_id] = round(seconds, 6)
+        durations['probes'] = {kind: histogram(values)
+                               for kind, values in self.probes.durations().items()}
+    
+    def _publish_metrics(self) -> None:
+        """Write Prometheus metrics for the node_exporter textfile collector"""
+        try:
+            path = write_textfile(render_prometheus(self.results), self.textfile_dir)
+            self.logger.debug(f"Prometheus metrics written to: {path}")
+        except OSError as e:
+            self.logger.error(f"Failed to write Prometheus metrics: {str(e)}")
+    
     def _generate_summary(self) -> None:
         """Generate validation summary statistics"""
+        self.results['summary'] = self._summarize(
+            result for controls in self.results['controls'].values() for result in controls.values())
+        for framework in self.results.get('frameworks', {}).values():
+            framework['summary'] = self._summarize(framework['controls'].values())
+    
+    @staticmethod
+    def _summarize(control_results: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Count control results by status and compute the compliance percentage"""
         total_controls = 0
         passed_controls = 0
         failed_controls = 0
         error_controls = 0
+        timeout_controls = 0
+        not_applicable_controls = 0
+        
+        for control_result in control_results:
+            total_controls += 1
+            status = control_result.get('status', 'UNKNOWN')
+            
+            if status == 'PASS':
+                passed_controls += 1
+            elif status == 'FAIL':
+                failed_controls += 1
+            elif status == 'ERROR':
+                error_controls += 1
+            elif status == 'TIMEOUT':
+                timeout_controls += 1
+            elif status == 'NOT_APPLICABLE':
+                not_applicable_controls += 1
+        
+        applicable_controls = total_controls - not_applicable_controls
+        compliance_percentage = (passed_controls / applicable_controls * 100) if applicable_controls > 0 else 0
         
-        for family, controls in self.results['controls'].items():
-            for control_id, control_result in controls.items():
-                total_controls += 1
-                status = control_result.get('status', 'UNKNOWN')
-                
-                if status == 'PASS':
-                    passed_controls += 1
-                elif status == 'FAIL':
-                    failed_controls += 1
-                elif status == 'ERROR':
-                    error_controls += 1
-        
-        compliance_percentage = (passed_controls / total_controls * 100) if total_controls > 0 else 0
-        
-        self.results['summary'] = {
+        return {
             'total_controls': total_controls,
             'passed_controls': passed_controls,
             'failed_controls': failed_controls,
             'error_controls': error_controls,
+            'timeout_controls': timeout_controls,
+            'not_applicable_controls': not_applicable_controls,
             'compliance_percentage': round(compliance_percentage, 2),
-            'overall_status': 'COMPLIANT' if failed_controls == 0 and error_controls == 0 else 'NON_COMPLIANT'
+            'overall_status': ('COMPLIANT' if failed_controls == 0 and error_controls == 0 and timeout_controls == 0
+                               else 'NON_COMPLIANT')
         }
     
+    def watch(self, debounce: Optional[float] = None, force_polling: bool = False) -> None:
+        """
+        Validate once, then re-validate controls as their input files change
+        
+        Runs until interrupted. Each re-validation updates the report, history
+        and incremental state exactly like a scheduled run.
+        
+        Args:
+            debounce: Quiet period in seconds that ends a burst of changes
+                (default CMMC_WATCH_DEBOUNCE)
+            force_polling: Poll file metadata instead of using inotify
+        """
+        from cmmc_watch import DEFAULT_DEBOUNCE_SECONDS, DEFAULT_EXCLUDED_PREFIXES, ControlPathMap, watch
+        
+        self.run_all_validations()
+        control_ids = [control_id for checks in list(self._family_checks().values()) +
+                       list(self._framework_checks().values()) for control_id, _ in checks]
+        # The validator's own reports and state must not trigger re-validation
+        path_map = ControlPathMap({control_id: self._control_inputs(control_id)[0]
+                                   for control_id in control_ids},
+                                  exclude=DEFAULT_EXCLUDED_PREFIXES + (str(self.log_path), str(self.state_path)))
+        try:
+            watch(path_map, self.run_all_validations,
+                  debounce=DEFAULT_DEBOUNCE_SECONDS if debounce is None else debounce,
+                  force_polling=force_polling)
+        except KeyboardInterrupt:
+            self.logger.info("Watch mode stopped")
+    
+    def _history(self) -> 'ReportHistory':
+        """Open the report history store with the catalog's retention policy"""
+        from cmmc_history import HISTORY_DB_NAME, ReportHistory
+        
+        retention = (self.control_definitions or {}).get('reporting_settings', {}).get('retention', {}) or {}
+        return ReportHistory(
+            self.log_path / 'reports' / HISTORY_DB_NAME,
+            retention_days=int(retention.get('days', 90)),
+            max_full_reports=int(retention.get('max_reports', 100))
+        )
+    
     def _save_results(self) -> None:
-        """Save validation results to file"""
+        """
+        Save validation results to the history store and the latest report file
+        
+        Every run is appended to the SQLite history. Only the newest
+        REPORT_FILES_KEPT JSON files, and the --profile statistics written next
+        to them, are kept on disk; the latest report symlink is maintained for
+        existing consumers.
+        """
         try:
             # Create reports directory if it doesn't exist
             reports_dir = self.log_path / 'reports'
@@ -522,20 +1139,253 @@ class CMICComplianceValidator:
             filename = f'cmmc_compliance_report_{timestamp}.json'
             report_file = reports_dir / filename
             
-            # Save results as JSON
-            with open(report_file, 'w') as f:
-                json.dump(self.results, f, indent=2)
+            # Encoded control by control; compact unless --pretty
+            write_report(self.results, report_file, self.pretty)
             
             # Create symlink to latest report
             latest_link = reports_dir / 'latest_compliance_report.json'
-            if latest_link.exists():
+            if latest_link.is_symlink() or latest_link.exists():
                 latest_link.unlink()
             latest_link.symlink_to(filename)
             
+            self.report_file = report_file
             self.logger.info(f"Validation results saved to: {report_file}")
             
+            # Older reports live in the history store
+            report_files = sorted(reports_dir.glob('cmmc_compliance_report_*.json'))
+            for old_report in report_files[:-REPORT_FILES_KEPT]:
+                old_report.unlink()
+            # Profiles go with their report (the newest is written after this save)
+            kept = {report.stem for report in report_files[-REPORT_FILES_KEPT:]}
+            for profile_file in reports_dir.glob('cmmc_compliance_report_*.pstats'):
+                if profile_file.stem not in kept:
+                    profile_file.unlink()
+            
         except Exception as e:
             self.logger.error(f"Failed to save results: {str(e)}")
+        
+        try:
+            self._history().append(self.results)
+        except Exception as e:
+            self.logger.error(f"Failed to record results in history: {str(e)}")
+
+def _history_command(args: argparse.Namespace) -> int:
+    """Answer --history / --compact-history from the history store without validating"""
+    from cmmc_history import HISTORY_DB_NAME, ReportHistory, parse_since
+    
+    history = ReportHistory(Path(args.log_dir) / 'reports' / HISTORY_DB_NAME)
+    if args.compact_history:
+        history.compact()
+        print(f"History compacted: {history.db_path}")
+        return 0
+    
+    try:
+        since = parse_since(args.since) if args.since else None
+    except ValueError:
+        print(f"Invalid --since value: {args.since}", file=sys.stderr)
+        return 2
+    
+    rows = history.query(control_id=args.control, since=since)
+    if args.output == 'json':
+        print(json.dumps(rows, indent=2))
+    elif args.control:
+        for row in rows:
+            print(f"{row['timestamp']}  {row['control']}  {row['status']:<6}  findings={row['findings']}")
+        pass_rate = history.pass_rate(args.control, since)
+        if pass_rate is not None:
+            print(f"\n{args.control} pass rate: {pass_rate:.1f}% over {len(rows)} runs")
+    else:
+        for row in rows:
+            print(f"{row['timestamp']}  {row['hostname']}  {row['overall_status']:<14}  "
+                  f"{row['compliance_percentage'] or 0:.1f}%")
+    return 0
+
+def _fleet_command(args: argparse.Namespace) -> int:
+    """Validate the hosts listed in --fleet from this process and stream JSONL results"""
+    import asyncio
+    from cmmc_fleet import DEFAULT_FLEET_CONCURRENCY, DEFAULT_HOST_DEADLINE, TRANSPORTS, FleetRunner, read_hosts
+    
+    hosts = read_hosts(args.fleet)
+    output_path = args.fleet_output or str(
+        Path(args.log_dir) / 'reports' / f"fleet_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    
+    def validate_host(host: str, probes_factory: Callable[[Timings], ProbeCache]) -> Dict[str, Any]:
+        validator = CMICComplianceValidator(
+            config_path=args.config_dir,
+            log_path=args.log_dir,
+            state_path=args.state_dir,
+            jobs=args.jobs,
+            incremental=False,
+            use_sshd_t=args.sshd_t,
+            probes_factory=probes_factory,
+            persist=False,
+            frameworks=args.frameworks
+        )
+        validator.results['hostname'] = host
+        return validator.run_all_validations()
+    
+    with TRANSPORTS[args.transport]() as transport_factory, open(output_path, 'w') as output:
+        runner = FleetRunner(
+            validate_host, transport_factory,
+            concurrency=args.fleet_concurrency or DEFAULT_FLEET_CONCURRENCY,
+            host_deadline=args.host_deadline or DEFAULT_HOST_DEADLINE
+        )
+        counts = asyncio.run(runner.run(hosts, output))
+    
+    print(f"Fleet validation of {counts['hosts']} hosts in {counts['duration_seconds']:.1f}s: "
+          f"{counts['compliant']} compliant, {counts.get('completed', 0)} completed, "
+          f"{counts.get('timeout', 0)} timed out, {counts.get('unreachable', 0)} unreachable, "
+          f"{counts.get('error', 0)} errors")
+    print(f"Results: {output_path}")
+    return 0 if counts['compliant'] == counts['hosts'] else 1
+
+def _offline_command(args: argparse.Namespace) -> int:
+    """Validate several image roots (--root A B ...) concurrently and stream JSONL results"""
+    import asyncio
+    from cmmc_fleet import DEFAULT_FLEET_CONCURRENCY, DEFAULT_HOST_DEADLINE, FleetRunner, LocalTransport
+    
+    roots = [os.path.abspath(root) for root in args.root]
+    missing = [root for root in roots if not os.path.isdir(root)]
+    if missing:
+        print(f"Not a directory: {', '.join(missing)}", file=sys.stderr)
+        return 2
+    output_path = args.fleet_output or str(
+        Path(args.log_dir) / 'reports' / f"offline_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    
+    def validate_root(root: str, probes_factory: Callable[[Timings], ProbeCache]) -> Dict[str, Any]:
+        # Images are read in-process; the fleet runner only schedules them
+        validator = CMICComplianceValidator(
+            config_path=args.config_dir,
+            log_path=args.log_dir,
+            state_path=args.state_dir,
+            jobs=args.jobs,
+            persist=False,
+            root=root,
+            frameworks=args.frameworks
+        )
+        return validator.run_all_validations()
+    
+    runner = FleetRunner(
+        validate_root, LocalTransport,
+        concurrency=args.fleet_concurrency or DEFAULT_FLEET_CONCURRENCY,
+        host_deadline=args.host_deadline or DEFAULT_HOST_DEADLINE
+    )
+    with open(output_path, 'w') as output:
+        counts = asyncio.run(runner.run(roots, output))
+    
+    print(f"Offline validation of {counts['hosts']} images in {counts['duration_seconds']:.1f}s: "
+          f"{counts['compliant']} compliant, {counts.get('completed', 0)} completed, "
+          f"{counts.get('timeout', 0)} timed out, {counts.get('error', 0)} errors")
+    print(f"Results: {output_path}")
+    return 0 if counts['compliant'] == counts['hosts'] else 1
+
+def _aggregate_command(args: argparse.Namespace) -> int:
+    """Aggregate stored reports and fleet JSONL files (--aggregate) into fleet statistics"""
+    from cmmc_aggregate import FleetAggregate, read_client_map
+    
+    try:
+        aggregate = FleetAggregate(read_client_map(args.clients) if args.clients else None)
+    except RuntimeError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    aggregate.load(args.aggregate)
+    summary = aggregate.summary(interval=args.trend_interval)
+    if args.output == 'json':
+        print(json.dumps(summary, indent=2))
+        return 0
+    
+    print(f"Fleet: {summary['hosts']} hosts from {summary['reports']} reports "
+          f"({summary['skipped_records']} without results), {summary['compliant_hosts']} compliant, "
+          f"{summary['compliance_percentage'] or 0:.1f}% of controls passing")
+    print("\nControls (lowest pass rate first):")
+    for control_id, rates in sorted(summary['controls'].items(),
+                                    key=lambda item: (item[1]['pass_rate'] is None, item[1]['pass_rate'] or 0)):
+        rate = f"{rates['pass_rate']:.1f}%" if rates['pass_rate'] is not None else 'n/a'
+        print(f"  {control_id:<10} {rate:>7}  failing on {rates['failing']} hosts")
+    print("\nClients:")
+    for client, totals in sorted(summary['clients'].items()):
+        print(f"  {client:<20} {totals['compliance_percentage'] or 0:5.1f}%  "
+              f"{totals['compliant_hosts']}/{totals['hosts']} hosts compliant")
+    print("\nTop findings:")
+    for finding in summary['top_findings']:
+        print(f"  {finding['hosts']:>6} hosts  {finding['control']}: {finding['finding']}")
+    print("\nTrend:")
+    for bucket in summary['trend']:
+        print(f"  {bucket['period_start']}  {bucket['compliance_percentage'] or 0:5.1f}%  "
+              f"{bucket['hosts']} hosts, {bucket['reports']} reports")
+    return 0
+
+def _load_delta_base(log_dir: str, source: str) -> Optional[Dict[str, Any]]:
+    """Load the report a delta is relative to ('latest' is the newest saved report)"""
+    path = Path(log_dir) / 'reports' / 'latest_compliance_report.json' if source == 'latest' else Path(source)
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _apply_delta_command(args: argparse.Namespace) -> int:
+    """Rebuild a full report from --apply-delta and its base report (--delta-from)"""
+    from cmmc_delta import apply_delta
+    
+    with open(args.apply_delta, 'r') as f:
+        delta = json.load(f)
+    try:
+        report = apply_delta(_load_delta_base(args.log_dir, args.delta_from), delta)
+    except ValueError as e:
+        print(f"Cannot apply delta: {e}", file=sys.stderr)
+        return 2
+    write_stream(report, sys.stdout, args.pretty)
+    print()
+    return 0
+
+def _startup_benchmark(args: argparse.Namespace, runs: int = 10) -> int:
+    """
+    Measure cold start of fresh validator processes against STARTUP_BUDGET_MS
+    
+    Each sample starts a new interpreter that imports the validator, constructs
+    it (logging, catalog load) and exits without validating. One unmeasured
+    warm-up run populates the compiled catalog cache first.
+    """
+    import subprocess
+    
+    argv = [sys.executable, os.path.abspath(__file__), '--startup-only',
+            '--config-dir', args.config_dir, '--log-dir', args.log_dir, '--state-dir', args.state_dir]
+    samples = []
+    init_ms = []
+    for run in range(runs + 1):
+        started = time.perf_counter()
+        completed = subprocess.run(argv, capture_output=True, text=True)
+        elapsed = (time.perf_counter() - started) * 1000
+        if completed.returncode != 0:
+            print(f"Startup run failed: {completed.stderr.strip()}", file=sys.stderr)
+            return 2
+        if run == 0:
+            continue
+        samples.append(elapsed)
+        init_ms.append(json.loads(completed.stdout.strip().splitlines()[-1])['init_ms'])
+    
+    samples.sort()
+    median = samples[len(samples) // 2]
+    result = {
+        'runs': runs,
+        'median_ms': round(median, 1),
+        'min_ms': round(samples[0], 1),
+        'max_ms': round(samples[-1], 1),
+        'init_median_ms': round(sorted(init_ms)[len(init_ms) // 2], 1),
+        'budget_ms': STARTUP_BUDGET_MS,
+        'within_budget': median <= STARTUP_BUDGET_MS
+    }
+    if args.output == 'json':
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"Cold start over {runs} runs: median {result['median_ms']}ms "
+              f"(min {result['min_ms']}ms, max {result['max_ms']}ms, "
+              f"validator init {result['init_median_ms']}ms), budget {STARTUP_BUDGET_MS:g}ms: "
+              f"{'OK' if result['within_budget'] else 'EXCEEDED'}")
+    return 0 if result['within_budget'] else 1
 
 def main():
     """Main function for command-line execution"""
@@ -546,30 +1396,154 @@ def main():
                        help='CMMC log directory path')
     parser.add_argument('--state-dir', default=DEFAULT_STATE_PATH,
                        help='CMMC state directory path')
-    parser.add_argument('--output', choices=['json', 'summary'], default='summary',
+    parser.add_argument('--output', choices=['json', 'summary', 'prometheus'], default='summary',
                        help='Output format')
+    parser.add_argument('--pretty', action='store_true',
+                       help='Indent JSON reports and --output json (compact by default)')
+    parser.add_argument('--textfile-dir', default=DEFAULT_TEXTFILE_DIR,
+                       help='Publish Prometheus metrics to this node_exporter textfile collector directory')
+    parser.add_argument('--jobs', '-j', type=int, default=DEFAULT_JOBS,
+                       help='Maximum number of checks to run concurrently (1 disables concurrency)')
+    parser.add_argument('--full', action='store_true',
+                       help='Re-evaluate every control, ignoring stored input fingerprints')
+    parser.add_argument('--hash-inputs', action='store_true',
+                       help='Include file content hashes in input fingerprints')
+    parser.add_argument('--sshd-t', action='store_true',
+                       help='Use `sshd -T` output as the authoritative SSH configuration when available')
+    parser.add_argument('--deadline', type=parse_duration, default=os.environ.get('CMMC_DEADLINE'),
+                       help='Finish the run within this time (e.g. 20s); overrunning checks become TIMEOUT')
+    parser.add_argument('--tiered', action='store_true', default=os.environ.get('CMMC_TIERED', '0') not in ('', '0'),
+                       help='Evaluate only controls whose stored result is older than their maximum staleness')
+    parser.add_argument('--cpu-budget', type=parse_duration, default=os.environ.get('CMMC_CPU_BUDGET'),
+                       help='Check time a tiered run may spend (e.g. 5s), most overdue controls first; implies --tiered')
+    parser.add_argument('--watch', action='store_true',
+                       help='Keep running and re-validate controls whose input files change')
+    parser.add_argument('--watch-polling', action='store_true',
+                       help='Poll file metadata in watch mode instead of using inotify')
+    parser.add_argument('--debounce', type=float,
+                       help='Seconds without further changes before watch mode re-validates (default: CMMC_WATCH_DEBOUNCE or 1)')
+    parser.add_argument('--timings', action='store_true',
+                       help='Record wall/CPU time of checks, commands and file reads in the results')
+    parser.add_argument('--profile', action='store_true',
+                       help='Run under cProfile and write a .pstats file next to the report')
+    parser.add_argument('--fleet', metavar='HOSTS_FILE',
+                       help='Validate the hosts listed in this file (one per line) from this process')
+    parser.add_argument('--transport', choices=['ssh', 'local'], default='ssh',
+                       help='Fleet mode transport (local runs probes on this machine, for testing)')
+    parser.add_argument('--fleet-concurrency', type=int,
+                       help='Maximum number of hosts validated concurrently (default: CMMC_FLEET_CONCURRENCY or 20)')
+    parser.add_argument('--host-deadline', type=float,
+                       help='Seconds after which a host is reported as TIMEOUT (default: CMMC_HOST_DEADLINE or 120)')
+    parser.add_argument('--fleet-output',
+                       help='JSONL results file of --fleet or of several --root directories '
+                            '(default: reports/fleet_results_<timestamp>.jsonl or offline_results_<timestamp>.jsonl)')
+    parser.add_argument('--root', nargs='+', metavar='DIR',
+                       help='Validate unpacked images or mounted filesystems below these directories '
+                            'instead of the running system; several are validated concurrently')
+    parser.add_argument('--delta-from', metavar='REPORT',
+                       help='Print only the changes since this report (a path, or "latest" for the newest saved '
+                            'report) as compact JSON with content hashes')
+    parser.add_argument('--delta-volatile', action='store_true',
+                       help='Include durations, timings, probe statistics and timestamps in --delta-from output')
+    parser.add_argument('--apply-delta', metavar='DELTA',
+                       help='Rebuild the full report from this delta and its --delta-from base report, then exit')
+    parser.add_argument('--aggregate', nargs='+', metavar='PATH',
+                       help='Aggregate reports, fleet JSONL files or directories of them into fleet statistics '
+                            '(requires NumPy)')
+    parser.add_argument('--clients', metavar='FILE',
+                       help='"host client" pairs used by --aggregate for per-client compliance')
+    parser.add_argument('--trend-interval', type=parse_duration, default=86400,
+                       help='Bucket width of the --aggregate trend (default: 1d)')
+    parser.add_argument('--frameworks', type=lambda value: [name.strip() for name in value.split(',') if name.strip()],
+                       default=os.environ.get('CMMC_FRAMEWORKS', ''),
+                       help='Also validate these catalog frameworks, comma-separated (soc2,hipaa,pci_dss,nist_800_53 '
+                            'or all); probes and shared checks are evaluated once for all of them')
+    parser.add_argument('--history', action='store_true',
+                       help='Query stored results instead of running validation')
+    parser.add_argument('--control',
+                       help='Limit --history to one control (e.g. AC.1.001)')
+    parser.add_argument('--since',
+                       help='Limit --history to a window such as 30d, 12h or an ISO date')
+    parser.add_argument('--compact-history', action='store_true',
+                       help='Apply retention to the history store, reclaim space and exit')
+    parser.add_argument('--startup-benchmark', action='store_true',
+                       help='Measure cold start of fresh validator processes against CMMC_STARTUP_BUDGET_MS')
+    parser.add_argument('--startup-only', action='store_true', help=argparse.SUPPRESS)
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Enable verbose logging')
     
     args = parser.parse_args()
     
+    if args.startup_benchmark:
+        sys.exit(_startup_benchmark(args))
+    
+    if args.history or args.compact_history:
+        sys.exit(_history_command(args))
+    if args.aggregate:
+        sys.exit(_aggregate_command(args))
+    if args.apply_delta:
+        if not args.delta_from:
+            parser.error('--apply-delta requires --delta-from')
+        sys.exit(_apply_delta_command(args))
+    if args.fleet:
+        sys.exit(_fleet_command(args))
+    if args.root and len(args.root) > 1:
+        sys.exit(_offline_command(args))
+    if args.root and not os.path.isdir(args.root[0]):
+        print(f"Not a directory: {args.root[0]}", file=sys.stderr)
+        sys.exit(2)
+    if args.root and args.watch:
+        print("--watch cannot be combined with --root", file=sys.stderr)
+        sys.exit(2)
+    
     # Adjust logging level if verbose
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
     
     # Create validator instance
+    init_started = time.perf_counter()
     validator = CMICComplianceValidator(
         config_path=args.config_dir,
         log_path=args.log_dir,
-        state_path=args.state_dir
+        state_path=args.state_dir,
+        jobs=args.jobs,
+        incremental=not args.full,
+        hash_inputs=args.hash_inputs,
+        use_sshd_t=args.sshd_t,
+        textfile_dir=args.textfile_dir,
+        instrument=args.timings,
+        deadline=args.deadline,
+        root=args.root[0] if args.root else None,
+        frameworks=args.frameworks,
+        pretty=args.pretty,
+        tiered=args.tiered,
+        cpu_budget=args.cpu_budget
     )
     
+    if args.watch:
+        validator.watch(debounce=args.debounce, force_polling=args.watch_polling)
+        sys.exit(0)
+    
+    if args.startup_only:
+        print(json.dumps({'init_ms': round((time.perf_counter() - init_started) * 1000, 3)}))
+        sys.exit(0)
+    
+    # The base is read before this run replaces the latest report
+    delta_base = _load_delta_base(args.log_dir, args.delta_from) if args.delta_from else None
+    
     # Run validation
-    results = validator.run_all_validations()
+    results = validator.run_profiled() if args.profile else validator.run_all_validations()
     
     # Output results
-    if args.output == 'json':
-        print(json.dumps(results, indent=2))
+    if args.delta_from:
+        from cmmc_delta import make_delta
+        
+        print(dumps(make_delta(delta_base, results, volatile=args.delta_volatile)))
+    elif args.output == 'json':
+        write_stream(results, sys.stdout, args.pretty)
+        print()
+    elif args.output == 'prometheus':
+        sys.stdout.write(render_prometheus(results))
     else:
         # Summary output
         summary = results.get('summary', {})
@@ -581,8 +1555,18 @@ def main():
         print(f"Passed: {summary.get('passed_controls', 0)}")
         print(f"Failed: {summary.get('failed_controls', 0)}")
         print(f"Errors: {summary.get('error_controls', 0)}")
+        if summary.get('timeout_controls'):
+            print(f"Timed out: {summary['timeout_controls']}")
+        if summary.get('not_applicable_controls'):
+            print(f"Not applicable: {summary['not_applicable_controls']}")
         print(f"Compliance: {summary.get('compliance_percentage', 0):.1f}%")
         print(f"Status: {summary.get('overall_status', 'UNKNOWN')}")
+        for framework in results.get('frameworks', {}).values():
+            framework_summary = framework.get('summary', {})
+            print(f"{framework.get('title')}: {framework_summary.get('passed_controls', 0)}/"
+                  f"{framework_summary.get('total_controls', 0)} passed, "
+                  f"{framework_summary.get('compliance_percentage', 0):.1f}% "
+                  f"({framework_summary.get('overall_status', 'UNKNOWN')})")
         
         # Show failures if any
         if summary.get('failed_controls', 0) > 0:
@@ -0,0 +1,34 @@
+"""
+Shared fixtures for the compliance validator tests
+
+The validator modules are deployed side by side into local_bin_dir and import
+each other by module name, so files/ is put on sys.path the same way.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+FILES_DIR = Path(__file__).resolve().parent.parent / 'files'
+sys.path.insert(0, str(FILES_DIR))
+
+
+@pytest.fixture
+def make_validator(tmp_path):
+    """Build validators whose config, log and state directories live in tmp_path"""
+    from compliance_validator import CMICComplianceValidator
+
+    def make(**kwargs):
+        kwargs.setdefault('config_path', tmp_path / 'config')
+        kwargs.setdefault('log_path', tmp_path / 'log')
+        kwargs.setdefault('state_path', tmp_path / 'state')
+        kwargs.setdefault('textfile_dir', None)
+        return CMICComplianceValidator(**kwargs)
+
+    return make
+
+
+def control_result(control_id, status='PASS', **fields):
+    """A check result as returned by the validator's checks"""
+    return dict({'control': control_id, 'title': '', 'status': status, 'details': {}, 'findings': []}, **fields)
@@ -0,0 +1,97 @@
+"""Fleet aggregation over the columnar report arrays"""
+
+import pytest
+
+from cmmc_aggregate import MISSING, STATUS_CODES, FleetAggregate
+
+np = pytest.importorskip('numpy')
+
+DAY = 86400
+
+
+def report(host, timestamp, findings=None, client=None, **statuses):
+    """A validator report; statuses map control IDs (with '_' for '.') to statuses"""
+    controls = {}
+    for control_id, status in statuses.items():
+        control_id = control_id.replace('_', '.')
+        controls.setdefault(control_id[:2].lower(), {})[control_id] = {
+            'status': status, 'findings': (findings or {}).get(control_id, [])}
+    return dict({'hostname': host, 'timestamp': timestamp, 'controls': controls},
+                **({'client': client} if client else {}))
+
+
+def test_chunks_encoded_before_a_control_appeared_are_widened():
+    fleet = FleetAggregate(chunk_size=2)
+    fleet.add(report('a', '2026-01-01T00:00:00', AC_1_001='PASS'))
+    fleet.add(report('b', '2026-01-01T00:00:00', AC_1_001='FAIL'))
+    fleet.add(report('c', '2026-01-01T00:00:00', AC_1_001='PASS', AU_1_006='ERROR'))
+
+    assert fleet.arrays()['status'].tolist() == [[0, MISSING], [1, MISSING], [0, 2]]
+
+    # Reports added after the columns were merged widen the merged chunk as well
+    fleet.add(report('d', '2026-01-01T00:00:00', IA_1_076='TIMEOUT'))
+    fleet.add(report('e', '2026-01-01T00:00:00', AC_1_001='NOT_APPLICABLE', BOGUS_1_001='maybe'))
+    status = fleet.arrays()['status']
+
+    assert list(fleet.controls) == ['AC.1.001', 'AU.1.006', 'IA.1.076', 'BOGUS.1.001']
+    assert status.dtype == np.int8
+    assert status.tolist() == [[0, MISSING, MISSING, MISSING], [1, MISSING, MISSING, MISSING],
+                               [0, 2, MISSING, MISSING], [MISSING, MISSING, 3, MISSING],
+                               [4, MISSING, MISSING, STATUS_CODES['UNKNOWN']]]
+    assert fleet.arrays()['host'].tolist() == [0, 1, 2, 3, 4]
+    assert fleet.rows == 5
+
+
+def test_latest_rows_sort_reports_without_timestamp_oldest():
+    fleet = FleetAggregate(chunk_size=2)
+    fleet.add(report('a', '2026-01-02T00:00:00', AC_1_001='PASS'))
+    fleet.add(report('b', None, AC_1_001='FAIL'))
+    fleet.add(report('a', '2026-01-01T00:00:00', AC_1_001='FAIL'))
+    fleet.add(report('a', 'not a timestamp', AC_1_001='FAIL'))
+    fleet.add(report('b', None, AC_1_001='PASS'))
+    fleet.add(report('c', '2026-01-01T00:00:00', AC_1_001='PASS'))
+    assert not fleet.add({'host': 'down', 'status': 'unreachable'})
+
+    assert sorted(fleet.latest_rows().tolist()) == [0, 4, 5]
+    assert fleet.skipped == 1
+    assert fleet.pass_rates()['AC.1.001'] == {'pass_rate': 100.0, 'passed': 3, 'failing': 0, 'evaluated': 3}
+
+
+def test_trend_counts_distinct_hosts_per_bucket():
+    fleet = FleetAggregate(chunk_size=2)
+    fleet.add(report('a', '2026-01-01T01:00:00+00:00', AC_1_001='PASS', AU_1_006='PASS'))
+    fleet.add(report('a', '2026-01-01T02:00:00+00:00', AC_1_001='FAIL', AU_1_006='PASS'))
+    fleet.add(report('b', '2026-01-01T03:00:00+00:00', AC_1_001='PASS', AU_1_006='NOT_APPLICABLE'))
+    fleet.add(report('a', '2026-01-05T01:00:00+00:00', AC_1_001='PASS', AU_1_006='PASS'))
+    fleet.add(report('c', None, AC_1_001='FAIL'))
+
+    trend = fleet.trend(interval=DAY)
+
+    assert [(bucket['reports'], bucket['hosts'], bucket['compliant_reports'], bucket['compliance_percentage'])
+            for bucket in trend] == [(3, 2, 2, 80.0), (1, 1, 1, 100.0)]
+    assert trend[0]['period_start'] < trend[1]['period_start']
+    # Buckets narrower than the spread of one host's reports
+    assert [(bucket['reports'], bucket['hosts']) for bucket in fleet.trend(interval=3600)] == [
+        (1, 1), (1, 1), (1, 1), (1, 1)]
+    assert FleetAggregate().trend() == []
+
+
+def test_findings_and_compliance_count_only_each_hosts_latest_report():
+    findings = {'AC.1.001': ['Guest account enabled'], 'AU.1.006': ['auditd not running']}
+    fleet = FleetAggregate(client_map={'a': 'acme', 'b': 'acme'}, chunk_size=2)
+    fleet.add(report('a', '2026-01-01T00:00:00', findings, AC_1_001='FAIL', AU_1_006='FAIL'))
+    fleet.add(report('b', '2026-01-01T00:00:00', findings, AC_1_001='FAIL', AU_1_006='PASS'))
+    fleet.add(report('a', '2026-01-02T00:00:00', findings, AC_1_001='PASS', AU_1_006='ERROR'))
+    fleet.add(report('c', '2026-01-02T00:00:00', findings, client='globex', AC_1_001='PASS', AU_1_006='PASS'))
+
+    assert fleet.top_findings() == [
+        {'control': 'AC.1.001', 'finding': 'Guest account enabled', 'hosts': 1},
+        {'control': 'AU.1.006', 'finding': 'auditd not running', 'hosts': 1}]
+    assert fleet.top_findings(limit=1) == fleet.top_findings()[:1]
+    assert fleet.client_compliance() == {
+        'acme': {'hosts': 2, 'compliant_hosts': 0, 'compliance_percentage': 50.0},
+        'globex': {'hosts': 1, 'compliant_hosts': 1, 'compliance_percentage': 100.0}}
+
+    summary = fleet.summary()
+    assert (summary['reports'], summary['hosts'], summary['compliant_hosts'], summary['compliance_percentage']) == (
+        4, 3, 1, 66.67)
@@ -0,0 +1,73 @@
+"""Checkpointed audit log analysis"""
+
+import os
+
+import cmmc_auditlog
+from cmmc_auditlog import AuditLogAnalyzer
+
+
+def record(timestamp, serial, key='x'):
+    return f'type=SYSCALL msg=audit({timestamp}.000:{serial}): key="{key}"\n'
+
+
+def append(path, *records):
+    with open(path, 'a') as f:
+        f.write(''.join(records))
+
+
+def test_each_run_reads_only_new_records(tmp_path):
+    log = tmp_path / 'audit.log'
+    append(log, record(1000, 1, '/etc/passwd'), record(1010, 2))
+    analyzer = AuditLogAnalyzer(tmp_path / 'state', str(log))
+
+    first = analyzer.analyze()
+    append(log, record(1020, 3))
+    second = analyzer.analyze()
+
+    assert (first['events'], first['checkpoint_reset'], first['caught_up']) == (2, 'no checkpoint', True)
+    assert first['term_events']['/etc/passwd'] == 1
+    assert (second['events'], second['checkpoint_reset'], second['caught_up']) == (1, None, True)
+    assert second['terms_without_events'] == ['/etc/shadow', 'privileged']
+
+
+def test_rotated_log_is_finished_before_the_live_log(tmp_path):
+    log = tmp_path / 'audit.log'
+    append(log, record(1000, 1))
+    analyzer = AuditLogAnalyzer(tmp_path / 'state', str(log))
+    analyzer.analyze()
+
+    append(log, record(1010, 2))
+    os.rename(log, tmp_path / 'audit.log.1')
+    append(log, record(1020, 3))
+    result = analyzer.analyze()
+
+    assert result['files_read'] == [str(tmp_path / 'audit.log.1'), str(log)]
+    assert result['events'] == 2
+
+
+def test_caught_up_compares_the_final_offset_with_the_file_size(tmp_path, monkeypatch):
+    log = tmp_path / 'audit.log'
+    lines = [record(1000 + i, i) for i in range(4)]
+    append(log, *lines)
+    # The budget ends exactly at the end of the log, then one line short of it
+    monkeypatch.setattr(cmmc_auditlog, 'MAX_BYTES_PER_RUN', sum(map(len, lines)))
+    assert AuditLogAnalyzer(tmp_path / 'exact', str(log)).analyze()['caught_up']
+
+    monkeypatch.setattr(cmmc_auditlog, 'MAX_BYTES_PER_RUN', sum(map(len, lines[:3])))
+    analyzer = AuditLogAnalyzer(tmp_path / 'behind', str(log))
+    behind = analyzer.analyze()
+    rest = analyzer.analyze()
+
+    assert (behind['events'], behind['caught_up']) == (3, False)
+    assert (rest['events'], rest['caught_up']) == (1, True)
+
+
+def test_checkpoint_is_only_advanced_when_persisting(tmp_path):
+    log = tmp_path / 'audit.log'
+    append(log, record(1000, 1))
+    analyzer = AuditLogAnalyzer(tmp_path / 'state', str(log))
+
+    assert analyzer.analyze(persist=False)['events'] == 1
+    assert not analyzer.checkpoint_file.exists()
+    assert analyzer.analyze()['events'] == 1
+    assert analyzer.analyze()['events'] == 0
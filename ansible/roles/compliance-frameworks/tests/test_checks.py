@@ -0,0 +1,228 @@
+"""Declarative checks: catalog compilation, evaluation and plans"""
+
+import os
+
+import pytest
+
+import cmmc_checks
+from cmmc_checks import (COMPILED_CACHE_NAME, CatalogError, CheckContext, CheckPlan, _compile_check,
+                         compile_catalog, evaluate_check, load_compiled_catalog)
+from cmmc_packages import PACKAGE_DB_PATHS
+from cmmc_probes import ProbeCache
+from cmmc_services import ServiceStateProvider, StaticBackend
+from cmmc_sshd import SSHD_INPUTS
+
+
+def context(units=None, **kwargs):
+    return CheckContext(ProbeCache(), ServiceStateProvider(StaticBackend(units or {})), **kwargs)
+
+
+def compile_error(check):
+    control = compile_catalog({'controls': {'X': {'checks': [check]}}})['controls']['X']
+    return control.get('compile_error')
+
+
+@pytest.mark.parametrize('check, message', [
+    ({'path': '/etc/issue'}, "each check must be a mapping with a 'type'"),
+    ({'type': 'file_size', 'path': '/etc/issue'}, "unknown check type 'file_size'"),
+    ({'type': 'directive', 'path': '/etc/login.defs'}, 'directive check missing key'),
+    ({'type': 'file_exists', 'path': '/etc/issue', 'owner': 'root'}, 'unsupported fields for file_exists: owner'),
+    ({'type': 'file_mode', 'path': '/etc/shadow', 'mode': '0640', 'max_mode': '0640'}, 'not both'),
+    ({'type': 'file_mode', 'path': '/etc/shadow'}, 'needs mode, max_mode, owner or group'),
+    ({'type': 'directive', 'path': '/etc/login.defs', 'key': 'UMASK', 'matches': '(0'}, 'invalid matches pattern'),
+    ({'type': 'any_of', 'checks': []}, 'any_of needs a non-empty checks list'),
+    ({'type': 'any_of', 'checks': [{'type': 'service_active'}]}, 'X.checks[0].any_of[0]: service_active check'),
+    ({'type': 'shared', 'check': 'nope'}, "unknown shared check 'nope'"),
+])
+def test_malformed_checks_are_compile_errors(check, message):
+    with pytest.raises(CatalogError, match=message.replace('(', r'\(').replace('[', r'\[')):
+        _compile_check(check, 'X.checks[0]')
+    assert message in compile_error(check)
+
+
+@pytest.mark.parametrize('mode', [420, 384, 644, True])
+def test_unquoted_modes_are_rejected(mode):
+    # YAML 1.1 loads `mode: 0644` as 420 and `mode: 0600` as 384
+    assert 'must be a quoted octal string' in compile_error({'type': 'file_mode', 'path': '/a', 'mode': mode})
+
+
+@pytest.mark.parametrize('mode, message', [('0689', 'not an octal mode'), ('', 'not an octal mode'),
+                                           ('17777', 'out of range')])
+def test_invalid_octal_modes_name_their_check(mode, message):
+    error = compile_error({'type': 'file_mode', 'path': '/a', 'max_mode': mode})
+
+    assert error.startswith('X.checks[0]: file_mode max_mode')
+    assert message in error
+
+
+def test_malformed_control_does_not_drop_the_catalog():
+    catalog = compile_catalog({'controls': {
+        'BAD': {'checks': [{'type': 'file_mode', 'path': '/a', 'mode': 384}]},
+        'GOOD': {'title': 'Issue', 'checks': [{'type': 'file_mode', 'path': '/a', 'max_mode': '0600'}]},
+    }})
+
+    assert 'compile_error' in catalog['controls']['BAD']
+    assert catalog['controls']['GOOD']['checks'] == [
+        {'type': 'file_mode', 'path': '/a', 'max_mode': 0o600, 'name': 'file_mode:/a'}]
+
+
+def test_any_of_passes_on_the_first_passing_alternative():
+    check = _compile_check({'type': 'any_of', 'checks': [
+        {'type': 'service_active', 'service': 'unattended-upgrades'},
+        {'type': 'service_active', 'service': 'dnf-automatic.timer'}]}, 'X')
+    assert check['name'] == 'any_of:service_active:unattended-upgrades|service_active:dnf-automatic.timer'
+
+    assert evaluate_check(check, context({'dnf-automatic.timer': 'active'})) == (True, '')
+    assert evaluate_check(check, context({'unattended-upgrades': 'failed'})) == (
+        False, 'None of the alternatives passed: Service unattended-upgrades is failed; '
+               'Service dnf-automatic.timer is not-found')
+
+
+def test_directive_lookup_keeps_the_first_value(tmp_path):
+    config = tmp_path / 'login.defs'
+    config.write_text('# PASS_MAX_DAYS 1\nPASS_MAX_DAYS   90\npass_max_days 99999\nPASS_MAX_DAYS 1\n'
+                      'minlen = 14\nminlen = 8\n')
+    ctx = context()
+
+    def check(**fields):
+        return evaluate_check(_compile_check(dict({'type': 'directive', 'path': str(config)}, **fields), 'X'), ctx)
+
+    assert check(key='PASS_MAX_DAYS', max=90) == (True, '')
+    assert check(key='PASS_MAX_DAYS', ignore_case=True, max=60) == (
+        False, f'PASS_MAX_DAYS in {config} is 90, maximum 60')
+    assert check(key='minlen', separator='=', min=14) == (True, '')
+    assert check(key='UMASK', default='027', equals='027') == (True, '')
+    assert check(key='UMASK') == (False, f'UMASK in {config} is not set')
+
+
+def test_plan_deduplicates_probes_and_lists_control_inputs():
+    catalog = compile_catalog({
+        'controls': {
+            'AC.1.001': {'checks': [
+                {'type': 'file_exists', 'path': '/etc/issue'},
+                {'type': 'any_of', 'checks': [{'type': 'service_active', 'service': 'auditd'},
+                                              {'type': 'package_installed', 'package': 'audit'}]}]},
+            'AC.1.002': {'checks': [
+                {'type': 'file_mode', 'path': '/etc/issue', 'max_mode': '0644'},
+                {'type': 'service_active', 'service': 'auditd'},
+                {'type': 'sshd_option', 'key': 'PermitRootLogin', 'equals': 'no'}]},
+            'AC.1.003': {'title': 'Implemented in Python'},
+        },
+        'frameworks': {'soc2': {'controls': {'CC6.1': {'checks': [
+            {'type': 'directive', 'path': '/etc/login.defs', 'key': 'UMASK'}]}}}},
+    })
+    plan = CheckPlan(catalog)
+
+    assert plan.probes == [('stat', '/etc/issue'), ('service', 'auditd'), ('package', 'audit'),
+                           ('sshd', 'permitrootlogin'), ('read', '/etc/login.defs')]
+    assert plan.services == ['auditd']
+    assert 'AC.1.003' not in plan and 'soc2:CC6.1' in plan
+    assert plan.inputs('AC.1.001') == (['/etc/issue'] + list(PACKAGE_DB_PATHS), ['auditd'])
+    assert plan.inputs('AC.1.002') == (['/etc/issue'] + list(SSHD_INPUTS), ['auditd'])
+    assert plan.inputs('soc2:CC6.1') == (['/etc/login.defs'], [])
+
+
+def test_compiled_catalog_is_cached_until_the_yaml_changes(tmp_path, monkeypatch):
+    source = tmp_path / 'cmmc_controls.yaml'
+    source.write_text("controls:\n  AC.1.001:\n    checks:\n      - {type: file_exists, path: /etc/issue}\n")
+    cache_dir = tmp_path / 'state'
+
+    first = load_compiled_catalog(source, cache_dir)
+    assert (cache_dir / COMPILED_CACHE_NAME).exists()
+
+    # Unchanged or merely touched: served from the cache without compiling
+    compile_calls = []
+    real_compile = cmmc_checks.compile_catalog
+    monkeypatch.setattr(cmmc_checks, 'compile_catalog',
+                        lambda definitions: compile_calls.append(definitions) or real_compile(definitions))
+    assert load_compiled_catalog(source, cache_dir) == first
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert load_compiled_catalog(source, cache_dir) == first
+    assert compile_calls == []
+
+    source.write_text("controls:\n  AC.1.001:\n    checks:\n      - {type: file_exists, path: /etc/motd}\n")
+    rebuilt = load_compiled_catalog(source, cache_dir)
+
+    assert len(compile_calls) == 1
+    assert rebuilt['controls']['AC.1.001']['checks'][0]['path'] == '/etc/motd'
+    assert load_compiled_catalog(source, cache_dir) == rebuilt
+
+
+SHARED_CATALOG = {
+    'shared_checks': {
+        'sshd_installed': {'type': 'file_exists', 'path': '/nonexistent/sshd_config',
+                           'finding': 'OpenSSH server not installed'},
+        'key_only_auth': {'requires': ['sshd_installed'], 'type': 'sshd_option',
+                          'key': 'PasswordAuthentication', 'equals': 'no'},
+        'issue_present': {'type': 'file_exists', 'path': '/etc/hostname'},
+    },
+    'controls': {'IA.1.077': {'checks': [{'type': 'shared', 'check': 'key_only_auth',
+                                          'finding': 'Password authentication enabled'}]}},
+    'frameworks': {
+        'soc2': {'controls': {'CC6.1': {'checks': [{'type': 'shared', 'check': 'issue_present'},
+                                                   {'type': 'shared', 'check': 'key_only_auth'}]}}},
+        'hipaa': {'controls': {'164.312': {'checks': [{'type': 'shared', 'check': 'issue_present'}]}}},
+    },
+}
+
+
+def test_shared_check_is_evaluated_once_across_frameworks(monkeypatch):
+    catalog = compile_catalog(SHARED_CATALOG)
+    plan = CheckPlan(catalog)
+    evaluated = []
+    file_exists = cmmc_checks.EVALUATORS['file_exists']
+    monkeypatch.setitem(cmmc_checks.EVALUATORS, 'file_exists',
+                        lambda check, ctx: evaluated.append(check['path']) or file_exists(check, ctx))
+    ctx = context(shared_checks=catalog['shared_checks'])
+
+    soc2 = plan.evaluate('soc2:CC6.1', ctx)
+    hipaa = plan.evaluate('hipaa:164.312', ctx)
+
+    assert evaluated == ['/etc/hostname', '/nonexistent/sshd_config']
+    assert (soc2['control'], hipaa['control']) == ('CC6.1', '164.312')
+    assert hipaa == {'control': '164.312', 'title': '', 'status': 'PASS', 'details': {'issue_present': True},
+                     'findings': []}
+    assert soc2['details'] == {'issue_present': True, 'key_only_auth': False}
+    assert plan.inputs('soc2:CC6.1') == (['/etc/hostname'] + list(SSHD_INPUTS) + ['/nonexistent/sshd_config'], [])
+
+
+def test_dependents_of_a_failed_prerequisite_are_not_evaluated():
+    catalog = compile_catalog(SHARED_CATALOG)
+    sshd_config = []
+    ctx = context(shared_checks=catalog['shared_checks'], sshd_config=lambda: sshd_config.append(1) or {})
+
+    result = CheckPlan(catalog).evaluate('IA.1.077', ctx)
+
+    assert sshd_config == []
+    assert ctx.skipped == {'key_only_auth': 'sshd_installed'}
+    assert result['status'] == 'FAIL'
+    assert result['findings'] == ['Password authentication enabled (not evaluated, sshd_installed failed)']
+    assert ctx.shared_result('key_only_auth') == (False, 'Requires sshd_installed: Required file not found: '
+                                                         '/nonexistent/sshd_config')
+
+
+def test_shared_check_cycles_and_unknown_requirements_are_compile_errors():
+    catalog = compile_catalog({
+        'shared_checks': {
+            'a': {'requires': ['b'], 'type': 'file_exists', 'path': '/a'},
+            'b': {'type': 'any_of', 'checks': [{'type': 'shared', 'check': 'a'}]},
+            'c': {'requires': ['missing'], 'type': 'file_exists', 'path': '/c'},
+            'd': {'requires': 'a', 'type': 'file_exists', 'path': '/d'},
+            'e': {'requires': ['a'], 'type': 'file_exists', 'path': '/e'},
+            'f': {'type': 'file_exists', 'path': '/f'},
+        },
+        'controls': {'X': {'checks': [{'type': 'shared', 'check': 'e'}]}},
+    })
+    shared = catalog['shared_checks']
+
+    assert shared['a']['compile_error'] == 'shared_checks.a: dependency cycle a -> b -> a'
+    assert shared['b']['compile_error'] == 'shared_checks.b: dependency cycle a -> b -> a'
+    assert shared['c']['compile_error'] == 'shared_checks.c: requires unknown shared checks missing'
+    assert 'requires must be a list' in shared['d']['compile_error']
+    assert 'compile_error' not in shared['e'] and 'compile_error' not in shared['f']
+
+    # A check depending on a malformed one is reported as ERROR when evaluated
+    result = CheckPlan(catalog).evaluate('X', context(shared_checks=shared))
+    assert result['status'] == 'ERROR'
+    assert result['findings'] == ['Check evaluation error: shared_checks.a: dependency cycle a -> b -> a']
@@ -0,0 +1,45 @@
+"""Concurrent check execution (--jobs)"""
+
+import threading
+
+from conftest import control_result
+
+
+def test_checks_run_concurrently_up_to_jobs(make_validator):
+    validator = make_validator(jobs=3, incremental=False)
+    # Deadlocks (BrokenBarrierError) unless all three checks run at the same time
+    barrier = threading.Barrier(3, timeout=5)
+
+    def check(control_id):
+        def run():
+            barrier.wait()
+            return control_result(control_id)
+        return run
+
+    results = validator._execute_checks([(control_id, check(control_id)) for control_id in ('A', 'B', 'C')])
+
+    assert list(results) == ['A', 'B', 'C']
+    assert all(result['status'] == 'PASS' for result in results.values())
+
+
+def test_results_keep_check_order_and_mark_fresh(make_validator):
+    validator = make_validator(jobs=4, incremental=False)
+    checks = [(f'X.{index}', lambda index=index: control_result(f'X.{index}')) for index in range(10)]
+
+    results = validator._execute_checks(checks)
+
+    assert list(results) == [control_id for control_id, _ in checks]
+    assert {result['evaluation'] for result in results.values()} == {'fresh'}
+
+
+def test_unexpected_exception_becomes_error(make_validator):
+    validator = make_validator(jobs=2, incremental=False)
+
+    def broken():
+        raise RuntimeError('boom')
+
+    results = validator._execute_checks([('A', broken), ('B', lambda: control_result('B'))])
+
+    assert results['A']['status'] == 'ERROR'
+    assert 'boom' in results['A']['findings'][0]
+    assert results['B']['status'] == 'PASS'
@@ -0,0 +1,111 @@
+"""Delta reports: round trip, verification and volatile fields"""
+
+import copy
+import json
+
+import pytest
+
+from cmmc_delta import DeltaMismatch, apply_delta, make_delta, stable_report
+from cmmc_report import ControlResult, dumps
+from conftest import control_result
+
+
+def report(timestamp='2026-01-01T00:00:00', run_seconds=1.0, **statuses):
+    statuses = statuses or {'AC.1.001': 'PASS', 'AU.1.006': 'PASS'}
+    controls = {}
+    for control_id, status in statuses.items():
+        result = control_result(control_id, status, evaluation='fresh', staleness=run_seconds * 10,
+                                details={'files_checked': [f'/etc/{control_id}/{index}' for index in range(5)]})
+        controls.setdefault(control_id[:2].lower(), {})[control_id] = ControlResult(**result)
+    return {
+        'timestamp': timestamp,
+        'hostname': 'web1',
+        'controls': controls,
+        'summary': {'total_controls': len(statuses)},
+        'probe_cache': {'read': {'hits': int(run_seconds * 7), 'misses': 3}},
+        'durations': {'run_seconds': run_seconds, 'controls': {control_id: run_seconds for control_id in statuses}},
+        'timings': {'validate': {'AC.1.001': {'wall': run_seconds}}},
+    }
+
+
+def size(document):
+    return len(dumps(document))
+
+
+def test_unchanged_host_ships_almost_nothing():
+    statuses = {f'CM.1.{index:03d}': 'PASS' for index in range(20)}
+    base = report(**statuses)
+    current = report(timestamp='2026-01-01T00:15:00', run_seconds=2.0, **statuses)
+
+    delta = make_delta(base, current)
+
+    assert (delta['changes'], delta['removed'], delta['changed_controls']) == ([], [], [])
+    assert size(delta) < 0.1 * size(current)
+    assert apply_delta(base, delta) == dict(stable_report(current), timestamp='2026-01-01T00:15:00')
+
+
+def test_reused_results_of_an_unchanged_host_ship_no_changes():
+    base = report()
+    current = report(timestamp='2026-01-01T00:15:00', run_seconds=2.0)
+    for control_id, family in (('AC.1.001', 'ac'), ('AU.1.006', 'au')):
+        base['controls'][family][control_id]['details']['audit_log_analysis'] = {
+            'available': True, 'bytes_read': 8192, 'records': 40, 'events': 3, 'gaps_over_threshold': 0}
+        reused = dict(current['controls'][family][control_id], evaluation='reused')
+        reused['details'] = dict(reused['details'], audit_log_analysis={
+            'available': True, 'bytes_read': 512, 'records': 2, 'events': 0, 'gaps_over_threshold': 0})
+        current['controls'][family][control_id] = ControlResult(**reused)
+
+    delta = make_delta(base, current)
+
+    assert (delta['changes'], delta['removed'], delta['changed_controls']) == ([], [], [])
+
+
+def test_round_trip_of_a_status_change():
+    base = report()
+    current = report(timestamp='2026-01-01T00:15:00', run_seconds=2.0, **{'AC.1.001': 'FAIL', 'IA.1.076': 'PASS'})
+
+    delta = json.loads(dumps(make_delta(base, current)))
+    rebuilt = apply_delta(base, delta)
+
+    assert delta['changed_controls'] == ['AC.1.001', 'IA.1.076', 'AU.1.006']
+    assert rebuilt['controls']['ac']['AC.1.001']['status'] == 'FAIL'
+    assert 'au' not in rebuilt['controls']
+    assert 'durations' not in rebuilt
+    assert base == report()
+
+
+def test_volatile_deltas_rebuild_the_full_report():
+    base = report()
+    current = report(timestamp='2026-01-01T00:15:00', run_seconds=2.0)
+
+    delta = make_delta(base, current, volatile=True)
+
+    assert delta['volatile'] is True
+    assert json.loads(dumps(apply_delta(base, delta))) == json.loads(dumps(current))
+
+
+def test_version_1_deltas_still_apply():
+    base, current = report(), report(run_seconds=2.0)
+    delta = make_delta(base, current, volatile=True)
+    del delta['volatile']
+    delta['version'] = 1
+
+    assert json.loads(dumps(apply_delta(base, delta))) == json.loads(dumps(current))
+
+
+def test_wrong_base_or_tampered_delta_is_rejected():
+    base, current = report(), report(**{'AC.1.001': 'FAIL'})
+    delta = make_delta(base, current)
+
+    with pytest.raises(DeltaMismatch):
+        apply_delta(report(**{'AC.1.001': 'ERROR'}), delta)
+    tampered = copy.deepcopy(delta)
+    tampered['changes'][0][1] = 'PASS'
+    with pytest.raises(DeltaMismatch):
+        apply_delta(base, tampered)
+
+
+def test_without_base_the_delta_carries_the_report():
+    current = report()
+
+    assert apply_delta(None, make_delta(None, current)) == dict(stable_report(current), timestamp=current['timestamp'])
@@ -0,0 +1,58 @@
+"""Fleet transports and runner"""
+
+import asyncio
+import io
+import json
+import os
+
+import pytest
+
+from cmmc_fleet import (HOST_COMPLETED, HOST_TIMEOUT, TRANSPORTS, FleetRunner, LocalTransport, Transport,
+                        ssh_transport_factory)
+
+
+def test_transport_requires_a_command_builder():
+    with pytest.raises(TypeError):
+        Transport('host')
+
+
+def test_local_transport_runs_and_kills_commands():
+    async def run():
+        transport = LocalTransport('localhost')
+        result = await transport.run(['echo', 'ok'], 5)
+        timed_out = await transport.run(['sleep', '5'], 0.1)
+        await transport.close()
+        return result, timed_out
+
+    assert asyncio.run(run()) == ((0, 'ok\n', ''), (1, '', 'Command timeout'))
+
+
+def test_ssh_control_directory_is_removed_after_the_run():
+    with ssh_transport_factory(['-p', '2222']) as factory:
+        transport = factory('web1')
+        control_path = next(option for option in transport._ssh if option.startswith('ControlPath='))
+        control_dir = os.path.dirname(control_path.split('=', 1)[1])
+        assert os.path.isdir(control_dir)
+        assert transport._command(['cat', '/etc/os-release'])[-3:] == [
+            'web1', '--', 'env LC_ALL=C cat /etc/os-release']
+
+    assert not os.path.exists(control_dir)
+
+
+def test_runner_streams_one_record_per_host():
+    def validate(host, probes_factory):
+        probes = probes_factory(None)
+        if host == 'slow':
+            probes.run_command(['sleep', '5'])
+        return {'summary': {'overall_status': 'COMPLIANT'},
+                'controls': {'ac': {'AC.1.001': {'status': 'PASS', 'host': probes.read_text('/proc/self/comm')}}}}
+
+    output = io.StringIO()
+    with TRANSPORTS['local']() as transport_factory:
+        runner = FleetRunner(validate, transport_factory, concurrency=2, host_deadline=1)
+        counts = asyncio.run(runner.run(['a', 'slow', 'a'], output))
+
+    records = {record['host']: record for record in map(json.loads, output.getvalue().splitlines())}
+    assert (counts['hosts'], counts['compliant'], counts['completed'], counts['timeout']) == (2, 1, 1, 1)
+    assert records['a']['status'] == HOST_COMPLETED
+    assert records['slow']['status'] == HOST_TIMEOUT
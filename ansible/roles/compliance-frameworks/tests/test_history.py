@@ -0,0 +1,49 @@
+"""Report history queries, duration parsing and report file retention"""
+
+from datetime import datetime
+
+import pytest
+
+import compliance_validator
+from cmmc_history import parse_since
+from cmmc_scheduler import parse_duration
+
+
+@pytest.mark.parametrize('value, seconds', [
+    ('20', 20), ('1500ms', 1.5), ('2m', 120), ('1.5h', 5400), ('1d', 86400), ('2w', 1209600)])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == seconds
+
+
+@pytest.mark.parametrize('value', ['0', '-5s', '3y', ''])
+def test_parse_duration_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        parse_duration(value)
+
+
+def test_parse_since_accepts_durations_and_iso_dates():
+    assert parse_since('2w', now=2000000.0) == 2000000.0 - 1209600
+    assert parse_since('0.5h', now=10000.0) == 8200.0
+    assert parse_since('2026-01-01') == datetime(2026, 1, 1).timestamp()
+    with pytest.raises(ValueError):
+        parse_since('last tuesday')
+
+
+def test_old_reports_are_pruned_with_their_profiles(make_validator, tmp_path, monkeypatch):
+    monkeypatch.setattr(compliance_validator, 'REPORT_FILES_KEPT', 2)
+    reports_dir = tmp_path / 'log' / 'reports'
+    reports_dir.mkdir(parents=True)
+    for stamp in ('20200101_000000', '20200102_000000'):
+        (reports_dir / f'cmmc_compliance_report_{stamp}.json').write_text('{}')
+        (reports_dir / f'cmmc_compliance_report_{stamp}.pstats').write_text('')
+    # Left behind by a report pruned before profiles were
+    (reports_dir / 'cmmc_compliance_report_20190101_000000.pstats').write_text('')
+
+    validator = make_validator()
+    validator._save_results()
+
+    assert sorted(path.name for path in reports_dir.glob('cmmc_compliance_report_*')) == sorted([
+        'cmmc_compliance_report_20200102_000000.json',
+        'cmmc_compliance_report_20200102_000000.pstats',
+        validator.report_file.name,
+    ])
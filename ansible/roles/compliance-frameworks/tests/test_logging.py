@@ -0,0 +1,96 @@
+"""Queued logging: repeat limits, dropped records and the writer pipeline"""
+
+import json
+import logging
+import queue
+import types
+
+import pytest
+
+import cmmc_logging
+from cmmc_logging import (LOG_FILE_NAME, RepeatLimiter, _NonBlockingQueueHandler, configure_logging,
+                          shutdown_logging)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cmmc_logging, 'time', types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    level = root.level
+    yield root
+    shutdown_logging()
+    root.setLevel(level)
+
+
+def record(message, level=logging.WARNING, name='cmmc'):
+    return logging.makeLogRecord({'name': name, 'levelno': level, 'levelname': logging.getLevelName(level),
+                                  'msg': message})
+
+
+def test_repeat_limiter_summarizes_suppressed_messages_per_window(clock):
+    limiter = RepeatLimiter(limit=2, window=60)
+
+    admitted = [limiter.admit(record('disk slow'))[0] for _ in range(5)]
+    assert admitted == [True, True, False, False, False]
+    assert limiter.admit(record('disk slow', logging.ERROR)) == (True, [])
+    assert limiter.admit(record('disk slow', name='other')) == (True, [])
+
+    clock[0] += 61
+    write, summaries = limiter.admit(record('disk slow'))
+
+    assert write
+    assert [(summary.getMessage(), summary.repeats, summary.name) for summary in summaries] == [
+        ('disk slow (repeated 3 more times, suppressed)', 3, 'cmmc')]
+    assert limiter.flush() == []
+    assert RepeatLimiter(limit=0).admit(record('x')) == (True, [])
+
+
+def test_full_queue_drops_and_counts_records():
+    log_queue = queue.Queue(2)
+    handler = _NonBlockingQueueHandler(log_queue, RepeatLimiter(limit=0))
+    for index in range(5):
+        handler.emit(record(f'message {index}'))
+
+    assert handler.dropped == 3
+    assert [log_queue.get_nowait().getMessage() for _ in range(2)] == ['message 0', 'message 1']
+
+    handler.emit(record('message 5'))
+    notice = log_queue.get_nowait()
+    assert (notice.getMessage(), notice.dropped, notice.levelno) == (
+        'Log queue full, 3 records dropped', 3, logging.WARNING)
+    assert log_queue.get_nowait().getMessage() == 'message 5'
+    assert handler.dropped == 0
+
+
+def test_configure_logging_is_idempotent_per_directory(tmp_path, root_logger):
+    configure_logging(tmp_path / 'a')
+    handlers = list(root_logger.handlers)
+    pipeline = cmmc_logging._pipeline
+    configure_logging(tmp_path / 'a')
+
+    assert root_logger.handlers == handlers
+    assert cmmc_logging._pipeline is pipeline
+
+    configure_logging(tmp_path / 'b')
+    assert pipeline.handler not in root_logger.handlers
+    assert len(root_logger.handlers) == len(handlers)
+
+    logging.getLogger('cmmc.test').warning('check %s failed', 'AC.1.001', extra={'control': 'AC.1.001'})
+    for _ in range(cmmc_logging.LOG_REPEAT_LIMIT + 2):
+        logging.getLogger('cmmc.test').warning('repeated')
+    shutdown_logging()
+
+    assert cmmc_logging._pipeline is None
+    assert not (tmp_path / 'a' / LOG_FILE_NAME).exists()
+    entries = [json.loads(line) for line in (tmp_path / 'b' / LOG_FILE_NAME).read_text().splitlines()]
+    assert entries[0]['message'] == 'check AC.1.001 failed'
+    assert (entries[0]['logger'], entries[0]['level'], entries[0]['control']) == ('cmmc.test', 'WARNING', 'AC.1.001')
+    assert [entry['message'] for entry in entries[1:]] == (
+        ['repeated'] * cmmc_logging.LOG_REPEAT_LIMIT + ['repeated (repeated 2 more times, suppressed)'])
+    assert entries[-1]['repeats'] == 2
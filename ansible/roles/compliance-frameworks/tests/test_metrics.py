@@ -0,0 +1,34 @@
+"""Prometheus exposition of validation results"""
+
+from cmmc_metrics import histogram, render_prometheus
+from conftest import control_result
+
+
+def test_control_durations_are_gauges_and_probe_durations_histograms():
+    results = {
+        'controls': {'ac': {'AC.1.001': control_result('AC.1.001', 'FAIL', findings=['x'])}},
+        'durations': {
+            'run_seconds': 1.5,
+            'controls': {'AC.1.001': 0.25},
+            'probes': {'command': histogram([0.002, 0.3])},
+        },
+    }
+
+    lines = render_prometheus(results).splitlines()
+
+    assert '# TYPE cmmc_control_duration_seconds gauge' in lines
+    assert 'cmmc_control_duration_seconds{control="AC.1.001"} 0.25' in lines
+    assert '# TYPE cmmc_probe_duration_seconds histogram' in lines
+    assert 'cmmc_probe_duration_seconds_bucket{kind="command",le="0.005"} 1' in lines
+    assert 'cmmc_probe_duration_seconds_bucket{kind="command",le="+Inf"} 2' in lines
+    assert 'cmmc_control_passed{control="AC.1.001",family="AC"} 0' in lines
+    assert 'cmmc_control_findings{control="AC.1.001",family="AC"} 1' in lines
+
+
+def test_record_durations_keeps_one_value_per_control(make_validator):
+    validator = make_validator()
+    validator._control_durations = {'AC.1.001': 0.1234567}
+
+    validator._record_durations(2.0)
+
+    assert validator.results['durations']['controls'] == {'AC.1.001': 0.123457}
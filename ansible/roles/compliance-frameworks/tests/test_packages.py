@@ -0,0 +1,71 @@
+"""Package database parsing"""
+
+import struct
+
+import pytest
+
+from cmmc_packages import (_RPM_INT32, _RPM_STRING, _RPMTAG_EPOCH, _RPMTAG_NAME, _RPMTAG_RELEASE,
+                           _RPMTAG_VERSION, _rpm_header_fields, parse_dpkg_status)
+
+DPKG_STATUS = """\
+Package: openssh-server
+Status: install ok installed
+Priority: optional
+Version: 1:9.6p1-3ubuntu13
+Description: secure shell (SSH) server
+ Version: 0.0 on a continuation line is not a field
+
+Package: telnetd
+Status: deinstall ok config-files
+Version: 0.17-44
+
+Package: auditd
+Status: install ok installed
+Version: 1:3.1.2-2
+
+Package: auditd
+Status: install ok installed
+Version: 1:3.0.0-1
+"""
+
+
+def header(*entries):
+    """Build an rpm header blob from (tag, kind, value) entries"""
+    index, data = b'', b''
+    for tag, kind, value in entries:
+        if kind == _RPM_INT32:
+            data += b'\0' * (-len(data) % 4)
+            payload = struct.pack('>I', value)
+        else:
+            payload = value.encode() + b'\0'
+        index += struct.pack('>iIiI', tag, kind, len(data), 1)
+        data += payload
+    return struct.pack('>II', len(entries), len(data)) + index + data
+
+
+def test_dpkg_status_lists_installed_packages_only():
+    assert parse_dpkg_status(DPKG_STATUS) == {'openssh-server': '1:9.6p1-3ubuntu13', 'auditd': '1:3.1.2-2'}
+
+
+def test_dpkg_status_without_packages():
+    assert parse_dpkg_status('') == {}
+    assert parse_dpkg_status('Package: half-installed\nStatus: install ok half-installed\n') == {}
+
+
+def test_rpm_header_reads_name_version_release_and_epoch():
+    blob = header((1004, _RPM_STRING, 'summary is skipped'),
+                  (_RPMTAG_NAME, _RPM_STRING, 'openssh-server'),
+                  (_RPMTAG_EPOCH, _RPM_INT32, 2),
+                  (_RPMTAG_VERSION, _RPM_STRING, '8.7p1'),
+                  (_RPMTAG_RELEASE, _RPM_STRING, '38.el9'))
+
+    assert _rpm_header_fields(blob) == {
+        _RPMTAG_NAME: 'openssh-server', _RPMTAG_EPOCH: 2, _RPMTAG_VERSION: '8.7p1', _RPMTAG_RELEASE: '38.el9'}
+
+
+def test_rpm_header_without_epoch_or_with_truncated_data():
+    blob = header((_RPMTAG_NAME, _RPM_STRING, 'audit'), (_RPMTAG_VERSION, _RPM_STRING, '3.1.5'))
+
+    assert _rpm_header_fields(blob) == {_RPMTAG_NAME: 'audit', _RPMTAG_VERSION: '3.1.5'}
+    with pytest.raises(ValueError):
+        _rpm_header_fields(blob[:-1])
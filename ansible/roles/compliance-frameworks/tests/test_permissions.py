@@ -0,0 +1,101 @@
+"""Glob expansion, stat'ing and permission rules of file_mode checks"""
+
+import os
+import threading
+
+import pytest
+
+from cmmc_permissions import PARALLEL_THRESHOLD, permission_violations, scan_local, scandir_glob, stat_paths
+
+
+def write(path, mode=0o600):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text('ssh-ed25519 AAAA\n')
+    path.chmod(mode)
+    return str(path)
+
+
+@pytest.fixture
+def homes(tmp_path):
+    """home/<user>/.ssh/authorized_keys for more users than PARALLEL_THRESHOLD"""
+    users = [f'user{index:02d}' for index in range(PARALLEL_THRESHOLD + 4)]
+    for user in users:
+        write(tmp_path / 'home' / user / '.ssh' / 'authorized_keys')
+    return tmp_path / 'home', users
+
+
+def test_hidden_names_only_match_hidden_patterns(tmp_path):
+    for name in ('.bashrc', 'notes', '.ssh/config'):
+        write(tmp_path / name)
+
+    assert scandir_glob(f'{tmp_path}/*') == [f'{tmp_path}/notes']
+    assert scandir_glob(f'{tmp_path}/*/config') == []
+    assert sorted(scandir_glob(f'{tmp_path}/.*')) == [f'{tmp_path}/.bashrc', f'{tmp_path}/.ssh']
+    assert scandir_glob(f'{tmp_path}/.s*/conf*') == [f'{tmp_path}/.ssh/config']
+
+
+def test_intermediate_components_only_match_directories(tmp_path):
+    write(tmp_path / 'home' / 'alice' / '.ssh' / 'authorized_keys')
+    write(tmp_path / 'home' / 'README')
+
+    assert scandir_glob(f'{tmp_path}/home/*/.ssh/authorized_keys') == [
+        f'{tmp_path}/home/alice/.ssh/authorized_keys']
+    assert sorted(scandir_glob(f'{tmp_path}/home/*')) == [f'{tmp_path}/home/README', f'{tmp_path}/home/alice']
+    assert scandir_glob(f'{tmp_path}/missing/*') == []
+    assert scandir_glob('/') == []
+
+
+def test_missing_files_are_dropped_and_unstatable_files_reported(tmp_path):
+    present = write(tmp_path / 'present')
+
+    def stat(path):
+        if path.endswith('denied'):
+            raise PermissionError(13, 'Permission denied', path)
+        return os.stat(path)
+
+    entries = stat_paths([present, f'{tmp_path}/missing', f'{tmp_path}/denied'], stat)
+
+    assert [(path, st is None) for path, st in entries] == [(present, False), (f'{tmp_path}/denied', True)]
+    assert permission_violations(entries, max_mode=0o600) == [f'{tmp_path}/denied: cannot stat']
+    # Literal paths are not checked when expanded, only when stat'ed
+    assert scandir_glob(f'{tmp_path}/missing') == [f'{tmp_path}/missing']
+    assert scan_local(f'{tmp_path}/missing') == []
+
+
+def test_mode_and_max_mode_messages(tmp_path):
+    exact = write(tmp_path / 'exact', 0o640)
+    stricter = write(tmp_path / 'stricter', 0o400)
+    looser = write(tmp_path / 'looser', 0o666)
+    entries = stat_paths([exact, stricter, looser])
+    uid = os.getuid()
+
+    assert permission_violations(entries, mode=0o640) == [
+        f'{stricter}: mode 0400 != 0640', f'{looser}: mode 0666 != 0640']
+    assert permission_violations(entries, max_mode=0o640) == [f'{looser}: mode 0666 > 0640']
+    assert permission_violations(entries, max_mode=0o644, uid=uid + 1, gid=os.getgid(), owner='backup') == [
+        f'{path}: owner {uid} != backup' for path in (exact, stricter)] + [
+        f'{looser}: mode 0666 > 0644, owner {uid} != backup']
+    assert permission_violations(entries[:1], uid=uid + 1) == [f'{exact}: owner {uid} != {uid + 1}']
+
+
+def test_many_matches_are_expanded_and_stated_in_parallel(homes):
+    home, users = homes
+    (home / users[3] / '.ssh' / 'authorized_keys').chmod(0o644)
+    pattern = f'{home}/*/.ssh/authorized_key[s]'
+    expected = sorted(f'{home}/{user}/.ssh/authorized_keys' for user in users)
+
+    assert sorted(scandir_glob(pattern)) == sorted(scandir_glob(pattern, workers=1)) == expected
+
+    threads = set()
+
+    def stat(path):
+        threads.add(threading.current_thread().name)
+        return os.stat(path)
+
+    entries = stat_paths(expected, stat, workers=4)
+
+    assert [path for path, _ in entries] == expected
+    assert threads and all(name.startswith('cmmc-scan') for name in threads)
+    assert permission_violations(entries, max_mode=0o600) == [
+        f'{home}/{users[3]}/.ssh/authorized_keys: mode 0644 > 0600']
+    assert scan_local(pattern) == stat_paths(scandir_glob(pattern, workers=1), workers=1)
@@ -0,0 +1,71 @@
+"""Run-scoped probe cache and sudoers include handling"""
+
+from cmmc_probes import ProbeCache, find_sudoers_defaults, scan_sudoers
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+def test_scan_sudoers_follows_includes_in_parse_order(tmp_path):
+    sudoers = write(tmp_path / 'sudoers', (
+        'Defaults env_reset\n'
+        '#include extra\n'
+        '@includedir sudoers.d\n'
+        'root ALL=(ALL) ALL\n'))
+    write(tmp_path / 'extra', 'Defaults use_pty\n')
+    write(tmp_path / 'sudoers.d' / '20-ops', 'ops ALL=(ALL) ALL\n')
+    write(tmp_path / 'sudoers.d' / '10-logging', 'Defaults logfile="/var/log/sudo.log"\n')
+    # sudo skips editor backups and names containing a dot
+    write(tmp_path / 'sudoers.d' / '10-logging~', 'Defaults !logfile\n')
+    write(tmp_path / 'sudoers.d' / 'README.txt', 'Defaults !logfile\n')
+
+    lines = [line for _, _, line in scan_sudoers(ProbeCache(), str(sudoers))]
+
+    assert lines == [
+        'Defaults env_reset',
+        'Defaults use_pty',
+        'Defaults logfile="/var/log/sudo.log"',
+        'ops ALL=(ALL) ALL',
+        'root ALL=(ALL) ALL',
+    ]
+
+
+def test_scan_sudoers_joins_continuations_and_drops_comments(tmp_path):
+    sudoers = write(tmp_path / 'sudoers', (
+        '# comment\n'
+        '\n'
+        'Defaults secure_path=/usr/sbin:\\\n'
+        '    /usr/bin\n'))
+
+    assert scan_sudoers(ProbeCache(), str(sudoers)) == [
+        (str(sudoers), 3, 'Defaults secure_path=/usr/sbin: /usr/bin')]
+
+
+def test_scan_sudoers_stops_include_cycles(tmp_path):
+    sudoers = write(tmp_path / 'sudoers', '#include other\nDefaults a\n')
+    write(tmp_path / 'other', f'#include {sudoers}\nDefaults b\n')
+
+    lines = [line for _, _, line in scan_sudoers(ProbeCache(), str(sudoers))]
+
+    assert lines == ['Defaults b', 'Defaults a']
+
+
+def test_find_sudoers_defaults_skips_negated_options(tmp_path):
+    sudoers = write(tmp_path / 'sudoers', '#includedir sudoers.d\nDefaults !logfile\n')
+    write(tmp_path / 'sudoers.d' / 'logging', 'Defaults log_output, logfile = "/var/log/sudo.log"\n')
+
+    assert find_sudoers_defaults(ProbeCache(), 'logfile', str(sudoers)) == [
+        (str(tmp_path / 'sudoers.d' / 'logging'), '/var/log/sudo.log')]
+
+
+def test_reads_are_memoized_for_the_run(tmp_path):
+    path = write(tmp_path / 'file', 'first')
+    probes = ProbeCache()
+
+    assert probes.read_text(str(path)) == 'first'
+    path.write_text('second')
+    assert probes.read_text(str(path)) == 'first'
+    assert ProbeCache().read_text(str(path)) == 'second'
@@ -0,0 +1,145 @@
+"""Run deadline scheduling and deadline-killed probes"""
+
+import threading
+import time
+
+import pytest
+
+import cmmc_scheduler
+from cmmc_probes import ProbeCache
+from cmmc_scheduler import BudgetExpired, CostStore, DeadlineScheduler
+from conftest import control_result
+
+
+@pytest.fixture
+def costs(tmp_path):
+    return CostStore(tmp_path)
+
+
+def run_plain(control_id, check, budget_deadline):
+    return check()
+
+
+def timeout_result(calls):
+    def on_timeout(control_id, budget, reason):
+        calls.append((control_id, reason))
+        return control_result(control_id, 'TIMEOUT')
+    return on_timeout
+
+
+def test_budget_expired_becomes_timeout_without_waiting_for_the_grace_period(costs):
+    def runner(control_id, check, budget_deadline):
+        if control_id == 'A':
+            raise BudgetExpired(control_id)
+        return check()
+
+    calls = []
+    started = time.monotonic()
+    results = DeadlineScheduler(5, 2, costs).run(
+        [('A', lambda: control_result('A')), ('B', lambda: control_result('B'))], runner, timeout_result(calls))
+
+    assert [results[control_id]['status'] for control_id in ('A', 'B')] == ['TIMEOUT', 'PASS']
+    assert calls == [('A', 'exceeded its time budget')]
+    assert time.monotonic() - started < 1
+
+
+def test_abandoned_worker_takes_no_further_checks(costs, monkeypatch):
+    # Equal costs: 'stuck' starts first with a fifth of the run as its budget
+    monkeypatch.setattr(cmmc_scheduler, 'MIN_CHECK_BUDGET', 0.1)
+    released = threading.Event()
+    lock = threading.Lock()
+    active = {'now': 0, 'max': 0}
+
+    def stuck():
+        released.wait(10)
+        return control_result('stuck')
+
+    def quick(control_id):
+        def check():
+            # The first quick check only starts once 'stuck' was abandoned
+            released.set()
+            with lock:
+                active['now'] += 1
+                active['max'] = max(active['max'], active['now'])
+            time.sleep(0.1)
+            with lock:
+                active['now'] -= 1
+            return control_result(control_id)
+        return check
+
+    checks = [('stuck', stuck)] + [(f'Q{index}', quick(f'Q{index}')) for index in range(4)]
+    calls = []
+    results = DeadlineScheduler(4, 1, costs).run(checks, run_plain, timeout_result(calls))
+
+    assert results['stuck']['status'] == 'TIMEOUT'
+    assert all(results[f'Q{index}']['status'] == 'PASS' for index in range(4))
+    assert active['max'] == 1
+    assert calls == [('stuck', 'exceeded its time budget')]
+
+
+def test_late_results_are_dropped_after_run_returns(costs):
+    released = threading.Event()
+    finished = threading.Event()
+
+    def stuck():
+        released.wait(10)
+        finished.set()
+        return control_result('stuck')
+
+    calls = []
+    results = DeadlineScheduler(0.3, 1, costs).run(
+        [('stuck', stuck), ('later', lambda: control_result('later'))], run_plain, timeout_result(calls))
+    released.set()
+    assert finished.wait(5)
+    time.sleep(0.1)
+
+    assert {control_id: result['status'] for control_id, result in results.items()} == {
+        'stuck': 'TIMEOUT', 'later': 'TIMEOUT'}
+    assert sorted(calls) == [('later', 'was not started before the run deadline'),
+                             ('stuck', 'exceeded its time budget')]
+
+
+def test_deadline_killed_commands_are_not_memoized():
+    probes = ProbeCache()
+    probes.set_deadline(time.monotonic() + 0.1)
+
+    assert probes.run_command(['sleep', '0.5']) == (1, '', 'Command timeout')
+    assert probes.deadline_expired()
+    probes.set_deadline(None)
+    assert not probes.deadline_expired()
+    assert probes.run_command(['sleep', '0.5'])[0] == 0
+
+
+def test_waiter_reruns_a_command_killed_by_the_owners_deadline():
+    probes = ProbeCache()
+    results = {}
+
+    def owner():
+        probes.set_deadline(time.monotonic() + 0.2)
+        results['owner'] = probes.run_command(['sleep', '0.5'])
+
+    thread = threading.Thread(target=owner)
+    thread.start()
+    time.sleep(0.05)
+    results['waiter'] = probes.run_command(['sleep', '0.5'])
+    thread.join()
+
+    assert results['owner'][0] == 1
+    assert results['waiter'][0] == 0
+    assert not probes.deadline_expired()
+
+
+def test_check_cut_short_by_its_budget_is_timeout_and_not_stored(make_validator):
+    validator = make_validator(deadline=0.3)
+    validator.state_store = validator._open_state_store()
+    validator._run_started = time.monotonic()
+
+    def check():
+        rc, _, _ = validator._run_command(['sleep', '0.6'])
+        return control_result('AC.1.001', 'PASS' if rc == 0 else 'FAIL')
+
+    results = validator._execute_checks([('AC.1.001', check)])
+
+    assert results['AC.1.001']['status'] == 'TIMEOUT'
+    assert validator.state_store.stored_result('AC.1.001') is None
+    assert validator.probes.run_command(['sleep', '0.6'])[0] == 0
@@ -0,0 +1,78 @@
+"""Service state lookups, live and from offline images"""
+
+import os
+
+from cmmc_offline import RootedProbeCache
+from cmmc_services import ServiceStateProvider, StaticBackend, UnitFileBackend
+
+
+def link(path, target):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    os.symlink(target, path)
+
+
+def touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text('[Unit]\n')
+
+
+def test_registered_units_are_resolved_in_one_batch():
+    backend = StaticBackend({'sshd': 'active', 'auditd': 'failed'})
+    services = ServiceStateProvider(backend, ['sshd', 'auditd'])
+
+    assert services.is_active('sshd')
+    assert not services.is_active('auditd')
+    assert services.state('chronyd') == 'not-found'
+    assert backend.queries == [['sshd', 'auditd'], ['chronyd']]
+
+
+def test_unit_file_states_in_an_image(tmp_path):
+    system = tmp_path / 'etc' / 'systemd' / 'system'
+    vendor = tmp_path / 'usr' / 'lib' / 'systemd' / 'system'
+    for unit in ('sshd', 'auditd', 'telnet', 'rsh'):
+        touch(vendor / f'{unit}.service')
+    link(system / 'multi-user.target.wants' / 'sshd.service', '/usr/lib/systemd/system/sshd.service')
+    # Masked units link to /dev/null, which need not exist in the image; a
+    # leftover .wants/ link does not enable a masked unit
+    link(system / 'auditd.service', '/dev/null')
+    link(system / 'multi-user.target.wants' / 'auditd.service', '/usr/lib/systemd/system/auditd.service')
+    link(tmp_path / 'run' / 'systemd' / 'system' / 'telnet.service', '/dev/null')
+
+    backend = UnitFileBackend(RootedProbeCache(str(tmp_path)))
+
+    assert backend.query(['sshd', 'auditd', 'telnet', 'rsh', 'nfs-server']) == {
+        'sshd': 'enabled', 'auditd': 'masked', 'telnet': 'masked', 'rsh': 'disabled', 'nfs-server': 'not-found'}
+    assert not ServiceStateProvider(backend).is_active('auditd')
+
+
+def test_only_linked_units_are_enabled_in_an_image(tmp_path):
+    system = tmp_path / 'etc' / 'systemd' / 'system'
+    vendor = tmp_path / 'lib' / 'systemd' / 'system'
+    # Written locally but never enabled, and enabled locally
+    touch(system / 'telnet.service')
+    touch(system / 'backup-agent.service')
+    link(system / 'timers.target.wants' / 'backup-agent.service', '../backup-agent.service')
+    # Enabled through an alias: the .wants/ link has the unit's own name
+    touch(vendor / 'ssh.service')
+    link(system / 'sshd.service', '/lib/systemd/system/ssh.service')
+    link(system / 'multi-user.target.wants' / 'ssh.service', '/lib/systemd/system/ssh.service')
+    # Pulled in by a vendor target
+    touch(vendor / 'systemd-journald.service')
+    link(vendor / 'sysinit.target.requires' / 'systemd-journald.service', '../systemd-journald.service')
+
+    backend = UnitFileBackend(RootedProbeCache(str(tmp_path)))
+
+    assert backend.query(['telnet', 'backup-agent', 'sshd', 'ssh', 'systemd-journald']) == {
+        'telnet': 'disabled', 'backup-agent': 'enabled', 'sshd': 'enabled', 'ssh': 'enabled',
+        'systemd-journald': 'enabled'}
+    assert not ServiceStateProvider(backend).is_active('telnet')
+
+
+def test_realpath_resolves_links_inside_the_image(tmp_path):
+    link(tmp_path / 'etc' / 'alternatives' / 'editor', '/usr/bin/vim')
+    link(tmp_path / 'usr' / 'bin' / 'editor', '../../etc/alternatives/editor')
+    probes = RootedProbeCache(str(tmp_path))
+
+    assert probes.realpath('/usr/bin/editor') == '/usr/bin/vim'
+    assert probes.realpath('/') == '/'
+    assert probes.realpath('/etc/.hidden') == '/etc/.hidden'
@@ -0,0 +1,114 @@
+"""sshd_config parsing with Include and Match blocks"""
+
+import cmmc_sshd
+from cmmc_probes import ProbeCache
+from cmmc_sshd import parse_sshd_config, parse_sshd_t
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+def test_first_value_wins_and_comments_are_ignored(tmp_path):
+    config_file = write(tmp_path / 'sshd_config', (
+        '# PasswordAuthentication yes\n'
+        'passwordauthentication no\n'
+        'PasswordAuthentication yes\n'
+        'MaxAuthTries=3\n'))
+
+    config = parse_sshd_config(ProbeCache(), str(config_file))
+
+    assert config.get('PasswordAuthentication') == 'no'
+    assert config.get('maxauthtries') == '3'
+    assert config.locations['passwordauthentication'] == (str(config_file), 2)
+    assert config.get('PermitEmptyPasswords') == 'no'
+    assert not config.is_set('PermitEmptyPasswords')
+
+
+def test_include_is_parsed_in_lexical_order_at_the_point_of_inclusion(tmp_path):
+    dropins = tmp_path / 'sshd_config.d'
+    write(dropins / '20-late.conf', 'PermitRootLogin yes\nPort 2222\n')
+    write(dropins / '10-early.conf', 'PermitRootLogin no\n')
+    config_file = write(tmp_path / 'sshd_config', (
+        'Port 22\n'
+        f'Include {dropins}/*.conf\n'
+        'PermitRootLogin prohibit-password\n'))
+
+    config = parse_sshd_config(ProbeCache(), str(config_file))
+
+    assert config.get('PermitRootLogin') == 'no'
+    assert config.locations['permitrootlogin'] == (str(dropins / '10-early.conf'), 1)
+    assert config.get('Port') == '22 2222'
+    assert config.files == [str(config_file), str(dropins / '10-early.conf'), str(dropins / '20-late.conf')]
+
+
+def test_relative_include_resolves_against_the_config_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cmmc_sshd, 'SSHD_CONFIG_DIR', str(tmp_path))
+    write(tmp_path / 'sshd_config.d' / 'hardening.conf', 'PasswordAuthentication no\n')
+    config_file = write(tmp_path / 'sshd_config', 'Include "sshd_config.d/*.conf"\n')
+
+    assert parse_sshd_config(ProbeCache(), str(config_file)).get('PasswordAuthentication') == 'no'
+
+
+def test_match_block_ends_with_the_file_it_started_in(tmp_path):
+    dropin = write(tmp_path / 'sftp.conf', 'Match Group sftp\nPasswordAuthentication yes\n')
+    config_file = write(tmp_path / 'sshd_config', (
+        f'Include {dropin}\n'
+        'PasswordAuthentication no\n'))
+
+    config = parse_sshd_config(ProbeCache(), str(config_file))
+
+    assert config.get('PasswordAuthentication') == 'no'
+    assert config.match_overrides('PasswordAuthentication') == [('Group sftp', 'yes')]
+
+
+def test_include_inside_match_applies_to_the_block(tmp_path):
+    dropin = write(tmp_path / 'admins.conf', 'PermitRootLogin yes\n')
+    config_file = write(tmp_path / 'sshd_config', (
+        'Match User admin\n'
+        f'Include {dropin}\n'))
+
+    config = parse_sshd_config(ProbeCache(), str(config_file))
+
+    assert not config.is_set('PermitRootLogin')
+    assert config.match_overrides('PermitRootLogin') == [('User admin', 'yes')]
+
+
+def test_match_all_takes_precedence_over_global_values(tmp_path):
+    config_file = write(tmp_path / 'sshd_config', (
+        'PasswordAuthentication no\n'
+        'Match all\n'
+        'PasswordAuthentication yes\n'))
+
+    config = parse_sshd_config(ProbeCache(), str(config_file))
+
+    assert config.get('PasswordAuthentication') == 'yes'
+
+
+def test_include_cycles_are_bounded(tmp_path):
+    config_file = tmp_path / 'sshd_config'
+    write(config_file, f'Include {config_file}\nBanner /etc/issue.net\n')
+
+    config = parse_sshd_config(ProbeCache(), str(config_file))
+
+    assert config.get('Banner') == '/etc/issue.net'
+    assert any('Include depth exceeded' in error for error in config.errors)
+
+
+def test_missing_values_are_reported(tmp_path):
+    config_file = write(tmp_path / 'sshd_config', 'Banner\n')
+
+    config = parse_sshd_config(ProbeCache(), str(config_file))
+
+    assert config.errors == [f"{config_file}:1: missing value for 'Banner'"]
+    assert config.get('Banner') == 'none'
+
+
+def test_parse_sshd_t_output():
+    config = parse_sshd_t('port 22\nport 2222\npasswordauthentication no\n')
+
+    assert config.source == 'sshd -T'
+    assert config.get('Port') == '22 2222'
+    assert config.get('PasswordAuthentication') == 'no'
@@ -0,0 +1,17 @@
+"""Cold start of the validator module"""
+
+import subprocess
+import sys
+
+from conftest import FILES_DIR
+
+LAZY_MODULES = ('asyncio', 'sqlite3', 'ctypes', 'cProfile', 'cmmc_history', 'cmmc_fleet', 'cmmc_watch')
+
+
+def test_heavy_modules_are_imported_where_used():
+    code = ('import sys, compliance_validator; '
+            f'print(" ".join(sorted(set({LAZY_MODULES!r}) & set(sys.modules))))')
+    output = subprocess.run([sys.executable, '-c', code], cwd=str(FILES_DIR), check=True,
+                            capture_output=True, text=True).stdout
+
+    assert output.strip() == ''
@@ -0,0 +1,73 @@
+"""Incremental state: input fingerprints and result reuse"""
+
+import os
+import time
+
+from cmmc_offline import RootedProbeCache
+from cmmc_probes import ProbeCache
+from cmmc_state import ControlStateStore, ExistenceInput
+
+
+class _Services:
+    def state(self, unit):
+        return 'active'
+
+
+def fingerprint(store, files, probes=None):
+    return store.fingerprint(probes or ProbeCache(), _Services(), files, ['sshd'], salt='X:1')
+
+
+def test_fingerprint_changes_with_file_metadata(tmp_path):
+    config = tmp_path / 'config'
+    config.write_text('a\n')
+    store = ControlStateStore(tmp_path / 'state')
+    before = fingerprint(store, [str(config)])
+
+    config.write_text('a longer line\n')
+
+    assert fingerprint(store, [str(config)]) != before
+
+
+def test_existence_input_ignores_log_growth(tmp_path):
+    log = tmp_path / 'audit.log'
+    log.write_text('type=SYSCALL\n')
+    store = ControlStateStore(tmp_path / 'state')
+    before = fingerprint(store, [ExistenceInput(str(log))])
+
+    with open(log, 'a') as f:
+        f.write('type=PATH\n' * 100)
+    assert fingerprint(store, [ExistenceInput(str(log))]) == before
+
+    log.unlink()
+    assert fingerprint(store, [ExistenceInput(str(log))]) != before
+
+
+def test_content_hash_reads_through_the_probe_layer(tmp_path):
+    # The path only exists inside the image, never on the host running the test
+    image = tmp_path / 'image'
+    (image / 'etc' / 'cmmc-test').mkdir(parents=True)
+    config = image / 'etc' / 'cmmc-test' / 'config'
+    config.write_text('PermitRootLogin no\n')
+    store = ControlStateStore(tmp_path / 'state', hash_contents=True)
+
+    def image_fingerprint():
+        return fingerprint(store, ['/etc/cmmc-test/config'], RootedProbeCache(str(image)))
+
+    before = image_fingerprint()
+    stat_before = config.stat()
+    config.write_text('PermitRootLogin ye\n')
+    # Same size and timestamps: only the content hash can tell the files apart
+    os.utime(config, ns=(stat_before.st_atime_ns, stat_before.st_mtime_ns))
+
+    assert image_fingerprint() != before
+
+
+def test_stored_result_is_reused_only_for_matching_fingerprint(tmp_path):
+    store = ControlStateStore(tmp_path / 'state')
+    store.record('AC.1.001', 'abc', {'status': 'PASS'}, evaluated_at=time.time())
+    store.save()
+
+    reloaded = ControlStateStore(tmp_path / 'state')
+    assert reloaded.reusable('AC.1.001', 'abc') == {'status': 'PASS'}
+    assert reloaded.reusable('AC.1.001', 'def') is None
+    assert reloaded.stored_result('AC.1.001') == {'status': 'PASS'}
@@ -0,0 +1,60 @@
+"""Tiered scheduling of controls by cost and staleness"""
+
+import pytest
+
+from cmmc_scheduler import CHEAP_CHECK_COST, DEFAULT_MAX_STALENESS, CostStore, TieredSchedule
+
+NOW = 1_000_000.0
+
+
+@pytest.fixture
+def costs(tmp_path):
+    return CostStore(tmp_path)
+
+
+def test_max_staleness_follows_cost_unless_declared(costs):
+    costs.record('cheap', CHEAP_CHECK_COST / 2)
+    costs.record('slow', CHEAP_CHECK_COST * 10)
+    schedule = TieredSchedule(costs)
+
+    assert schedule.max_staleness('cheap') == 0.0
+    assert schedule.max_staleness('slow') == DEFAULT_MAX_STALENESS
+    assert schedule.max_staleness('slow', declared=60) == 60
+    # A declared cost stands in until the control has been timed
+    assert schedule.cost('untimed', declared=5) == 5
+    assert schedule.max_staleness('untimed', declared_cost=CHEAP_CHECK_COST / 2) == 0.0
+    assert schedule.cost('slow', declared=5) == CHEAP_CHECK_COST * 10
+
+
+def test_without_a_budget_every_due_control_is_selected(costs):
+    controls = {
+        'new': (None, 3600, 50),
+        'every-run': (NOW - 1, 0, 0.01),
+        'fresh': (NOW - 10, 3600, 1),
+        'stale': (NOW - 4000, 3600, 1),
+        'staler': (NOW - 7200, 600, 1),
+    }
+
+    assert TieredSchedule(costs).select(controls, NOW) == ['new', 'every-run', 'staler', 'stale']
+
+
+def test_budget_skips_stale_controls_that_do_not_fit(costs):
+    controls = {
+        'every-run': (NOW - 1, 0, 1),
+        'most-overdue': (NOW - 5000, 1000, 3),
+        'too-big': (NOW - 4000, 1000, 5),
+        'cheap': (NOW - 3000, 1000, 2),
+        'over': (NOW - 2000, 1000, 1),
+    }
+
+    assert TieredSchedule(costs, budget=6).select(controls, NOW) == ['every-run', 'most-overdue', 'cheap']
+
+
+def test_most_overdue_control_is_taken_beyond_the_budget(costs):
+    controls = {
+        'new': (None, 3600, 10),
+        'huge': (NOW - 7200, 3600, 100),
+        'small': (NOW - 3600, 3600, 1),
+    }
+
+    assert TieredSchedule(costs, budget=5).select(controls, NOW) == ['new', 'huge']
@@ -0,0 +1,65 @@
+"""Span timings and --profile output"""
+
+import pstats
+import time
+
+import compliance_validator
+from cmmc_timing import Timings
+
+
+def test_nested_spans_are_aggregated_per_category_and_name():
+    timings = Timings(enabled=True)
+
+    @timings.timed('command', 'sleep')
+    def command():
+        time.sleep(0.02)
+
+    with timings.span('validate', 'AC.1.001'):
+        for path in ('/etc/passwd', '/etc/group', '/etc/passwd'):
+            with timings.span('read', path):
+                time.sleep(0.01)
+        command()
+    with timings.span('validate', 'AU.1.006'):
+        pass
+
+    report = timings.report()
+
+    assert set(report) == {'validate', 'read', 'command'}
+    assert list(report['validate']) == ['AC.1.001', 'AU.1.006']
+    assert {name: span['count'] for name, span in report['read'].items()} == {'/etc/passwd': 2, '/etc/group': 1}
+    outer, reads = report['validate']['AC.1.001'], report['read']['/etc/passwd']
+    assert set(outer) == {'count', 'wall_seconds', 'cpu_seconds', 'max_wall_seconds'}
+    assert reads['max_wall_seconds'] <= reads['wall_seconds']
+    # Inner spans are part of the enclosing span's time (rounded to microseconds)
+    inner = sum(report[category][name]['wall_seconds']
+                for category, name in (('read', '/etc/passwd'), ('read', '/etc/group'), ('command', 'sleep')))
+    assert outer['wall_seconds'] >= inner - 1e-5
+    assert outer['cpu_seconds'] < outer['wall_seconds']
+
+
+def test_disabled_timings_record_nothing():
+    timings = Timings()
+
+    with timings.span('validate', 'AC.1.001'):
+        pass
+
+    assert timings.span('read', '/etc/passwd') is timings.span('command', 'id')
+    assert timings.report() == {}
+
+
+def test_profile_is_written_next_to_the_report_and_pruned_with_it(make_validator, tmp_path, monkeypatch):
+    monkeypatch.setattr(compliance_validator, 'REPORT_FILES_KEPT', 1)
+    reports_dir = tmp_path / 'log' / 'reports'
+    reports_dir.mkdir(parents=True)
+    (reports_dir / 'cmmc_compliance_report_20200101_000000.json').write_text('{}')
+    (reports_dir / 'cmmc_compliance_report_20200101_000000.pstats').write_text('')
+
+    validator = make_validator()
+    results = validator.run_profiled()
+
+    profile_file = validator.report_file.with_suffix('.pstats')
+    assert sorted(reports_dir.glob('cmmc_compliance_report_*')) == [validator.report_file, profile_file]
+    assert pstats.Stats(str(profile_file)).total_calls > 0
+    assert 'run_all_validations' in {function for _, _, function in pstats.Stats(str(profile_file)).stats}
+    assert validator.jobs == 1
+    assert set(results['timings']['validate']) >= set(results['durations']['controls'])
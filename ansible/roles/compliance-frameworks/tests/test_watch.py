@@ -0,0 +1,64 @@
+"""Watch mode path mapping and glob re-expansion"""
+
+import threading
+
+import pytest
+
+from cmmc_watch import ControlPathMap, watch
+
+KEYS = 'home/*/.ssh/authorized_keys'
+
+
+def test_directories_cover_every_level_a_glob_matches(tmp_path):
+    (tmp_path / 'home' / 'alice' / '.ssh').mkdir(parents=True)
+    (tmp_path / 'home' / 'bob').mkdir()
+    (tmp_path / 'etc').mkdir()
+    (tmp_path / 'etc' / 'passwd').write_text('')
+    path_map = ControlPathMap({'AC.1.001': [str(tmp_path / KEYS)],
+                               'IA.1.076': [str(tmp_path / 'etc' / 'passwd')]})
+
+    assert sorted(path_map.directories()) == sorted(str(tmp_path / path) for path in (
+        'home', 'home/alice', 'home/bob', 'home/alice/.ssh', 'etc'))
+
+
+def test_affected_maps_new_paths_below_a_glob_prefix(tmp_path):
+    path_map = ControlPathMap({'AC.1.001': [str(tmp_path / KEYS)],
+                               'AU.1.006': ['/var/log/audit/audit.log', '/etc/audit/auditd.conf']})
+
+    assert path_map.affected([str(tmp_path / 'home' / 'carol')]) == ['AC.1.001']
+    assert path_map.touches_glob([str(tmp_path / 'home' / 'carol')])
+    assert not path_map.touches_glob(['/etc/audit/auditd.conf'])
+    assert path_map.affected(['/etc/audit']) == ['AU.1.006']
+    # Continuously appended logs are left to the periodic full run
+    assert path_map.inputs['AU.1.006'] == ['/etc/audit/auditd.conf']
+
+
+@pytest.mark.parametrize('force_polling', [True, False], ids=['polling', 'inotify'])
+def test_new_key_file_under_an_existing_home_is_seen(tmp_path, force_polling):
+    home = tmp_path / 'home' / 'alice'
+    home.mkdir(parents=True)
+    path_map = ControlPathMap({'AC.1.001': [str(tmp_path / KEYS)]})
+    runs = []
+    ran = threading.Semaphore(0)
+    stop = threading.Event()
+
+    def revalidate(control_ids):
+        runs.append(control_ids)
+        ran.release()
+
+    thread = threading.Thread(target=watch, args=(path_map, revalidate), kwargs={
+        'debounce': 0.05, 'poll_interval': 0.05, 'full_interval': 0,
+        'force_polling': force_polling, 'stop': stop})
+    thread.start()
+    try:
+        # Let the polling watcher take its first snapshot
+        threading.Event().wait(0.2)
+        (home / '.ssh').mkdir()
+        assert ran.acquire(timeout=5)
+        (home / '.ssh' / 'authorized_keys').write_text('ssh-ed25519 AAAA alice\n')
+        assert ran.acquire(timeout=5)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert runs[:2] == [['AC.1.001'], ['AC.1.001']]
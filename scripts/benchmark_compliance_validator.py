@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Reproducible benchmark for the compliance-frameworks validator (compliance_validator.py).
+
+Builds a synthetic host tree (an /etc layout with many sudoers.d files, a large
+sshd_config with Include files and Match blocks, a large audit log) plus stub
+`systemctl` and `auditctl` commands, then runs the validator against it in fresh
+processes and records:
+
+  - full-run latency (validation and whole process)
+  - per-control latency
+  - peak RSS
+  - process spawns (all subprocesses, and calls per stub)
+
+File probes are re-based into the tree with the validator's own offline probe
+layer, while commands still spawn the stubs found first on PATH, so the live code
+paths are measured. No root privileges are needed.
+
+Results are compared with a stored JSON baseline; the run fails when a metric
+regresses by more than the threshold.
+
+Usage:
+  python3 scripts/benchmark_compliance_validator.py                  # compare with baseline
+  python3 scripts/benchmark_compliance_validator.py --save-baseline  # record a new baseline
+  python3 scripts/benchmark_compliance_validator.py --audit-log-mb 4096 --runs 3
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+VALIDATOR_DIR = REPO_ROOT / "ansible" / "roles" / "compliance-frameworks" / "files"
+DEFAULT_BASELINE = REPO_ROOT / ".benchmarks" / "compliance_validator.json"
+DEFAULT_WORKDIR = Path(tempfile.gettempdir()) / "cmmc-benchmark"
+
+BASELINE_VERSION = 1
+# Bump when the generated tree changes so cached trees are rebuilt
+TREE_VERSION = 1
+
+# Latency differences below this many seconds are treated as noise
+LATENCY_NOISE_SECONDS = 0.005
+# Peak RSS differences below this many KiB are treated as noise
+RSS_NOISE_KB = 2048
+
+SERVICES = ("sshd", "auditd", "rsyslog", "chronyd", "aidecheck.timer")
+
+STUB_SYSTEMCTL = """#!/bin/sh
+echo systemctl >> "$CMMC_BENCH_STUB_LOG"
+[ "$1" = "show" ] || exit 0
+seen=0
+for arg in "$@"; do
+    if [ "$seen" = 1 ]; then
+        printf 'Id=%s.service\\nLoadState=loaded\\nActiveState=active\\n\\n' "$arg"
+    elif [ "$arg" = "--" ]; then
+        seen=1
+    fi
+done
+"""
+
+STUB_AUDITCTL = """#!/bin/sh
+echo auditctl >> "$CMMC_BENCH_STUB_LOG"
+[ "$1" = "-l" ] && cat "$CMMC_BENCH_AUDIT_RULES"
+exit 0
+"""
+
+
+def _write(path: Path, content: str, mode: int = 0o644) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    path.chmod(mode)
+
+
+def build_tree(workdir: Path, spec: Dict[str, int]) -> Path:
+    """Create (or reuse) the synthetic host tree described by spec; returns its root"""
+    root = workdir / "root"
+    spec_file = workdir / "spec.json"
+    if root.is_dir() and spec_file.is_file() and json.loads(spec_file.read_text()) == spec:
+        return root
+    shutil.rmtree(workdir, ignore_errors=True)
+    etc = root / "etc"
+
+    _write(etc / "hostname", "bench-host\n")
+    _write(etc / "passwd", "root:x:0:0:root:/root:/bin/bash\n" + "".join(
+        f"user{i}:x:{1000 + i}:{1000 + i}::/home/user{i}:/bin/bash\n" for i in range(spec["users"])))
+    _write(etc / "shadow", "root:!:19000::::::\n" + "".join(
+        f"user{i}:$6$salt$hash:19000:0:90:7:::\n" for i in range(spec["users"])), 0o640)
+    _write(etc / "login.defs", "PASS_MAX_DAYS 90\nPASS_MIN_LEN 14\nUID_MIN 1000\nENCRYPT_METHOD SHA512\n")
+    _write(etc / "issue", "Authorized use only. Activity may be monitored.\n")
+    _write(etc / "issue.net", "Authorized use only. Activity may be monitored.\n")
+    _write(etc / "logrotate.d" / "audit", "/var/log/audit/*.log {\n    weekly\n}\n")
+
+    # sudoers with one include directory holding many drop-ins
+    _write(etc / "sudoers", "Defaults env_reset\nDefaults logfile=/var/log/sudo.log\n"
+           "root ALL=(ALL:ALL) ALL\n@includedir /etc/sudoers.d\n", 0o440)
+    _write(etc / "sudoers.d" / "10-cmmc-restrictions",
+           "Defaults use_pty\nDefaults timestamp_timeout=5\n", 0o440)
+    for i in range(spec["sudoers_files"]):
+        _write(etc / "sudoers.d" / f"50-team{i:04d}",
+               f"# Team {i}\nCmnd_Alias TEAM{i}_CMDS = /usr/bin/systemctl restart app{i}, \\\n"
+               f"    /usr/bin/journalctl -u app{i}\n%team{i} ALL=(root) NOPASSWD: TEAM{i}_CMDS\n", 0o440)
+
+    # sshd_config with Include files and trailing Match blocks
+    _write(etc / "ssh" / "sshd_config",
+           "Include /etc/ssh/sshd_config.d/*.conf\nPermitRootLogin no\nPasswordAuthentication no\n"
+           "MaxAuthTries 3\nProtocol 2\nBanner /etc/issue.net\nClientAliveInterval 300\n"
+           + "".join(f"Match User svc{i}\n    AllowTcpForwarding no\n" for i in range(spec["sshd_match_blocks"])))
+    for i in range(spec["sshd_includes"]):
+        _write(etc / "ssh" / "sshd_config.d" / f"{i:03d}-bench.conf",
+               "".join(f"AcceptEnv BENCH_{i}_{j}\n" for j in range(spec["sshd_lines_per_include"])))
+
+    rules = ("-w /etc/passwd -p wa -k identity\n-w /etc/shadow -p wa -k identity\n"
+             "-w /etc/sudoers -p wa -k scope\n-a always,exit -F path=/usr/bin/sudo -F perm=x -k privileged\n")
+    _write(etc / "audit" / "rules.d" / "cmmc.rules", "-D\n-b 8192\n" + rules)
+    _write(workdir / "audit.rules", rules)
+    _write_audit_log(root / "var" / "log" / "audit" / "audit.log", spec["audit_log_mb"] * 1024 * 1024)
+
+    bin_dir = workdir / "bin"
+    _write(bin_dir / "systemctl", STUB_SYSTEMCTL, 0o755)
+    _write(bin_dir / "auditctl", STUB_AUDITCTL, 0o755)
+
+    spec_file.write_text(json.dumps(spec, sort_keys=True))
+    return root
+
+
+def _write_audit_log(path: Path, size: int) -> None:
+    """Write roughly size bytes of auditd records with monotonically increasing timestamps"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    keys = ("identity", "privileged", "scope", "logins")
+    started = int(time.time()) - 86400
+    written, serial = 0, 1000
+    with open(path, "w") as f:
+        while written < size:
+            lines = []
+            for _ in range(4096):
+                serial += 1
+                stamp = f"{started + serial // 20}.{serial % 1000:03d}:{serial}"
+                lines.append(f'type=SYSCALL msg=audit({stamp}): arch=c000003e syscall=59 success=yes exit=0 '
+                             f'ppid=1 pid={serial % 32768} auid=1000 uid=0 comm="sudo" exe="/usr/bin/sudo" '
+                             f'key="{keys[serial % len(keys)]}"\n')
+                lines.append(f'type=PATH msg=audit({stamp}): item=0 name="/etc/passwd" inode=1 nametype=NORMAL\n')
+            chunk = "".join(lines)
+            f.write(chunk)
+            written += len(chunk)
+
+
+def run_driver(args: argparse.Namespace) -> int:
+    """Child process: run one validation against the tree and print metrics as JSON"""
+    spawns = [0]
+
+    def audit(event: str, _args: Any) -> None:
+        if event == "subprocess.Popen":
+            spawns[0] += 1
+
+    sys.addaudithook(audit)
+    sys.path.insert(0, str(VALIDATOR_DIR))
+    from cmmc_offline import RootedProbeCache
+    from cmmc_probes import ProbeCache
+    from compliance_validator import CMICComplianceValidator
+
+    class HostTreeProbes(RootedProbeCache):
+        """Files come from the tree, commands from the stubs on PATH"""
+
+        local = True
+
+        def run_command(self, argv):
+            return ProbeCache.run_command(self, argv)
+
+    validator = CMICComplianceValidator(
+        config_path=str(VALIDATOR_DIR),
+        log_path=str(Path(args.workdir) / "log"),
+        state_path=str(Path(args.workdir) / "state"),
+        jobs=args.jobs,
+        incremental=False,
+        textfile_dir=None,
+        probes_factory=lambda timings: HostTreeProbes(args.root, timings=timings),
+        persist=False,
+    )
+    started = time.perf_counter()
+    results = validator.run_all_validations()
+    run_seconds = time.perf_counter() - started
+
+    print(json.dumps({
+        "run_seconds": run_seconds,
+        "controls": {control_id: data["sum"]
+                     for control_id, data in results.get("durations", {}).get("controls", {}).items()},
+        "statuses": {control_id: result.get("status")
+                     for family in results.get("controls", {}).values()
+                     for control_id, result in family.items()},
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "spawns": spawns[0],
+    }))
+    return 0
+
+
+def _median(values: List[float]) -> float:
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def measure(args: argparse.Namespace, workdir: Path, root: Path) -> Dict[str, Any]:
+    """Run the driver in fresh processes and aggregate the samples"""
+    stub_log = workdir / "stub_calls.log"
+    state_dir = workdir / "state"
+    env = dict(os.environ,
+               PATH=f"{workdir / 'bin'}{os.pathsep}{os.environ.get('PATH', '')}",
+               CMMC_BENCH_STUB_LOG=str(stub_log),
+               CMMC_BENCH_AUDIT_RULES=str(workdir / "audit.rules"),
+               CMMC_AUDIT_INITIAL_BYTES=str(args.audit_window_mb * 1024 * 1024))
+    argv = [sys.executable, os.path.abspath(__file__), "--driver", "--root", str(root),
+            "--workdir", str(workdir), "--jobs", str(args.jobs)]
+
+    samples = []
+    # The first run compiles the catalog into the state directory and is not measured
+    for run in range(args.runs + 1):
+        # Every sample analyzes the same audit log window from scratch
+        for name in ("audit_log_checkpoint.json", "control_costs.json"):
+            (state_dir / name).unlink(missing_ok=True)
+        stub_log.write_text("")
+        started = time.perf_counter()
+        completed = subprocess.run(argv, capture_output=True, text=True, env=env)
+        process_seconds = time.perf_counter() - started
+        if completed.returncode != 0:
+            raise RuntimeError(f"Benchmark run failed:\n{completed.stderr.strip()}")
+        if run == 0:
+            continue
+        sample = json.loads(completed.stdout.strip().splitlines()[-1])
+        sample["process_seconds"] = process_seconds
+        sample["stub_calls"] = {}
+        for name in stub_log.read_text().split():
+            sample["stub_calls"][name] = sample["stub_calls"].get(name, 0) + 1
+        samples.append(sample)
+
+    control_ids = samples[0]["controls"].keys()
+    return {
+        "run_seconds": round(_median([s["run_seconds"] for s in samples]), 6),
+        "process_seconds": round(_median([s["process_seconds"] for s in samples]), 6),
+        "peak_rss_kb": max(s["peak_rss_kb"] for s in samples),
+        "spawns": max(s["spawns"] for s in samples),
+        "stub_calls": samples[-1]["stub_calls"],
+        "controls": {control_id: round(_median([s["controls"].get(control_id, 0.0) for s in samples]), 6)
+                     for control_id in control_ids},
+        "statuses": samples[-1]["statuses"],
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Return a description of every metric that regressed beyond threshold"""
+    regressions = []
+
+    def check(name: str, old: float, new: float, noise: float) -> None:
+        if new > max(old * (1 + threshold), old + noise):
+            change = f"+{(new / old - 1) * 100:.0f}%" if old else "new"
+            regressions.append(f"{name}: {old:g} -> {new:g} ({change})")
+
+    for name in ("run_seconds", "process_seconds"):
+        check(name, baseline[name], current[name], LATENCY_NOISE_SECONDS)
+    check("peak_rss_kb", baseline["peak_rss_kb"], current["peak_rss_kb"], RSS_NOISE_KB)
+    # Spawns are deterministic; any additional process is a regression
+    check("spawns", baseline["spawns"], current["spawns"], 0)
+    for stub, calls in current["stub_calls"].items():
+        check(f"stub_calls[{stub}]", baseline["stub_calls"].get(stub, 0), calls, 0)
+    for control_id, seconds in current["controls"].items():
+        if control_id in baseline["controls"]:
+            check(f"controls[{control_id}]", baseline["controls"][control_id], seconds, LATENCY_NOISE_SECONDS)
+    return regressions
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="Measured runs (median latency)")
+    parser.add_argument("--jobs", "-j", type=int, default=4, help="Validator --jobs")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative regression before failing (0.2 = 20%%)")
+    parser.add_argument("--workdir", type=Path, default=DEFAULT_WORKDIR,
+                        help="Directory for the synthetic tree (reused while its spec is unchanged)")
+    parser.add_argument("--output", type=Path, help="Also write the results to this JSON file")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--sudoers-files", type=int, default=300)
+    parser.add_argument("--sshd-includes", type=int, default=50)
+    parser.add_argument("--sshd-lines-per-include", type=int, default=40)
+    parser.add_argument("--sshd-match-blocks", type=int, default=100)
+    parser.add_argument("--audit-log-mb", type=int, default=256, help="Size of the synthetic audit log")
+    parser.add_argument("--audit-window-mb", type=int, default=64,
+                        help="Audit log tail analyzed per run (CMMC_AUDIT_INITIAL_BYTES)")
+    parser.add_argument("--driver", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.driver:
+        return run_driver(args)
+
+    spec = {
+        "tree_version": TREE_VERSION,
+        "users": args.users,
+        "sudoers_files": args.sudoers_files,
+        "sshd_includes": args.sshd_includes,
+        "sshd_lines_per_include": args.sshd_lines_per_include,
+        "sshd_match_blocks": args.sshd_match_blocks,
+        "audit_log_mb": args.audit_log_mb,
+    }
+    workdir = args.workdir.resolve()
+    started = time.perf_counter()
+    root = build_tree(workdir, spec)
+    print(f"Synthetic tree ready in {time.perf_counter() - started:.1f}s: {root}")
+
+    metrics = measure(args, workdir, root)
+    result = {
+        "version": BASELINE_VERSION,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "runs": args.runs,
+        "jobs": args.jobs,
+        "audit_window_mb": args.audit_window_mb,
+        "spec": spec,
+        "metrics": metrics,
+    }
+
+    print(f"Run: {metrics['run_seconds'] * 1000:.1f}ms median "
+          f"(process {metrics['process_seconds'] * 1000:.1f}ms), peak RSS {metrics['peak_rss_kb'] / 1024:.1f}MiB, "
+          f"{metrics['spawns']} spawns {metrics['stub_calls']}")
+    for control_id, seconds in sorted(metrics["controls"].items(), key=lambda item: -item[1]):
+        print(f"  {control_id:<10} {seconds * 1000:8.1f}ms  {metrics['statuses'].get(control_id, '')}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"Baseline saved: {args.baseline}")
+        return 0
+
+    if not args.baseline.is_file():
+        print(f"No baseline at {args.baseline}; record one with --save-baseline")
+        return 0
+    baseline = json.loads(args.baseline.read_text())
+    if (baseline.get("version"), baseline.get("spec"), baseline.get("jobs"), baseline.get("audit_window_mb")) != \
+            (BASELINE_VERSION, spec, args.jobs, args.audit_window_mb):
+        print("Baseline was recorded with different settings; record a new one with --save-baseline",
+              file=sys.stderr)
+        return 2
+    regressions = compare(baseline["metrics"], metrics, args.threshold)
+    if regressions:
+        print(f"Regressions against baseline {baseline.get('commit') or args.baseline} "
+              f"(threshold {args.threshold * 100:.0f}%):")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print(f"No regressions against baseline {baseline.get('commit') or args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())